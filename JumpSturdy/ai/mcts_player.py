@@ -2,7 +2,12 @@ import random
 import math
 import time
 from JumpSturdy.ai.evolved_player import EvolvedAIPlayer
-from JumpSturdy.game_state.board import Board, Coordinate, Move
+from JumpSturdy.ai.tablebase import open_tablebase, WIN, DRAW
+from JumpSturdy.game_state.board import Board, move_to_string
+
+def side_to_move(board):
+    """Get the color of the player to move, make_move passes the turn with every move."""
+    return "Blue" if board.blue_to_move else "Red"
 
 def reverse_move_string(move):
     positions = move.split('-')
@@ -14,7 +19,7 @@ class MCTSNode:
     Initialization of the move of this node, the parent node, the children of this node, 
     number of simulations won and number of simulations under this node
     """
-    def __init__(self, move:Move, parent):
+    def __init__(self, move:int, parent):
         self.move = move
         self.parent = parent
         self.children = {}
@@ -53,21 +58,9 @@ class Player:
         Generates a random move for the player
 
         Returns:
-            Move: "move" object representing the randomly generated move
+            int: packed move representing the randomly generated move
         """
-        posible_moves = self.board.get_legal_moves_list(self.board.get_legal_moves(self.board.get_legal_moves(
-            {'singles_left_empty': True, 'singles_front_empty': True, 'singles_right_empty': True,
-                'singles_kill_left_singles': True, 'singles_kill_left_doubles': True, 'singles_kill_right_singles': True,
-                'singles_kill_right_doubles': True, 'singles_upgrade_left': True, 'singles_upgrade_front': True,
-                'singles_upgrade_right': True, 'doubles_l_l_f_empty': True, 'doubles_f_f_l_empty': True,
-                'doubles_f_f_r_empty': True, 'doubles_r_r_f_empty': True, 'doubles_kill_l_l_f_singles': True,
-                'doubles_kill_l_l_f_doubles': True, 'doubles_kill_f_f_l_singles': True, 'doubles_kill_f_f_l_doubles': True,
-                'doubles_kill_f_f_r_singles': True, 'doubles_kill_f_f_r_doubles': True, 'doubles_kill_r_r_f_singles': True,
-                'doubles_kill_r_r_f_doubles': True, 'doubles_l_l_f_singles': True, 'doubles_f_f_l_singles': True,
-                'doubles_f_f_r_singles': True, 'doubles_r_r_f_singles': True}, self.color), self.color))
-        random_index = random.randrange(0, len(posible_moves), 1)
-        move = posible_moves[random_index]
-        return move
+        return random.choice(self.board.generate_moves(self.color))
 
 class MCTS:
     def __init__(self, player:Player):
@@ -77,11 +70,12 @@ class MCTS:
         self.run_time = 0
         self.node_count = 0
         self.amount_simulation = 0
+        self.tablebase = open_tablebase()
 
 
     def select(self) -> tuple:
         node = self.root
-        board = self.copy_board.copy_board()
+        board = self.copy_board.clone()
 
         while len(node.children) != 0:
             children = node.children.values()
@@ -98,53 +92,41 @@ class MCTS:
                     max_nodes.append(child)
 
             node = random.choice(max_nodes)
-            board.apply_move(node.move)
+            board.make_move(node.move)
 
             if node.visits == 0:
                 return node, board
 
         if self.generate(node, board):
             node = random.choice(list(node.children.values()))
-            board.apply_move(node.move)
+            board.make_move(node.move)
         return node, board
     
     def generate(self, parent: MCTSNode, board: Board) -> bool:
         if board.is_game_over()[0]:
             return False
         children = []
-        for move in board.get_legal_moves_list(board.get_all_legal_moves(self.player.color)):
-            from_square, to_square = move.split('-')
-            from_coordinate = Coordinate[from_square]
-            to_coordinate = Coordinate[to_square]
-            converted_move = Move(self.player.color, fromm=from_coordinate, to=to_coordinate)
-            child_node = MCTSNode(converted_move, parent)
+        for move in board.generate_moves(side_to_move(board)):
+            child_node = MCTSNode(move, parent)
             children.append(child_node)
         parent.add_children(children)
         return True
 
     def simulate(self, board: Board) -> int:
-        turn = 0
         while not board.is_game_over()[0]:
-            if turn%2==0:
-                if self.player.color == "Blue":
-                    move = random.choice(board.get_legal_moves_list(board.get_all_legal_moves("Blue")))
-                else:
-                    move = random.choice(board.get_legal_moves_list(board.get_all_legal_moves("Red")))
-                from_square, to_square = move.upper().split('-')
-                from_coordinate = Coordinate[from_square]
-                to_coordinate = Coordinate[to_square]
-                converted_move =  Move(self.player.color, fromm=from_coordinate, to=to_coordinate)
-                board.apply_move(converted_move)
-            else:
-                if self.player.color == "Red":
-                    move = random.choice(board.get_legal_moves_list(board.get_all_legal_moves("Red")))
-                else:
-                    move = random.choice(board.get_legal_moves_list(board.get_all_legal_moves("Blue")))
-                from_square, to_square = move.upper().split('-')
-                from_coordinate = Coordinate[from_square]
-                to_coordinate = Coordinate[to_square]
-                converted_move =  Move(self.player.color, fromm=from_coordinate, to=to_coordinate)
-                board.apply_move(converted_move)
+            color = side_to_move(board)
+            # a playout that reaches the endgame tablebase ends with the exact result
+            if self.tablebase is not None:
+                entry = self.tablebase.probe(board, color)
+                if entry is not None:
+                    if entry[0] == DRAW:
+                        return None
+                    return color if entry[0] == WIN else ("Red" if color == "Blue" else "Blue")
+            moves = board.generate_moves(color)
+            if not moves:
+                # a player who can not move has lost
+                return "Red" if color == "Blue" else "Blue"
+            board.make_move(random.choice(moves))
         return board.is_game_over()[1]
 
     def back_propagate(self, node: MCTSNode, color: str, winner: str) -> None:
@@ -161,8 +143,10 @@ class MCTS:
         amount_simulation = 0
         while time.time() - start_time < time_limit:
             node, board = self.select()
+            # the wins of a node count for the player who made its move
+            mover = "Red" if side_to_move(board) == "Blue" else "Blue"
             winner = self.simulate(board)
-            self.back_propagate(node, self.player.color, winner)
+            self.back_propagate(node, mover, winner)
             amount_simulation += 1 
 
         run_time = time.time() - start_time
@@ -208,12 +192,7 @@ def main():
         print("Current board:")
         board.print_board()
 
-        evolved_move = evolvedAIPlayer.get_best_move_through_time()
-
-        from_square, to_square = evolved_move.upper().split('-')
-        from_coordinate = Coordinate[from_square]
-        to_coordinate = Coordinate[to_square]
-        move = Move(evolvedAIPlayer.color, fromm=from_coordinate, to=to_coordinate)
+        move = evolvedAIPlayer.get_best_move_through_time()
         board.apply_move(move)
         mcts.move(move)
 
@@ -231,7 +210,7 @@ def main():
         print("Statistics: ", amount_simulation, "rollouts in", run_time, "seconds")
         move = mcts.best_move()
 
-        print("MCTS chose move: ", move)
+        print("MCTS chose move: ", move_to_string(move))
 
         board.apply_move(move)
         mcts.move(move)
@@ -0,0 +1,144 @@
+from JumpSturdy.game_state.board import GOAL_RANK_MASKS, MOVE_CAPTURE, MOVE_UNSTACK
+
+# Move ordering
+# Alpha-beta prunes the most when the best move comes first. The moves of a node are tried in
+# this order:
+#   1. the move of the transposition entry (or the best move of the previous iteration), before
+#      the other moves are even generated
+#   2. moves onto the goal rank
+#   3. captures, most valuable victim first (a double before a single), then least valuable
+#      attacker (a single before a double)
+#   4. the two killer moves of the ply, quiet moves that caused a cutoff in a sibling node
+#   5. the other quiet moves by their history score, ties broken by how far the move gets
+#      towards the enemy's back rank
+# The history score of a move is indexed by its from- and to-square (a butterfly table, one per
+# color) and grows by depth * depth with every cutoff it causes anywhere in the tree.
+GOAL_SCORE = 3 << 20
+CAPTURE_SCORE = 2 << 20
+KILLER_SCORE = 1 << 20
+
+# history scores are halved when one of them reaches HISTORY_LIMIT, so quiet moves stay below the killers
+HISTORY_LIMIT = 1 << 16
+
+CAPTURE_FLAG = MOVE_CAPTURE << 12
+UNSTACK_FLAG = MOVE_UNSTACK << 12
+
+# rank of the to-square counted from the own back rank, 0 to 7
+ADVANCEMENT = {
+    "Blue": tuple(7 - square // 8 for square in range(64)),
+    "Red": tuple(square // 8 for square in range(64)),
+}
+
+
+def capture_score(move, enemy_doubles):
+    """MVV-LVA score of a capture: a double is the more valuable victim, a single the less valuable attacker."""
+    victim = 2 if enemy_doubles >> (move >> 6 & 63) & 1 else 1
+    attacker = 2 if move & UNSTACK_FLAG else 1
+    return 10 * victim - attacker
+
+
+class MoveOrdering:
+    """
+    Killer moves and history scores of one search.
+
+    Attributes:
+        killers (list): two killer moves per ply, indexed by Board.ply
+        history (dict): color -> butterfly table of 4096 history scores, indexed by
+            from_square | to_square << 6 (the low 12 bits of a packed move)
+    """
+
+    def __init__(self):
+        self.killers = []
+        self.history = {"Blue": [0] * 4096, "Red": [0] * 4096}
+
+    def ply_killers(self, ply):
+        """Get the killer slots of a ply."""
+        while len(self.killers) <= ply:
+            self.killers.append([None, None])
+        return self.killers[ply]
+
+    def ordered_moves(self, board, player_color, first_move=None):
+        """
+        Yield the legal moves of a position, most promising first.
+
+        Args:
+            board (Board): the position
+            player_color (str): the player to move
+            first_move (int): move tried before all others, e.g. the transposition move, skipped
+                if it is not legal here
+
+        Yields:
+            int: packed moves
+        """
+        if first_move is not None:
+            if board.is_move_legal(first_move, player_color):
+                yield first_move
+            else:
+                first_move = None
+
+        moves = board.generate_moves(player_color)
+        enemy_doubles = board.RED_DOUBLES if player_color == "Blue" else board.BLUE_DOUBLES
+        goal = GOAL_RANK_MASKS[player_color]
+        history = self.history[player_color]
+        advancement = ADVANCEMENT[player_color]
+        killer, second_killer = self.ply_killers(board.ply)
+
+        def score(move):
+            to_square = move >> 6 & 63
+            if goal >> to_square & 1:
+                return GOAL_SCORE
+            if move & CAPTURE_FLAG:
+                return CAPTURE_SCORE + capture_score(move, enemy_doubles)
+            if move == killer:
+                return KILLER_SCORE + 1
+            if move == second_killer:
+                return KILLER_SCORE
+            return history[move & 4095] << 3 | advancement[to_square]
+
+        moves.sort(key=score, reverse=True)
+        for move in moves:
+            if move != first_move:
+                yield move
+
+    def ordered_captures(self, board, player_color):
+        """
+        Get the captures of a position in MVV-LVA order, for the quiescence search.
+
+        Args:
+            board (Board): the position
+            player_color (str): the player to move
+
+        Returns:
+            list: packed moves
+        """
+        moves = board.generate_captures(player_color)
+        if len(moves) > 1:
+            enemy_doubles = board.RED_DOUBLES if player_color == "Blue" else board.BLUE_DOUBLES
+            moves.sort(key=lambda move: capture_score(move, enemy_doubles), reverse=True)
+        return moves
+
+    def record_cutoff(self, move, player_color, ply, depth):
+        """
+        Remember a move that caused a beta cutoff.
+
+        Args:
+            move (int): the packed move
+            player_color (str): the player who made it
+            ply (int): Board.ply of the position the move was made in
+            depth (int): remaining depth of that position
+        """
+        if move & CAPTURE_FLAG:
+            # captures are ordered by MVV-LVA already
+            return
+        killers = self.ply_killers(ply)
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history = self.history[player_color]
+        index = move & 4095
+        history[index] += depth * depth
+        if history[index] >= HISTORY_LIMIT:
+            for color_history in self.history.values():
+                for i, value in enumerate(color_history):
+                    if value:
+                        color_history[i] = value >> 1
@@ -3,8 +3,10 @@ import random
 import math
 import time
 from collections import deque
-from JumpSturdy.game_state.board import Board, Coordinate, Move
+from JumpSturdy.game_state.board import Board, iter_bits, ALL_CATEGORIES, move_to_string, DIRECTION_SHIFTS, shift_squares
 from JumpSturdy.ai.transposition_table import TranspositionTable
+from JumpSturdy.ai.tablebase import open_tablebase
+from JumpSturdy.ai.search import Search, SearchParameters
 
 def value_iteration(blue_player, red_player, board, learning_rate=0.1, discount_factor=0.95):
     """
@@ -59,7 +61,7 @@ def value_iteration(blue_player, red_player, board, learning_rate=0.1, discount_
                     print()
 
             # Check if error got better
-            new_heuristic, _ = blue_player.get_score()
+            new_heuristic = blue_player.get_score(board)
             new_heuristic_error = current_value - new_heuristic
             print(f"new heuristic error {new_heuristic_error}")
             improvement = abs(heuristic_error) - abs(new_heuristic_error)
@@ -102,32 +104,35 @@ def simulate_game(board, friendly_player, enemy_player):
         turn = friendly_player if i % 2 == 0 else enemy_player
         i += 1
 
+        # a player who can not move has lost
+        if not board.generate_moves(turn.color):
+            winner = enemy_player.color if turn is friendly_player else friendly_player.color
+            reward = 100 if winner == "Blue" else 0
+            break
+
         # Get move
         next_move = turn.get_random_move()
-        from_square, to_square = next_move.upper().split('-')
-        from_coordinate = Coordinate[from_square]
-        to_coordinate = Coordinate[to_square]
-        next_move = Move(player=turn.color, fromm=from_coordinate, to=to_coordinate)
 
-        # Get heuristic value
-        heuristic, features = friendly_player.get_score()
+        # Get heuristic value, get_score does not report the contributions of the features
+        heuristic = friendly_player.get_score(board)
+        features = {}
 
         # Store the state, action, reward tuple
         state = board.get_state()
         history.append((state, features, next_move, heuristic, turn))
 
         # Apply Move
-        board.apply_move(next_move)
+        board.make_move(next_move)
 
         # Check game status
-        game_over = board.is_game_over()
+        game_over, winner = board.is_game_over()
 
         # Break if game is over
-        if game_over != "Game not over":
-            reward = 100 if "Blue wins" in game_over else 0
+        if game_over:
+            reward = 100 if winner == "Blue" else 0
 
             # Get heuristic value
-            heuristic, features = friendly_player.get_score()
+            heuristic = friendly_player.get_score(board)
             # Store the state, action, reward tuple
             state = board.get_state()
             history.append((state, features, next_move, heuristic, turn))
@@ -138,26 +143,39 @@ def simulate_game(board, friendly_player, enemy_player):
     return history, reward
 
 
+def indices_to_mask(indices):
+    """Turn board indices (0 = A1 ... 63 = H8, the order of the old binary strings) into a bitboard mask."""
+    mask = 0
+    for idx in indices:
+        mask |= 1 << (63 - idx)
+    return mask
+
+
+# ROW_MASKS[row] covers one rank, row 0 is rank 1
+ROW_MASKS = [0xFF << (56 - 8 * row) for row in range(8)]
+EDGES_MASK = indices_to_mask([8, 16, 24, 32, 40, 48, 15, 23, 31, 39, 47, 55])
+CENTER_MASK = indices_to_mask([18, 19, 20, 21, 26, 27, 28, 29, 34, 35, 36, 37, 42, 43, 44, 45])
+CORNER_MASK = indices_to_mask([1, 6])
+
+
+def highest_row(bitboard):
+    """Row (0 = rank 1) of the most advanced piece of a non-empty bitboard."""
+    return (64 - (bitboard & -bitboard).bit_length()) // 8
+
+
+def lowest_row(bitboard):
+    """Row (0 = rank 1) of the least advanced piece of a non-empty bitboard."""
+    return (64 - bitboard.bit_length()) // 8
+
+
 def most_advanced_pieces(bitboard, friendly):
-    """Find the row with the most advanced pieces (closest to the enemy side) in a single integer bitboard and count the '1's in it."""
+    """Find the row with the most advanced pieces (closest to the enemy side) in a single integer bitboard and count the pieces in it."""
     score = 0
-    most_advanced_row = None
 
-    # Find the row with the most advanced pieces
-    if friendly:
-        for row in range(7, -1, -1):
-            if '1' in bitboard[row * 8:(row + 1) * 8]:
-                most_advanced_row = row
-                break
-    else:
-        for row in range(8):
-            if '1' in bitboard[row * 8:(row + 1) * 8]:
-                most_advanced_row = row
-                break
-
-    # Count the '1's in the most advanced row if it exists
-    if most_advanced_row is not None:
-        count = bitboard[most_advanced_row * 8:(most_advanced_row + 1) * 8].count('1')
+    # Count the pieces in the most advanced row if it exists
+    if bitboard:
+        most_advanced_row = highest_row(bitboard) if friendly else lowest_row(bitboard)
+        count = (bitboard & ROW_MASKS[most_advanced_row]).bit_count()
 
         if friendly:
             score = count * (100 * (0.5 ** (7 - most_advanced_row)))
@@ -172,31 +190,27 @@ def advancement_of_pieces(bitboard, friendly):
     total_advancement = 0
 
     if friendly:
-        for i in range(64):
-            if bitboard[i] == '1':
-                row = i // 8
-                total_advancement += 100 * (0.5 ** (7 - row))
+        for square in iter_bits(bitboard):
+            row = (63 - square) // 8
+            total_advancement += 100 * (0.5 ** (7 - row))
     else:
-        for i in range(64):
-            if bitboard[i] == '1':
-                row = i // 8
-                total_advancement += 100 * (0.5 ** (row))
+        for square in iter_bits(bitboard):
+            row = (63 - square) // 8
+            total_advancement += 100 * (0.5 ** (row))
 
     return total_advancement
 
 
-def piece_density(singles_binary, doubles_binary):
+def piece_density(singles, doubles):
     """Calculate the piece density of the board."""
     positions = []
     total_distance = 0
 
     # Combine singles and doubles for total piece positions
-    combined_binary = bin(int(singles_binary, 2) | int(doubles_binary, 2))[2:].zfill(64)
-
-    for idx, value in enumerate(combined_binary):
-        if value == '1':
-            x, y = idx % 8, idx // 8  # Convert linear index to 2D coordinates
-            positions.append((x, y))
+    for square in iter_bits(singles | doubles):
+        idx = 63 - square
+        x, y = idx % 8, idx // 8  # Convert linear index to 2D coordinates
+        positions.append((x, y))
 
     # Calculate the sum of distances between each pair of pieces
     for i in range(len(positions)):
@@ -213,25 +227,20 @@ def piece_density(singles_binary, doubles_binary):
     return avg_distance
 
 
-def control_of_indices(weights, blue_singles_binary, blue_doubles_binary, red_singles_binary, red_doubles_binary,
-                       center_indices):
-    blue_singles_control = sum(
-        weights["friendly_singles_value"] for idx in center_indices if blue_singles_binary[idx] == '1')
-    blue_doubles_control = sum(
-        weights["friendly_doubles_value"] for idx in center_indices if blue_doubles_binary[idx] == '1')
-    red_singles_control = sum(
-        weights["enemy_singles_value"] for idx in center_indices if red_singles_binary[idx] == '1')
-    red_doubles_control = sum(
-        weights["enemy_doubles_value"] for idx in center_indices if red_doubles_binary[idx] == '1')
+def control_of_indices(weights, blue_singles, blue_doubles, red_singles, red_doubles, mask):
+    blue_singles_control = weights["friendly_singles_value"] * (blue_singles & mask).bit_count()
+    blue_doubles_control = weights["friendly_doubles_value"] * (blue_doubles & mask).bit_count()
+    red_singles_control = weights["enemy_singles_value"] * (red_singles & mask).bit_count()
+    red_doubles_control = weights["enemy_doubles_value"] * (red_doubles & mask).bit_count()
 
     return blue_singles_control + blue_doubles_control + red_singles_control + red_doubles_control
 
 
-def piece_on_indices(weights, friendly_type_binary, indices, type, friendly):
+def piece_on_indices(weights, friendly_type, mask, type, friendly):
     # Initialize the control score
     edge_control_score = 0
 
-    if any(friendly_type_binary[idx] == '1' for idx in indices):
+    if friendly_type & mask:
         if friendly:
             edge_control_score = weights[f"friendly_{type}_value"]
         else:
@@ -242,38 +251,16 @@ def piece_on_indices(weights, friendly_type_binary, indices, type, friendly):
 
 def piece_in_front(weights, first_bitboard, type1, second_bitboard, type2):
     """Check if the second bitboard has a piece in front of the first bitboard."""
-    amount = 0
-    for i in range(56):
-        if first_bitboard[i] == '1' and second_bitboard[i + 8] == '1':
-            amount += 1
-    return amount
+    return (first_bitboard & (second_bitboard << 8)).bit_count()
 
 
 def piece_is_last(weights, friendly_singles, friendly_doubles, enemy_singles, enemy_doubles):
     # Find the furthest front/back friendly/enemy piece
-    most_advanced_single_row = 0
-    most_advanced_double_row = 0
-    less_advanced_single_row = 8
-    less_advanced_double_row = 8
-
-    for row in range(7, -1, -1):
-        if '1' in friendly_singles[row * 8:(row + 1) * 8]:
-            most_advanced_single_row = row
-            type = "singles"
-            break
-    for row in range(7, -1, -1):
-        if '1' in friendly_doubles[row * 8:(row + 1) * 8]:
-            most_advanced_double_row = row
-            type = "doubles"
-            break
-    for row in range(7, -1, -1):
-        if '1' in enemy_singles[row * 8:(row + 1) * 8]:
-            less_advanced_single_row = row
-            break
-    for row in range(7, -1, -1):
-        if '1' in enemy_doubles[row * 8:(row + 1) * 8]:
-            less_advanced_double_row = row
-            break
+    most_advanced_single_row = highest_row(friendly_singles) if friendly_singles else 0
+    most_advanced_double_row = highest_row(friendly_doubles) if friendly_doubles else 0
+    less_advanced_single_row = highest_row(enemy_singles) if enemy_singles else 8
+    less_advanced_double_row = highest_row(enemy_doubles) if enemy_doubles else 8
+    type = "doubles" if friendly_doubles else "singles"
 
     friend = max(most_advanced_single_row, most_advanced_double_row)
     enemy = min(less_advanced_single_row, less_advanced_double_row)
@@ -284,25 +271,16 @@ def piece_is_last(weights, friendly_singles, friendly_doubles, enemy_singles, en
     return 0
 
 
-def piece_under_attack(weights, friend_pieces, enemy_singles, enemy_doubles):
-    """Calculate how many friendly pieces are under attack."""
+def piece_under_attack(friend_pieces, enemy_singles, enemy_doubles):
+    """Calculate how many attacks red has on friendly pieces, a piece attacked twice counts twice."""
+    direction_shifts = DIRECTION_SHIFTS["Red"]
     amount = 0
-    for i in range(64):  # Adjusted to include the entire 64 bits
-        if friend_pieces[i] == '1':  # Check if there's a friendly piece at position i
-            # Check for single-piece attacks
-            if i + 7 < 64 and enemy_singles[i + 7] == '1':
-                amount += 1
-            if i + 9 < 64 and enemy_singles[i + 9] == '1':
-                amount += 1
-            # Check for double-piece attacks
-            if i + 6 < 64 and enemy_doubles[i + 6] == '1':
-                amount += 1
-            if i + 10 < 64 and enemy_doubles[i + 10] == '1':
-                amount += 1
-            if i + 15 < 64 and enemy_doubles[i + 15] == '1':
-                amount += 1
-            if i + 17 < 64 and enemy_doubles[i + 17] == '1':
-                amount += 1
+    for direction in ('kill_left', 'kill_right'):
+        from_mask, delta = direction_shifts[direction]
+        amount += (friend_pieces & shift_squares(enemy_singles & from_mask, delta)).bit_count()
+    for direction in ('l_l_f', 'f_f_l', 'f_f_r', 'r_r_f'):
+        from_mask, delta = direction_shifts[direction]
+        amount += (friend_pieces & shift_squares(enemy_doubles & from_mask, delta)).bit_count()
     return amount
 
 
@@ -340,6 +318,10 @@ class AIPlayer:
         self.time = time
         self.turn = turn
         self.transposition_table = TranspositionTable()
+        # exact results of positions with few pieces, None if no tablebase file was generated
+        self.tablebase = open_tablebase()
+        # settings of null-move pruning and late move reductions, see ai/search.py
+        self.search_parameters = SearchParameters()
 
 
         self.weights = {
@@ -436,98 +418,28 @@ class AIPlayer:
 
     def alpha_beta(self, board, depth, alpha, beta, maximizing_player, display, cutoff, count, start_time,limit_time):
         """
-        Implements the alpha-beta pruning algorithm for game tree search.
+        Searches the game tree with the negamax principal variation search of ai/search.py.
 
         Parameters:
-        - board (Baord): Board object
+        - board (Board): Board object
         - depth (int): current depth of the search tree.
         - alpha (float): best value that the maximizing player can guarantee at this level or above.
         - beta (float): best value that the minimizing player can guarantee at this level or above.
-        - maximizing_player (boolean): indicating whether the current player is maximizing or not.
+        - maximizing_player (boolean): indicating whether Blue (the maximizing player) is to move.
         - display (boolean):  indicating whether to display the board during the search.
         - cutoff (boolean): indicating whether to apply cutoff when alpha >= beta.
         - count (int): number of nodes visited during the search.
+        - start_time (float): time.time() at the start of the search.
+        - limit_time (int): time budget of the search in milliseconds.
 
         Returns:
-        - best_value (float): The best value that can be achieved from the current game state.
-        - best_move (String): The best move to make from the current game state.
+        - best_value (float): The best value that can be achieved from the current game state, from Blue's point of view.
+        - best_move (int): The best move (packed) to make from the current game state.
         - count (int): The updated number of nodes visited during the search.
         """
-        if time.time() - start_time >= limit_time:
-            raise TimeoutError("Time limit exceeded")
-        if display:
-            board.print_board()
-            
-        # calculate zobrist hash for current game state
-        board_hash = self.board.calculate_zobrist_hash(64, maximizing_player)
-        # look up hash in ttable to check if game state is already known
-        alpha_temp = alpha # variable to use for comparison with score in transposition table
-        transposition_table_entry = self.transposition_table.get(board_hash)
-        if transposition_table_entry != -1 and transposition_table_entry[1] >= depth: # check if entry exists and has deeper search level then current
-            if transposition_table_entry[0] <= alpha_temp: # score <= alpha: previous search already found a better move for the maximizing player, branch can be pruined
-                return transposition_table_entry[0], transposition_table_entry[2], count # return value and best move from transposition table
-            if transposition_table_entry[0] >= beta: # score >= beta: we do beta cutoff because the minimizing player can achieve a better outcome elsewhere, branch can be pruined
-                return transposition_table_entry[0], transposition_table_entry[2], count # return value and best move from transposition table
-            alpha = max(alpha, transposition_table_entry[0]) # update the alpha value
-        
-        
-        if board.is_game_over()[0]:
-            return float('-inf') if maximizing_player else float('inf'), None, count
-
-        if depth == 0:
-            return self.get_score(board), None, count
-
-        best_value = float('-inf') if maximizing_player else float('inf')
-        best_move = None
-
-        color = "Blue" if maximizing_player else "Red"
-        possible_moves = board.get_legal_moves_moves(
-            board.get_legal_moves({'singles_left_empty': True, 'singles_front_empty': True,
-                                    'singles_right_empty': True, 'singles_kill_left_singles': True,
-                                    'singles_kill_left_doubles': True, 'singles_kill_right_singles': True,
-                                    'singles_kill_right_doubles': True, 'singles_upgrade_left': True,
-                                    'singles_upgrade_front': True, 'singles_upgrade_right': True,
-                                    'doubles_l_l_f_empty': True, 'doubles_f_f_l_empty': True,
-                                    'doubles_f_f_r_empty': True, 'doubles_r_r_f_empty': True,
-                                    'doubles_kill_l_l_f_singles': True, 'doubles_kill_l_l_f_doubles': True,
-                                    'doubles_kill_f_f_l_singles': True, 'doubles_kill_f_f_l_doubles': True,
-                                    'doubles_kill_f_f_r_singles': True, 'doubles_kill_f_f_r_doubles': True,
-                                    'doubles_kill_r_r_f_singles': True, 'doubles_kill_r_r_f_doubles': True,
-                                    'doubles_l_l_f_singles': True, 'doubles_f_f_l_singles': True,
-                                    'doubles_f_f_r_singles': True, 'doubles_r_r_f_singles': True
-                                    }, color), color)
-
-        if display:
-            move_score_list = []
-        for move in possible_moves:
-            if display:
-                print("BP")
-                board.print_board()
-            assert "Error" not in board.apply_move(move)
-            # update zobrist hash value
-            # board.board_hash = board.update_zobrist_hash(move, board.board_hash, maximizing_player)
-            value, _, count = self.alpha_beta(board, depth - 1, alpha, beta, not maximizing_player, display, cutoff, count + 1, start_time,limit_time)
-            if display:
-                move_score_list.append((move, value))
-                print("BP")
-                board.print_board()
-            assert "Good" in board.undo_move()
-
-            if maximizing_player:
-                if value > best_value:
-                    best_value, best_move = value, move
-                alpha = max(alpha, value)
-                if beta <= alpha and cutoff:
-                    break
-            else:
-                if value < best_value:
-                    best_value, best_move = value, move
-                beta = min(beta, value)
-                if beta <= alpha and cutoff:
-                    break
-        
-        self.transposition_table.put(board_hash , best_value, depth, best_move, alpha, beta) # new entry in ttable
-        return best_value, best_move, count
+        search = Search(self, start_time, limit_time, display, cutoff, count, self.search_parameters)
+        best_value, best_move = search.search(board, depth, alpha, beta, "Blue" if maximizing_player else "Red")
+        return best_value, best_move, search.nodes
 
     def get_best_move_through_time(self):
         max_time = 1500
@@ -562,50 +474,35 @@ class AIPlayer:
 
     def get_best_move(self, max_depth, display, cutoff, limit_time):
         """
-        Finds the best move for the player using the alpha-beta pruning algorithm
+        Finds the best move for the player by iterative deepening of the principal variation search (see ai/search.py)
 
         Args:
             max_depth (int): The maximum depth to search in the game tree.
-            display (bool): Flag indicating whether to display the game board during the search. We use this for debugging purposes.
+            display (bool): Flag indicating whether to display the game board during the search and print the statistics of the search. We use this for debugging purposes.
             cutoff (bool): Flag indicating whether to use cutoffs to improve search efficiency.
+            limit_time (int): Time budget for the whole search in milliseconds.
 
         Returns:
-            str: The best move as a string (e.g. B2 - B3, for a move from position B2 to the position B3.)
+            int: The best move as a packed move (see board.encode_move), move_to_string turns it into e.g. "B2-B3".
 
         """
-        isBlue = True if self.color == "Blue" else False
-        best_move = None
-        best_value = float('-inf') if self.color == "Blue" else float('inf')
-        count = 1
-        prev_count = count
-        print(f"Tiefe: 0 und Anzahl Zustände: 1")
-        start = time.time()
-        for depth in range(1, max_depth + 1):
-            board_copy = self.board.copy_board()
-            startzeit = time.time()
-            try:
-                value, move, countPerDepth = self.alpha_beta(board_copy, depth, float('-inf'), float('inf'), isBlue, display, cutoff, count, start,limit_time)
-                print(move)
-                print(f"Benötigte Zeit für die Tiefe {depth} " + str((time.time() - startzeit) * 1000) + "ms")
-                count = countPerDepth
-                print(f"Tiefe: {depth} und Anzahl Zustände: {count - prev_count}")
-                prev_count = count
-            except TimeoutError:
-                break
+        board_copy = self.board.clone()
+        board_copy.set_player_to_move(self.color)
+        if self.tablebase is not None:
+            tablebase_move = self.tablebase.best_move(board_copy, self.color)
+            if tablebase_move is not None:
+                return tablebase_move
 
-            if isBlue:
-                if value > best_value:
-                    best_value, best_move = value, move
-            else:
-                if value < best_value:
-                    best_value, best_move = value, move
+        start = time.time()
+        # one search for all depths: the best move of every iteration is searched first in the next one
+        search = Search(self, start, limit_time, display, cutoff, nodes=1, parameters=self.search_parameters)
+        if display:
+            print(f"Tiefe: 0 und Anzahl Zustände: 1")
+        value, best_move, depth = search.iterative_deepening(board_copy, max_depth, self.color, verbose=display)
+        if display:
             print(best_move)
-            if cutoff == True:
-                if value == float('inf'):
-                    return str(move)[-5:]
-        print(f"Anzahl durchlaufener Zustände: {count}")
-        print("Gesamtlaufzeit: " + str((time.time() - start) * 1000) + "ms")
-        best_move = str(best_move)[-5:]
+            print(f"Anzahl durchlaufener Zustände: {search.nodes}")
+            print("Gesamtlaufzeit: " + str((time.time() - start) * 1000) + "ms")
         return best_move
 
     def get_random_move(self):
@@ -613,42 +510,9 @@ class AIPlayer:
         Generates a random move for the player
 
         Returns:
-            Move: "move" object representing the randomly generated move
+            int: packed move representing the randomly generated move
         """
-        posible_moves = self.board.get_legal_moves_list(self.board.get_legal_moves({'singles_left_empty': True,
-                                                                                    'singles_front_empty': True,
-                                                                                    'singles_right_empty': True,
-                                                                                    'singles_kill_left_singles': True,
-                                                                                    'singles_kill_left_doubles': True,
-                                                                                    'singles_kill_right_singles': True,
-                                                                                    'singles_kill_right_doubles': True,
-                                                                                    'singles_upgrade_left': True,
-                                                                                    'singles_upgrade_front': True,
-                                                                                    'singles_upgrade_right': True,
-                                                                                    'doubles_l_l_f_empty': True,
-                                                                                    'doubles_f_f_l_empty': True,
-                                                                                    'doubles_f_f_r_empty': True,
-                                                                                    'doubles_r_r_f_empty': True,
-                                                                                    'doubles_kill_l_l_f_singles': True,
-                                                                                    'doubles_kill_l_l_f_doubles': True,
-                                                                                    'doubles_kill_f_f_l_singles': True,
-                                                                                    'doubles_kill_f_f_l_doubles': True,
-                                                                                    'doubles_kill_f_f_r_singles': True,
-                                                                                    'doubles_kill_f_f_r_doubles': True,
-                                                                                    'doubles_kill_r_r_f_singles': True,
-                                                                                    'doubles_kill_r_r_f_doubles': True,
-                                                                                    'doubles_l_l_f_singles': True,
-                                                                                    'doubles_f_f_l_singles': True,
-                                                                                    'doubles_f_f_r_singles': True,
-                                                                                    'doubles_r_r_f_singles': True
-                                                                                    }, self.color))
-        random_index = random.randrange(0, len(posible_moves), 1)
-        move = posible_moves[random_index]
-        # from_square, to_square = move.upper().split('-')
-        # from_coordinate = Coordinate[from_square]
-        # to_coordinate = Coordinate[to_square]
-        # move = Move(player=self.color, fromm=from_coordinate, to=to_coordinate)
-        return move
+        return random.choice(self.board.generate_moves(self.color))
 
     def get_all_selected_moves(self):
         """Returns all the legal moves for the player.
@@ -658,16 +522,7 @@ class AIPlayer:
         Returns:
             list: A list of legal moves for the player."""
             
-        return self.board.get_legal_moves(
-            {'singles_left_empty': True, 'singles_front_empty': True, 'singles_right_empty': True,
-                'singles_kill_left_singles': True, 'singles_kill_left_doubles': True, 'singles_kill_right_singles': True,
-                'singles_kill_right_doubles': True, 'singles_upgrade_left': True, 'singles_upgrade_front': True,
-                'singles_upgrade_right': True, 'doubles_l_l_f_empty': True, 'doubles_f_f_l_empty': True,
-                'doubles_f_f_r_empty': True, 'doubles_r_r_f_empty': True, 'doubles_kill_l_l_f_singles': True,
-                'doubles_kill_l_l_f_doubles': True, 'doubles_kill_f_f_l_singles': True, 'doubles_kill_f_f_l_doubles': True,
-                'doubles_kill_f_f_r_singles': True, 'doubles_kill_f_f_r_doubles': True, 'doubles_kill_r_r_f_singles': True,
-                'doubles_kill_r_r_f_doubles': True, 'doubles_l_l_f_singles': True, 'doubles_f_f_l_singles': True,
-                'doubles_f_f_r_singles': True, 'doubles_r_r_f_singles': True}, self.color)
+        return self.board.get_legal_moves(ALL_CATEGORIES, self.color)
 
     def get_score(self, board):
         """
@@ -691,136 +546,124 @@ class AIPlayer:
         """
 
         # board.print_board()
-        blue_singles_binary = bin(board.BLUE_SINGLES)[2:].zfill(64)
-        blue_doubles_binary = bin(board.BLUE_DOUBLES)[2:].zfill(64)
-        red_singles_binary = bin(board.RED_SINGLES)[2:].zfill(64)
-        red_doubles_binary = bin(board.RED_DOUBLES)[2:].zfill(64)
-
-        edges_indices = [8, 16, 24, 32, 40, 48, 15, 23, 31, 39, 47, 55]
-        center_indices = [18, 19, 20, 21, 26, 27, 28, 29, 34, 35, 36, 37, 42, 43, 44, 45]
-        corner_indices = [1, 6]
+        blue_singles = board.BLUE_SINGLES
+        blue_doubles = board.BLUE_DOUBLES
+        red_singles = board.RED_SINGLES
+        red_doubles = board.RED_DOUBLES
 
         # Material score
-        friendly_singles_value = self.weights["friendly_singles_value"] * blue_singles_binary.count('1')
-        friendly_doubles_value = self.weights["friendly_doubles_value"] * blue_doubles_binary.count('1')
+        friendly_singles_value = self.weights["friendly_singles_value"] * blue_singles.bit_count()
+        friendly_doubles_value = self.weights["friendly_doubles_value"] * blue_doubles.bit_count()
         friendly_material_score = self.weights["friendly_material_score"] * (
                 friendly_singles_value + friendly_doubles_value)
-        enemy_singles_value = self.weights["enemy_singles_value"] * red_singles_binary.count('1')
-        enemy_doubles_value = self.weights["enemy_doubles_value"] * red_doubles_binary.count('1')
+        enemy_singles_value = self.weights["enemy_singles_value"] * red_singles.bit_count()
+        enemy_doubles_value = self.weights["enemy_doubles_value"] * red_doubles.bit_count()
         enemy_material_score = self.weights["enemy_material_score"] * (enemy_singles_value + enemy_doubles_value) * (-1)
 
         # Advanced pieces
         friendly_most_advanced_singles = self.weights['friendly_most_advanced_singles'] * most_advanced_pieces(
-            blue_singles_binary, True)
+            blue_singles, True)
         friendly_most_advanced_doubles = self.weights['friendly_most_advanced_doubles'] * most_advanced_pieces(
-            blue_doubles_binary, True)
+            blue_doubles, True)
         enemy_most_advanced_singles = self.weights['enemy_most_advanced_singles'] * most_advanced_pieces(
-            red_singles_binary, False)
+            red_singles, False)
         enemy_most_advanced_doubles = self.weights['enemy_most_advanced_doubles'] * most_advanced_pieces(
-            red_doubles_binary, False)
+            red_doubles, False)
 
         friendly_advancement_of_singles = self.weights["friendly_advancement_of_singles"] * advancement_of_pieces(
-            blue_singles_binary, friendly=True)
+            blue_singles, friendly=True)
         friendly_advancement_of_doubles = self.weights["friendly_advancement_of_doubles"] * advancement_of_pieces(
-            blue_doubles_binary, friendly=True)
+            blue_doubles, friendly=True)
         enemy_advancement_of_singles = self.weights["enemy_advancement_of_singles"] * advancement_of_pieces(
-            red_singles_binary, friendly=False)
+            red_singles, friendly=False)
         enemy_advancement_of_doubles = self.weights["enemy_advancement_of_doubles"] * advancement_of_pieces(
-            red_doubles_binary, friendly=False)
+            red_doubles, friendly=False)
 
         # Control over the board
-        control_of_center = self.weights["control_of_center"] * control_of_indices(self.weights, blue_singles_binary,
-                                                                                   blue_doubles_binary,
-                                                                                   red_singles_binary,
-                                                                                   red_doubles_binary,
-                                                                                   center_indices)
-        control_of_edges = self.weights["control_of_edges"] * control_of_indices(self.weights, blue_singles_binary,
-                                                                                 blue_doubles_binary,
-                                                                                 red_singles_binary,
-                                                                                 red_doubles_binary,
-                                                                                 edges_indices)
-        friendly_density = self.weights["friendly_density"] * piece_density(blue_singles_binary, blue_doubles_binary)
-        friendly_mobility = self.weights["friendly_mobility"] * len(
-            self.board.get_legal_moves_list(self.board.get_all_legal_moves(self.color)))
-        enemy_density = self.weights["enemy_density"] * piece_density(red_singles_binary, red_doubles_binary)
-        if self.color == "Blue":
-            enemy_mobility = self.weights["enemy_mobility"] * len(
-                self.board.get_legal_moves_list(self.board.get_all_legal_moves("Red")))
-        else:
-            enemy_mobility = self.weights["enemy_mobility"] * len(
-                self.board.get_legal_moves_list(self.board.get_all_legal_moves("Blue")))
+        control_of_center = self.weights["control_of_center"] * control_of_indices(self.weights, blue_singles,
+                                                                                   blue_doubles,
+                                                                                   red_singles,
+                                                                                   red_doubles,
+                                                                                   CENTER_MASK)
+        control_of_edges = self.weights["control_of_edges"] * control_of_indices(self.weights, blue_singles,
+                                                                                 blue_doubles,
+                                                                                 red_singles,
+                                                                                 red_doubles,
+                                                                                 EDGES_MASK)
+        friendly_density = self.weights["friendly_density"] * piece_density(blue_singles, blue_doubles)
+        friendly_mobility = self.weights["friendly_mobility"] * board.count_moves("Blue")
+        enemy_density = self.weights["enemy_density"] * piece_density(red_singles, red_doubles)
+        enemy_mobility = self.weights["enemy_mobility"] * board.count_moves("Red")
 
         # Strategic positions
         friendly_single_in_edges = self.weights["friendly_single_in_edges"] * piece_on_indices(self.weights,
-                                                                                               blue_singles_binary,
-                                                                                               edges_indices, "singles",
+                                                                                               blue_singles,
+                                                                                               EDGES_MASK, "singles",
                                                                                                True)
         enemy_single_in_edges = self.weights["enemy_single_in_edges"] * piece_on_indices(self.weights,
-                                                                                         red_singles_binary,
-                                                                                         edges_indices, "singles",
+                                                                                         red_singles,
+                                                                                         EDGES_MASK, "singles",
                                                                                          False)
         friendly_double_in_edges = self.weights["friendly_double_in_edges"] * piece_on_indices(self.weights,
-                                                                                               blue_doubles_binary,
-                                                                                               edges_indices, "doubles",
+                                                                                               blue_doubles,
+                                                                                               EDGES_MASK, "doubles",
                                                                                                True)
         enemy_double_in_edges = self.weights["enemy_double_in_edges"] * piece_on_indices(self.weights,
-                                                                                         red_doubles_binary,
-                                                                                         edges_indices, "doubles",
+                                                                                         red_doubles,
+                                                                                         EDGES_MASK, "doubles",
                                                                                          False)
         friendly_single_in_center = self.weights["friendly_single_in_center"] * piece_on_indices(self.weights,
-                                                                                                 blue_singles_binary,
-                                                                                                 center_indices,
+                                                                                                 blue_singles,
+                                                                                                 CENTER_MASK,
                                                                                                  "singles", True)
         enemy_single_in_center = self.weights["enemy_single_in_center"] * piece_on_indices(self.weights,
-                                                                                           red_singles_binary,
-                                                                                           center_indices, "singles",
+                                                                                           red_singles,
+                                                                                           CENTER_MASK, "singles",
                                                                                            False)
         
         friendly_double_in_center = self.weights["friendly_double_in_center"] * piece_on_indices(self.weights,
-                                                                                                 blue_doubles_binary,
-                                                                                                 center_indices,
+                                                                                                 blue_doubles,
+                                                                                                 CENTER_MASK,
                                                                                                  "doubles", True)
         enemy_double_in_center = self.weights["enemy_double_in_center"] * piece_on_indices(self.weights,
-                                                                                           red_doubles_binary,
-                                                                                           center_indices, "doubles",
+                                                                                           red_doubles,
+                                                                                           CENTER_MASK, "doubles",
                                                                                            False)
         
         # # Other cases
         friendly_double_in_back_corner = self.weights["friendly_double_in_back_corner"] * piece_on_indices(self.weights,
-                                                                                                           blue_doubles_binary,
-                                                                                                           corner_indices,
+                                                                                                           blue_doubles,
+                                                                                                           CORNER_MASK,
                                                                                                            "doubles",
                                                                                                            True)
         friendly_doubles_in_line = self.weights["friendly_doubles_in_line"] * piece_in_front(self.weights,
-                                                                                             blue_doubles_binary,
+                                                                                             blue_doubles,
                                                                                              "doubles",
-                                                                                             blue_doubles_binary,
+                                                                                             blue_doubles,
                                                                                              "doubles")
         friendly_single_double_in_line = self.weights["friendly_single_double_in_line"] * piece_in_front(self.weights,
-                                                                                                         blue_singles_binary,
+                                                                                                         blue_singles,
                                                                                                          "singles",
-                                                                                                         blue_doubles_binary,
+                                                                                                         blue_doubles,
                                                                                                          "doubles")
         friendly_singles_in_line = self.weights["friendly_singles_in_line"] * piece_in_front(self.weights,
-                                                                                             blue_singles_binary,
+                                                                                             blue_singles,
                                                                                              "singles",
-                                                                                             blue_singles_binary,
+                                                                                             blue_singles,
                                                                                              "singles")
         friendly_piece_is_last = self.weights["friendly_piece_is_last"] * piece_is_last(self.weights,
-                                                                                        blue_singles_binary,
-                                                                                        blue_doubles_binary,
-                                                                                        red_singles_binary,
-                                                                                        red_doubles_binary)
+                                                                                        blue_singles,
+                                                                                        blue_doubles,
+                                                                                        red_singles,
+                                                                                        red_doubles)
 
         # Under-Attack
-        friendly_single_under_attack = self.weights["friendly_single_under_attack"] * piece_under_attack(self.weights,
-                                                                                                            blue_singles_binary,
-                                                                                                            red_singles_binary,
-                                                                                                            red_doubles_binary)
-        friendly_double_under_attack = self.weights["friendly_double_under_attack"] * piece_under_attack(self.weights,
-                                                                                                            blue_doubles_binary,
-                                                                                                            red_singles_binary,
-                                                                                                            red_doubles_binary)
+        friendly_single_under_attack = self.weights["friendly_single_under_attack"] * piece_under_attack(blue_singles,
+                                                                                                         red_singles,
+                                                                                                         red_doubles)
+        friendly_double_under_attack = self.weights["friendly_double_under_attack"] * piece_under_attack(blue_doubles,
+                                                                                                         red_singles,
+                                                                                                         red_doubles)
 
         bias = self.weights["bias"] * 0
 
@@ -957,18 +800,10 @@ def main():
             else:
                 next_move = turn.get_random_move()
 
-            # move = next_move # this can't work, as we need move to be from Move class, not just a string
-            # convert next_move (string) to Move object first
-            from_square, to_square = next_move.upper().split('-')
-            from_coordinate = Coordinate[from_square]
-            to_coordinate = Coordinate[to_square]
-            # now we can create Move object
-            move = Move(player=turn.color, fromm=from_coordinate, to=to_coordinate)
-
             # Apply move
-            response = board.apply_move(move)
+            response = board.apply_move(next_move)
             print("-----------------------")
-            print(next_move)
+            print(move_to_string(next_move))
             print(response)
             print("-----------------------")
             if response.startswith('Error'):
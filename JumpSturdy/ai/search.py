@@ -0,0 +1,400 @@
+import time
+
+from JumpSturdy.ai.move_ordering import MoveOrdering, CAPTURE_FLAG
+from JumpSturdy.game_state.board import GOAL_RANK_MASKS
+from JumpSturdy.ai.transposition_table import stored_move
+from JumpSturdy.ai.tablebase import WIN, DRAW
+
+# Negamax principal variation search
+# Every node scores the position for the player to move, so Blue and Red share one code path:
+# the value of a move is the negated value of the position it leads to. The first move of a
+# node is searched with the full window, every later move only has to prove that it is not
+# better than the best one so far. That proof uses a null window around alpha and the move is
+# searched again with the full window only if it fails high.
+
+# width of the null window, the scores are floats so a window of 1 would be too coarse
+NULL_WINDOW = 1e-6
+
+# Iterative deepening
+# Every iteration starts with a window of ASPIRATION_WINDOW around the score of the previous one
+# and searches the previous best move first. A search that falls outside the window is repeated
+# with the window widened on that side, twice as far each time. The transposition table of the
+# player is kept between the iterations, so the best moves found at the inner nodes are tried
+# first in the next iteration as well.
+ASPIRATION_WINDOW = 20
+
+# Quiescence search
+# A position at depth 0 is only scored once no capture is left, so the search does not stop in the
+# middle of an exchange. The player to move may stand pat, i.e. take the score of the position
+# instead of capturing. Captures that could not lift that score to alpha even if they gained
+# CAPTURE_GAINS (the largest change of the evaluation a capture of a single or a double brings in
+# practice) are skipped (delta pruning). If the opponent threatens to move onto the goal rank the
+# player may not stand pat and every move is searched, so the threat is seen. QUIESCENCE_DEPTH
+# limits the number of plies.
+QUIESCENCE_DEPTH = 8
+CAPTURE_GAINS = (320, 400)  # (single, double)
+
+# Selective search
+# Null-move pruning: outside the principal variation the player to move passes. If the opponent
+# still can not get below beta with a search reduced by null_move_reduction plies, moving would
+# most likely fail high too, and the node is cut off. Passing is not allowed in the game, and with
+# few pieces left to move the player may be in zugzwang, where every move is worse than passing.
+# So with at most null_move_verify_pieces movable pieces a null-move cutoff is only taken after a
+# reduced search without null move confirms it. No null move is tried while the opponent threatens
+# to move onto the goal rank.
+# Late move reductions: quiet moves that come late in the move order (no capture, no goal-rank
+# move, no killer) are first searched lmr_reduction plies shallower, and again at full depth only
+# if they beat alpha.
+INF = float('inf')
+
+
+def other_color(color):
+    return "Red" if color == "Blue" else "Blue"
+
+
+class SearchParameters:
+    """
+    Settings of the selective search, see above.
+
+    Attributes:
+        null_move (bool): use null-move pruning
+        null_move_reduction (int): the null move is searched with depth - 1 - null_move_reduction
+        null_move_verify_pieces (int): verify null-move cutoffs when the player to move has at most
+            this many singles and doubles
+        late_move_reductions (bool): use late move reductions
+        lmr_min_depth (int): only reduce moves with at least this remaining depth
+        lmr_moves (int): number of moves searched at full depth before reductions start
+        lmr_reduction (int): plies a late move is reduced by
+    """
+
+    def __init__(self, null_move=True, null_move_reduction=2, null_move_verify_pieces=4,
+                 late_move_reductions=True, lmr_min_depth=3, lmr_moves=2, lmr_reduction=2):
+        self.null_move = null_move
+        self.null_move_reduction = null_move_reduction
+        self.null_move_verify_pieces = null_move_verify_pieces
+        self.late_move_reductions = late_move_reductions
+        self.lmr_min_depth = lmr_min_depth
+        self.lmr_moves = lmr_moves
+        self.lmr_reduction = lmr_reduction
+
+
+class Search:
+    """
+    One search of an alpha-beta player.
+
+    The player provides the transposition table, the tablebase and get_score, which scores a
+    board from Blue's point of view.
+
+    Attributes:
+        player (AIPlayer or EvolvedAIPlayer): the searching player
+        start_time (float): time.time() at the start of the search
+        limit_time (float): time budget of the search in milliseconds
+        display (bool): print every searched board
+        cutoff (bool): prune the tree, without cutoffs every move is searched with the full window
+            and the selective search is off
+        nodes (int): number of nodes visited
+        ordering (MoveOrdering): killer moves and history scores, kept for all iterations
+        parameters (SearchParameters): settings of the selective search
+    """
+
+    def __init__(self, player, start_time, limit_time, display=False, cutoff=True, nodes=0, parameters=None):
+        self.player = player
+        self.start_time = start_time
+        self.limit_time = limit_time
+        self.display = display
+        self.cutoff = cutoff
+        self.nodes = nodes
+        self.ordering = MoveOrdering()
+        self.parameters = parameters if parameters is not None else SearchParameters()
+
+    def evaluate(self, board, color):
+        """Score the board for the player to move."""
+        score = self.player.get_score(board)
+        return score if color == "Blue" else -score
+
+    def search(self, board, depth, alpha, beta, color):
+        """
+        Search a position with a window seen from Blue's point of view, like the old alpha_beta.
+
+        Args:
+            board (Board): the position, it is restored afterwards
+            depth (int): remaining depth
+            alpha (float): Blue is guaranteed at least alpha
+            beta (float): Red is guaranteed at most beta
+            color (str): the player to move
+
+        Returns:
+            tuple: (value from Blue's point of view, best move)
+        """
+        if color == "Blue":
+            return self.pvs(board, depth, alpha, beta, color)
+        value, move = self.pvs(board, depth, -beta, -alpha, color)
+        return -value, move
+
+    def iterative_deepening(self, board, max_depth, color, verbose=False):
+        """
+        Search the position one depth after the other until max_depth or the time budget is reached.
+
+        Args:
+            board (Board): the position, it is restored afterwards
+            max_depth (int): deepest iteration
+            color (str): the player to move
+            verbose (bool): print the number of nodes of every iteration
+
+        Returns:
+            tuple: (value for the player to move, best move, depth) of the deepest finished
+                iteration. If not even depth 1 finished in time the value is None, the depth 0
+                and the move the first generated one, so there is always a move to play.
+        """
+        value, best_move, finished_depth = None, None, 0
+        root_ply = board.ply
+        for depth in range(1, max_depth + 1):
+            nodes = self.nodes
+            try:
+                value, move = self.aspiration_search(board, depth, color, value, best_move)
+            except TimeoutError:
+                # take back the moves of the unfinished iteration
+                while board.ply > root_ply:
+                    board.undo_move()
+                break
+            finished_depth = depth
+            if move is not None:
+                best_move = move
+            if verbose:
+                print(f"Tiefe: {depth} und Anzahl Zustände: {self.nodes - nodes}")
+            # a won or lost position does not change with more depth
+            if self.cutoff and abs(value) == INF:
+                break
+        if best_move is None:
+            # no iteration finished in time, or a lost position was decided without a move
+            best_move = next(board.generate_staged_moves(color), None)
+        return value, best_move, finished_depth
+
+    def aspiration_search(self, board, depth, color, guess=None, pv_move=None):
+        """
+        Search the position with a window around the expected value.
+
+        Args:
+            board (Board): the position, it is restored afterwards
+            depth (int): remaining depth
+            color (str): the player to move
+            guess (float): expected value for the player to move, None searches with the full window
+            pv_move (int): move searched first, the best move of the previous iteration
+
+        Returns:
+            tuple: (exact value for the player to move, best move)
+        """
+        if guess is None or abs(guess) == INF or not self.cutoff:
+            return self.pvs(board, depth, -INF, INF, color, pv_move)
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            value, move = self.pvs(board, depth, alpha, beta, color, pv_move)
+            if value <= alpha and alpha > -INF:
+                alpha = value - delta
+            elif value >= beta and beta < INF:
+                beta = value + delta
+                # the move that failed high is the best one so far
+                pv_move = move
+            else:
+                return value, move
+            delta *= 2
+
+    def pvs(self, board, depth, alpha, beta, color, first_move=None, null_move=True):
+        """
+        Negamax principal variation search.
+
+        Args:
+            board (Board): the position, it is restored afterwards
+            depth (int): remaining depth
+            alpha (float): the player to move is guaranteed at least alpha
+            beta (float): the opponent is guaranteed that the player to move gets at most beta
+            color (str): the player to move
+            first_move (int): move searched first, defaults to the move of the transposition entry
+            null_move (bool): whether a null move may be tried, never twice in a row
+
+        Returns:
+            tuple: (value for the player to move, best move), the value is fail-soft: at most
+                alpha if no move reaches alpha, at least beta on a cutoff
+
+        Raises:
+            TimeoutError: the time budget is used up
+        """
+        if (time.time() - self.start_time) * 1000 >= self.limit_time:
+            raise TimeoutError("Time limit exceeded")
+        if self.display:
+            board.print_board()
+        if not self.cutoff:
+            alpha, beta = -INF, INF
+
+        # a position that comes back during the search is a draw, the side to move can repeat it
+        if board.ply and board.repetition_count() > 1:
+            return 0, None
+
+        # zobrist key of the searched position, kept up to date by make_move/undo_move.
+        # A position and its A<->H mirror share one entry, the stored move is for the canonical side.
+        board_hash, mirrored = board.canonical_key()
+        entry = self.player.transposition_table.get(board_hash)
+        if entry != -1:
+            score, entry_depth, move, entry_alpha, entry_beta = entry
+            move = stored_move(move, mirrored)
+            # the stored window tells if the stored score is exact or only a bound
+            if entry_depth >= depth and (entry_alpha < score < entry_beta or
+                                         (score <= entry_alpha and score <= alpha) or
+                                         (score >= entry_beta and score >= beta)):
+                return score, move
+            if first_move is None:
+                first_move = move
+
+        game_over, winner = board.is_game_over()
+        if game_over:
+            if winner is None:
+                return 0, None
+            return (INF if winner == color else -INF), None
+
+        # a win with the next move or a race to the goal rank that can not be stopped is decided already
+        winner, winning_move = board.race_result(color)
+        if winner is not None:
+            return (INF if winner == color else -INF), winning_move
+
+        # with few pieces left the endgame tablebase knows the exact result
+        tablebase = self.player.tablebase
+        if tablebase is not None:
+            tablebase_entry = tablebase.probe(board, color)
+            if tablebase_entry is not None:
+                if tablebase_entry[0] == DRAW:
+                    return 0, None
+                return (INF if tablebase_entry[0] == WIN else -INF), None
+
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, color)
+
+        parameters = self.parameters
+        opponent = other_color(color)
+        selective = self.cutoff and depth >= min(parameters.null_move_reduction + 1, parameters.lmr_min_depth)
+        threatened = selective and board.can_reach_goal(opponent)
+
+        if (selective and parameters.null_move and null_move and not threatened and
+                depth > parameters.null_move_reduction and beta - alpha < 2 * NULL_WINDOW and beta < INF):
+            board.make_null_move()
+            self.nodes += 1
+            value = -self.pvs(board, depth - 1 - parameters.null_move_reduction, -beta, -beta + NULL_WINDOW,
+                              opponent, null_move=False)[0]
+            board.undo_move()
+            if value >= beta:
+                if color == "Blue":
+                    movable = (board.BLUE_SINGLES | board.BLUE_DOUBLES).bit_count()
+                else:
+                    movable = (board.RED_SINGLES | board.RED_DOUBLES).bit_count()
+                if (movable > parameters.null_move_verify_pieces or
+                        self.pvs(board, depth - parameters.null_move_reduction, beta - NULL_WINDOW, beta, color,
+                                 null_move=False)[0] >= beta):
+                    # a won position after passing does not prove a win
+                    return (beta if value == INF else value), None
+
+        reduce_late = selective and parameters.late_move_reductions and not threatened and depth >= parameters.lmr_min_depth
+        if reduce_late:
+            goal = GOAL_RANK_MASKS[color]
+            killers = tuple(self.ordering.ply_killers(board.ply))
+
+        window_alpha = alpha
+        best_value = -INF
+        best_move = None
+        # the first move is tried before the others are generated, it often cuts off right away
+        for index, move in enumerate(self.ordering.ordered_moves(board, color, first_move)):
+            board.make_move(move)
+            self.nodes += 1
+            if index == 0 or alpha == -INF or not self.cutoff:
+                value = -self.pvs(board, depth - 1, -beta, -alpha, opponent)[0]
+            else:
+                reduction = 0
+                if (reduce_late and index >= parameters.lmr_moves and not move & CAPTURE_FLAG and
+                        not goal >> (move >> 6 & 63) & 1 and move not in killers):
+                    reduction = parameters.lmr_reduction
+                value = -self.pvs(board, depth - 1 - reduction, -alpha - NULL_WINDOW, -alpha, opponent)[0]
+                if reduction and value > alpha:
+                    # the reduced search may have missed something, the move gets the full depth
+                    value = -self.pvs(board, depth - 1, -alpha - NULL_WINDOW, -alpha, opponent)[0]
+                if alpha < value < beta:
+                    # fail-high: the move may be better than the best one, search it for its exact value
+                    value = -self.pvs(board, depth - 1, -beta, -alpha, opponent)[0]
+            board.undo_move()
+
+            if value > best_value or best_move is None:
+                best_value, best_move = value, move
+            if value > alpha:
+                alpha = value
+                if alpha >= beta and self.cutoff:
+                    self.ordering.record_cutoff(move, color, board.ply, depth)
+                    break
+
+        self.player.transposition_table.put(board_hash, best_value, depth, stored_move(best_move, mirrored), window_alpha, beta)
+        return best_value, best_move
+
+    def quiescence(self, board, alpha, beta, color, depth=QUIESCENCE_DEPTH):
+        """
+        Search captures until the position is quiet, then score it.
+
+        Args:
+            board (Board): the position, it is restored afterwards
+            alpha (float): the player to move is guaranteed at least alpha
+            beta (float): the opponent is guaranteed that the player to move gets at most beta
+            color (str): the player to move
+            depth (int): number of plies the quiescence search may still go
+
+        Returns:
+            tuple: (value for the player to move, best move), fail-soft like pvs
+
+        Raises:
+            TimeoutError: the time budget is used up
+        """
+        if (time.time() - self.start_time) * 1000 >= self.limit_time:
+            raise TimeoutError("Time limit exceeded")
+        if not self.cutoff:
+            alpha, beta = -INF, INF
+
+        game_over, winner = board.is_game_over()
+        if game_over:
+            if winner is None:
+                return 0, None
+            return (INF if winner == color else -INF), None
+        winner, winning_move = board.race_result(color)
+        if winner is not None:
+            return (INF if winner == color else -INF), winning_move
+
+        opponent = other_color(color)
+        if depth > 0 and board.can_reach_goal(opponent):
+            # standing pat would hide that the opponent wins with the next move
+            stand_pat = None
+            best_value = -INF
+            moves = self.ordering.ordered_moves(board, color)
+        else:
+            stand_pat = self.evaluate(board, color)
+            if depth == 0 or stand_pat >= beta:
+                return stand_pat, None
+            if stand_pat + CAPTURE_GAINS[1] <= alpha:
+                # not even the capture of a double can reach alpha
+                return stand_pat, None
+            alpha = max(alpha, stand_pat)
+            best_value = stand_pat
+            moves = self.ordering.ordered_captures(board, color)
+            enemy_doubles = board.RED_DOUBLES if color == "Blue" else board.BLUE_DOUBLES
+
+        best_move = None
+        for move in moves:
+            if stand_pat is not None and self.cutoff:
+                gain = CAPTURE_GAINS[enemy_doubles >> (move >> 6 & 63) & 1]
+                if stand_pat + gain <= alpha:
+                    continue
+            board.make_move(move)
+            self.nodes += 1
+            value = -self.quiescence(board, -beta, -alpha, opponent, depth - 1)[0]
+            board.undo_move()
+
+            if value > best_value or (best_move is None and stand_pat is None):
+                best_value, best_move = value, move
+            if value > alpha:
+                alpha = value
+                if alpha >= beta and self.cutoff:
+                    break
+        return best_value, best_move
@@ -0,0 +1,308 @@
+import itertools
+import os
+import struct
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from JumpSturdy.game_state.board import Board, BOARD_MASK, ZOBRIST_TABLE
+
+# Endgame tablebase
+# Every position with at most max_pieces pieces (a double counts as two) is solved by retrograde
+# analysis. The file holds a 16 byte header, the sorted canonical zobrist keys of the positions
+# (see Board.canonical_key, the side to move is part of the key) and then one value per key:
+#   result    int8, WIN, DRAW or LOSS for the player to move
+#   distance  uint16, plies until the game is over with best play, 0 for draws
+# Both tables are memory-mapped, a probe is a binary search over the keys.
+TABLEBASE_MAGIC = b'JSTB'
+TABLEBASE_VERSION = 1
+HEADER_FORMAT = '<4sBBxxQ'  # magic, version, max_pieces, number of positions
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+VALUE_DTYPE = np.dtype([('result', 'i1'), ('distance', '<u2')])
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+TABLEBASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebase.bin')
+
+# (number of pieces, bitboard columns) of everything that can stand on a square, in
+# Board attribute order BLUE_SINGLES, BLUE_DOUBLES, BLUE_BLOCKED, RED_SINGLES, RED_DOUBLES, RED_BLOCKED
+PIECE_TYPES = (
+    (1, (0,)),    # b0
+    (1, (3,)),    # r0
+    (2, (1, 2)),  # bb
+    (2, (4, 5)),  # rr
+    (2, (1, 5)),  # rb, blue on top of red
+    (2, (2, 4)),  # br, red on top of blue
+)
+BITBOARD_NAMES = ('BLUE_SINGLES', 'BLUE_DOUBLES', 'BLUE_BLOCKED', 'RED_SINGLES', 'RED_DOUBLES', 'RED_BLOCKED')
+
+
+def count_pieces(board):
+    """Count the pieces on the board, a double counts as two."""
+    return ((board.BLUE_SINGLES | board.RED_SINGLES).bit_count() +
+            2 * (board.BLUE_DOUBLES | board.RED_DOUBLES).bit_count())
+
+
+def iter_positions(max_pieces):
+    """
+    Yield the bitboards of every placement of at most max_pieces pieces.
+
+    Yields:
+        list: the six bitboards in BITBOARD_NAMES order
+    """
+    squares = [square for square in range(64) if BOARD_MASK >> square & 1]
+
+    def place(type_index, pieces_left, free, bitboards):
+        if type_index == len(PIECE_TYPES):
+            yield bitboards
+            return
+        weight, columns = PIECE_TYPES[type_index]
+        for count in range(pieces_left // weight + 1):
+            for chosen in itertools.combinations(free, count):
+                placed = list(bitboards)
+                for square in chosen:
+                    for column in columns:
+                        placed[column] |= 1 << square
+                yield from place(type_index + 1, pieces_left - count * weight,
+                                 [square for square in free if square not in chosen], placed)
+
+    yield from place(0, max_pieces, squares, [0] * 6)
+
+
+def set_position(board, bitboards, blue_to_move):
+    """Set up a board from six bitboards and the side to move."""
+    for name, bitboard in zip(BITBOARD_NAMES, bitboards):
+        setattr(board, name, bitboard)
+    board.ply = 0
+    board.reversible_plies = 0
+    board.attack_maps = None
+    board.blue_to_move = blue_to_move
+    board.board_hash = board.calculate_zobrist_hash(64, blue_to_move)
+    board.mirror_hash = board.calculate_zobrist_hash(64, blue_to_move, mirrored=True)
+
+
+def solve(max_pieces, verbose=False):
+    """
+    Solve every position with at most max_pieces pieces by retrograde analysis.
+
+    Positions that are already over are not stored, a move into one is decided at once: it
+    wins, unless it lifts a double off an enemy piece standing on its goal rank. A player
+    without moves loses, like in the search. Positions the analysis can not decide are draws,
+    the players can keep moving sideways forever.
+
+    Args:
+        max_pieces (int): largest number of pieces on the board, a double counts as two
+        verbose (bool): print progress
+
+    Returns:
+        tuple: (keys, results, distances) as numpy arrays sorted by key
+    """
+    start = time.time()
+    board = Board()
+    index = {}
+    positions = []
+    for bitboards in iter_positions(max_pieces):
+        for blue_to_move in (False, True):
+            set_position(board, bitboards, blue_to_move)
+            if board.is_game_over()[0]:
+                continue
+            key = board.canonical_key()[0]
+            if key not in index:
+                index[key] = len(positions)
+                positions.append((bitboards, blue_to_move))
+    if verbose:
+        print(f"{len(positions)} positions in {time.time() - start:.1f} s")
+
+    count = len(positions)
+    results = np.zeros(count, dtype=np.int8)
+    distances = np.zeros(count, dtype=np.uint16)
+    remaining = [0] * count
+    predecessors = [[] for _ in range(count)]
+    queue = deque()
+    wins = []
+    losses = []
+    for node, (bitboards, blue_to_move) in enumerate(positions):
+        set_position(board, bitboards, blue_to_move)
+        color = "Blue" if blue_to_move else "Red"
+        moves = board.generate_moves(color)
+        won = False
+        for move in moves:
+            board.make_move(move)
+            game_over, winner = board.is_game_over()
+            if not game_over:
+                predecessors[index[board.canonical_key()[0]]].append(node)
+                remaining[node] += 1
+            elif winner == color:
+                won = True
+            # else the move uncovers an enemy piece on its goal rank and loses at once
+            board.undo_move()
+        if won:
+            results[node] = WIN
+            distances[node] = 1
+            wins.append(node)
+        elif not moves:
+            results[node] = LOSS
+            queue.append(node)
+        elif not remaining[node]:
+            results[node] = LOSS
+            distances[node] = 1
+            losses.append(node)
+    # losses in 0 first, then everything decided in 1, so the queue stays sorted by distance
+    queue.extend(wins)
+    queue.extend(losses)
+    if verbose:
+        print(f"moves generated in {time.time() - start:.1f} s")
+
+    while queue:
+        node = queue.popleft()
+        distance = distances[node] + 1
+        lost = results[node] == LOSS
+        for predecessor in predecessors[node]:
+            if results[predecessor] != DRAW:
+                continue
+            if lost:
+                # a move into a lost position wins
+                results[predecessor] = WIN
+                distances[predecessor] = distance
+                queue.append(predecessor)
+            else:
+                # all moves lead into won positions, the last one found is the longest defense
+                remaining[predecessor] -= 1
+                if remaining[predecessor] == 0:
+                    results[predecessor] = LOSS
+                    distances[predecessor] = distance
+                    queue.append(predecessor)
+    if verbose:
+        print(f"solved in {time.time() - start:.1f} s: {np.count_nonzero(results == WIN)} wins, "
+              f"{np.count_nonzero(results == LOSS)} losses, {np.count_nonzero(results == DRAW)} draws")
+
+    keys = np.fromiter(index.keys(), dtype=np.uint64, count=count)
+    nodes = np.fromiter(index.values(), dtype=np.int64, count=count)
+    order = np.argsort(keys)
+    return keys[order], results[nodes[order]], distances[nodes[order]]
+
+
+def write_tablebase(path, max_pieces, verbose=False):
+    """
+    Solve the positions with at most max_pieces pieces and write them to a tablebase file.
+
+    Returns:
+        int: number of positions written
+    """
+    keys, results, distances = solve(max_pieces, verbose)
+    values = np.empty(len(keys), dtype=VALUE_DTYPE)
+    values['result'] = results
+    values['distance'] = distances
+    with open(path, 'wb') as file:
+        file.write(struct.pack(HEADER_FORMAT, TABLEBASE_MAGIC, TABLEBASE_VERSION, max_pieces, len(keys)))
+        file.write(keys.astype('<u8').tobytes())
+        file.write(values.tobytes())
+    return len(keys)
+
+
+class Tablebase:
+    """
+    Read-only view of a tablebase file.
+
+    Attributes:
+        max_pieces (int): positions with more pieces are not in the table
+        keys (np.memmap): sorted canonical zobrist keys
+        values (np.memmap): (result, distance) of every key, see VALUE_DTYPE
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            magic, version, self.max_pieces, count = struct.unpack(HEADER_FORMAT, file.read(HEADER_SIZE))
+        if magic != TABLEBASE_MAGIC or version != TABLEBASE_VERSION:
+            raise ValueError(f"{path} is not a tablebase file of version {TABLEBASE_VERSION}")
+        self.keys = np.memmap(path, dtype='<u8', mode='r', offset=HEADER_SIZE, shape=(count,))
+        self.values = np.memmap(path, dtype=VALUE_DTYPE, mode='r', offset=HEADER_SIZE + 8 * count, shape=(count,))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def probe(self, board, player_color=None):
+        """
+        Look up a position.
+
+        Args:
+            board (Board): the position
+            player_color (str): the player to move, defaults to the side to move of the board
+
+        Returns:
+            tuple: (result, distance) for the player to move, see WIN, DRAW and LOSS, or None if
+                the position is not in the table
+        """
+        if count_pieces(board) > self.max_pieces:
+            return None
+        board_hash, mirror_hash = board.board_hash, board.mirror_hash
+        if player_color is not None and (player_color == "Blue") != board.blue_to_move:
+            board_hash ^= ZOBRIST_TABLE[-1]
+            mirror_hash ^= ZOBRIST_TABLE[-1]
+        key = np.uint64(min(board_hash, mirror_hash))
+        position = int(np.searchsorted(self.keys, key))
+        if position == len(self.keys) or self.keys[position] != key:
+            return None
+        result, distance = self.values[position]
+        return int(result), int(distance)
+
+    def best_move(self, board, player_color):
+        """
+        Pick the best move of a tablebase position: the fastest win, else a draw, else the
+        longest defense.
+
+        Args:
+            board (Board): the position, it is restored afterwards
+            player_color (str): the player to move
+
+        Returns:
+            int: packed move, or None if the position is not in the table or has no moves
+        """
+        if self.probe(board, player_color) is None:
+            return None
+        other_color = "Red" if player_color == "Blue" else "Blue"
+        best_move, best_rank = None, None
+        for move in board.generate_moves(player_color):
+            board.make_move(move)
+            game_over, winner = board.is_game_over()
+            if game_over:
+                board.undo_move()
+                if winner == player_color:
+                    return move
+                rank = (-WIN, 0)
+            else:
+                result, distance = self.probe(board, other_color)
+                board.undo_move()
+                # the opponent's loss is our win, sort by (outcome, then quickest win or slowest loss)
+                rank = (-result, -distance if result == LOSS else distance)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+
+_opened = {}
+
+
+def open_tablebase(path=TABLEBASE_PATH):
+    """Open a tablebase file once per process, None if there is no such file."""
+    if path not in _opened:
+        _opened[path] = Tablebase(path) if os.path.exists(path) else None
+    return _opened[path]
+
+
+def main():
+    """
+    Usage: python -m JumpSturdy.ai.tablebase <max_pieces> [path]
+    """
+    max_pieces = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    path = sys.argv[2] if len(sys.argv) > 2 else TABLEBASE_PATH
+    count = write_tablebase(path, max_pieces, verbose=True)
+    print(f"{count} positions written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
 from collections import OrderedDict # we use an ordered directorz to manage the table memory by removing least recently used (LRU) entries if table is full
+from JumpSturdy.game_state.board import mirror_move
+
+
+def stored_move(move, mirrored):
+    """Map a best move between the searched position and the orientation its canonical key stands for (see Board.canonical_key).
+
+    Mirroring twice gives the move back, so the same call works for put and get.
+    """
+    if mirrored and move is not None:
+        return mirror_move(move)
+    return move
+
 
 class TranspositionTable():
     """the TranspositionTable class is used as cache for our alpha beta search
 
     Attributes:
-        table (dict): a dictionary with hash values as keys and (score, depth, best_move) tuples as values.
+        table (dict): a dictionary with hash values as keys and (score, depth, best_move) tuples as values,
+            best_move being a packed int move (see board.encode_move). The search keys positions by
+            Board.canonical_key, so a position and its mirror image share one entry.
         size (int): maximum size of the transposition table (for memory controll so it doesn't explode in size)
 
     Methods:
@@ -15,7 +15,7 @@ class Game:
         self.oldBoard = np.array([["N","r","r","r","r","r","r","N"],[0,"r","r","r","r","r","r",0],[0,0,0,0,0,0,0,0],[0,0,0,0,0,0,0,0],[0,0,0,0,0,0,0,0],[0,0,0,0,0,0,0,0],[0,"b","b","b","b","b","b",0],["N","b","b","b","b","b","b","N"]])
         self.newBoard = np.copy(self.oldBoard)
         self.boardObject = "b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0 r"
-        self.repeat = ["b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0 r"]
+        self.repeat = {"b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0 r": 1} #position -> times it was on the board
         self.wins = [0,0]
         self.ties = 0
         self.message = ""
@@ -62,11 +62,7 @@ class Game:
         for i in redBaseLine[0]:
             if "b" in i:
                 return "b"
-        count = 0
-        for e in self.repeat:
-            if e == self.boardObject:
-                count += 1
-        if count > 2:
+        if self.repeat.get(self.boardObject, 0) > 2:
             return "draw"
         else: return "0"
 
@@ -362,5 +358,5 @@ class Game:
             self.currentPlayer = "b"
         else: self.currentPlayer = "r"
         self.boardObject = self.boardObject[:-1] + " " + self.currentPlayer
-        self.repeat.append(self.boardObject)
+        self.repeat[self.boardObject] = self.repeat.get(self.boardObject, 0) + 1
 
@@ -0,0 +1,175 @@
+import numpy as np
+
+from JumpSturdy.game_state.board import Board, BOARD_MASK, DIRECTION_SHIFTS
+
+# Batched positions
+# N positions are one (N, 6) uint64 array, one row per position and one column per bitboard
+# in the order of PIECE_COLUMNS. All functions here work on whole columns at once.
+PIECE_COLUMNS = ('BLUE_SINGLES', 'BLUE_DOUBLES', 'BLUE_BLOCKED', 'RED_SINGLES', 'RED_DOUBLES', 'RED_BLOCKED')
+BLUE_SINGLES, BLUE_DOUBLES, BLUE_BLOCKED, RED_SINGLES, RED_DOUBLES, RED_BLOCKED = range(6)
+
+SINGLE_STEP_DIRECTIONS = ('left', 'front', 'right')
+SINGLE_CAPTURE_DIRECTIONS = ('kill_left', 'kill_right')
+DOUBLE_JUMP_DIRECTIONS = ('l_l_f', 'f_f_l', 'f_f_r', 'r_r_f')
+
+# ROW_MASKS[row] covers one rank, row 0 is rank 1
+ROW_MASKS = tuple(np.uint64(0xFF << (56 - 8 * row)) for row in range(8))
+CENTER_MASK = np.uint64(0x00003C3C3C3C0000)
+EDGES_MASK = np.uint64(0x0081818181818100)
+
+FEATURE_NAMES = (
+    'blue_singles', 'blue_doubles', 'red_singles', 'red_doubles',
+    'blue_singles_in_center', 'blue_doubles_in_center', 'red_singles_in_center', 'red_doubles_in_center',
+    'blue_singles_in_edges', 'blue_doubles_in_edges', 'red_singles_in_edges', 'red_doubles_in_edges',
+    'blue_advancement_of_singles', 'blue_advancement_of_doubles',
+    'red_advancement_of_singles', 'red_advancement_of_doubles',
+    'blue_mobility', 'red_mobility',
+    'blue_doubles_in_line', 'blue_single_double_in_line', 'blue_singles_in_line',
+    'blue_singles_under_attack', 'blue_doubles_under_attack',
+)
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def positions_from_boards(boards):
+    """Stack the bitboards of several boards into one (N, 6) uint64 array."""
+    return np.array([[getattr(board, column) for column in PIECE_COLUMNS] for board in boards], dtype=np.uint64)
+
+
+def positions_from_fens(fens):
+    """Parse several FEN strings into one (N, 6) uint64 array."""
+    boards = []
+    for fen in fens:
+        board = Board()
+        board.fen_notation_into_bb(fen)
+        boards.append(board)
+    return positions_from_boards(boards)
+
+
+def popcount(values):
+    """Count the set bits of every element of a uint64 array."""
+    values = values - ((values >> np.uint64(1)) & _M1)
+    values = (values & _M2) + ((values >> np.uint64(2)) & _M2)
+    values = (values + (values >> np.uint64(4))) & _M4
+    return ((values * _H01) >> np.uint64(56)).astype(np.int64)
+
+
+def shift_squares(values, delta):
+    """Move every set square of a uint64 array by delta squares."""
+    if delta >= 0:
+        return values << np.uint64(delta)
+    return values >> np.uint64(-delta)
+
+
+def split_colors(positions, player_color):
+    """Return the friendly singles, friendly doubles and all enemy pieces of every position."""
+    if player_color == "Blue":
+        return (positions[:, BLUE_SINGLES], positions[:, BLUE_DOUBLES],
+                positions[:, RED_SINGLES] | positions[:, RED_DOUBLES])
+    return (positions[:, RED_SINGLES], positions[:, RED_DOUBLES],
+            positions[:, BLUE_SINGLES] | positions[:, BLUE_DOUBLES])
+
+
+def direction_targets(positions, player_color):
+    """
+    Get the landing squares of the legal moves of one player, per direction.
+
+    Args:
+        positions (np.ndarray): (N, 6) uint64 array of positions
+        player_color (str): "Blue" or "Red"
+
+    Returns:
+        dict: direction name -> (N,) uint64 array of the squares reached in that direction
+    """
+    friend_singles, friend_doubles, enemies = split_colors(positions, player_color)
+    board_mask = np.uint64(BOARD_MASK)
+    # same target rules as Board.count_moves
+    single_steps = board_mask & ~(friend_doubles | enemies)
+    double_targets = board_mask & ~friend_doubles
+    direction_shifts = DIRECTION_SHIFTS[player_color]
+
+    targets = {}
+    for directions, sources, allowed in ((SINGLE_STEP_DIRECTIONS, friend_singles, single_steps),
+                                         (SINGLE_CAPTURE_DIRECTIONS, friend_singles, enemies),
+                                         (DOUBLE_JUMP_DIRECTIONS, friend_doubles, double_targets)):
+        for direction in directions:
+            from_mask, delta = direction_shifts[direction]
+            targets[direction] = shift_squares(sources & np.uint64(from_mask), delta) & allowed
+    return targets
+
+
+def target_masks(positions, player_color):
+    """Get one uint64 mask per position with every square one player can move to."""
+    masks = np.zeros(len(positions), dtype=np.uint64)
+    for targets in direction_targets(positions, player_color).values():
+        masks |= targets
+    return masks
+
+
+def count_moves(positions, player_color):
+    """Count the legal moves of one player in every position, see Board.count_moves."""
+    counts = np.zeros(len(positions), dtype=np.int64)
+    for targets in direction_targets(positions, player_color).values():
+        counts += popcount(targets)
+    return counts
+
+
+def attack_masks(positions, player_color):
+    """Get the squares attacked by the pieces of one player in every position, see Board.attacked_squares."""
+    if player_color == "Blue":
+        singles, doubles = positions[:, BLUE_SINGLES], positions[:, BLUE_DOUBLES]
+    else:
+        singles, doubles = positions[:, RED_SINGLES], positions[:, RED_DOUBLES]
+    direction_shifts = DIRECTION_SHIFTS[player_color]
+    masks = np.zeros(len(positions), dtype=np.uint64)
+    for directions, sources in ((SINGLE_CAPTURE_DIRECTIONS, singles), (DOUBLE_JUMP_DIRECTIONS, doubles)):
+        for direction in directions:
+            from_mask, delta = direction_shifts[direction]
+            masks |= shift_squares(sources & np.uint64(from_mask), delta)
+    return masks
+
+
+def advancement(pieces, friendly):
+    """Vectorized advancement_of_pieces of the players: 100 * 0.5 ** (rows left to go) per piece."""
+    total = np.zeros(len(pieces), dtype=np.float64)
+    for row, row_mask in enumerate(ROW_MASKS):
+        total += popcount(pieces & row_mask) * (100 * 0.5 ** (7 - row if friendly else row))
+    return total
+
+
+def features(positions):
+    """
+    Compute the board features of every position, seen from Blue like get_score.
+
+    The columns follow FEATURE_NAMES. These are the raw counts the evaluation weights are
+    applied to; the pairwise piece density has no vectorized form and is not included.
+
+    Args:
+        positions (np.ndarray): (N, 6) uint64 array of positions
+
+    Returns:
+        np.ndarray: (N, len(FEATURE_NAMES)) float64 array
+    """
+    blue_singles = positions[:, BLUE_SINGLES]
+    blue_doubles = positions[:, BLUE_DOUBLES]
+    red_singles = positions[:, RED_SINGLES]
+    red_doubles = positions[:, RED_DOUBLES]
+    pieces = (blue_singles, blue_doubles, red_singles, red_doubles)
+
+    eight = np.uint64(8)
+    red_attacks = attack_masks(positions, "Red")
+
+    columns = [popcount(bitboard) for bitboard in pieces]
+    columns += [popcount(bitboard & CENTER_MASK) for bitboard in pieces]
+    columns += [popcount(bitboard & EDGES_MASK) for bitboard in pieces]
+    columns += [advancement(blue_singles, True), advancement(blue_doubles, True),
+                advancement(red_singles, False), advancement(red_doubles, False)]
+    columns += [count_moves(positions, "Blue"), count_moves(positions, "Red")]
+    columns += [popcount(blue_doubles & (blue_doubles << eight)),
+                popcount(blue_singles & (blue_doubles << eight)),
+                popcount(blue_singles & (blue_singles << eight))]
+    columns += [popcount(blue_singles & red_attacks), popcount(blue_doubles & red_attacks)]
+    return np.column_stack(columns).astype(np.float64)
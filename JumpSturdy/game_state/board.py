@@ -1,106 +1,89 @@
 from enum import Enum
+from functools import lru_cache
 import os
 from random import choice
 import random
-import copy
+
+# SQUARE_MASK[square] is the bitboard with only that square set, see the move lookup tables below
+SQUARE_MASK = tuple(1 << square for square in range(64))
+
+
+def square_of(coordinate):
+    """Convert a Coordinate into a square index (A1 = 63, H8 = 0)."""
+    return 64 - coordinate.value
+
+
+def coordinate_of(square):
+    """Convert a square index into a Coordinate."""
+    return Coordinate(64 - square)
+
 
 def there_is(bitboard, n):
-    """Check if the nth bit of the bitboard is set (1)."""
-    mask = 1 << 64 >> (n.value)
-    return (bitboard & mask) != 0
+    """Check if the bit of square n of the bitboard is set (1)."""
+    return (bitboard & SQUARE_MASK[n]) != 0
 
 
 def add_nth_bit(bitboard, n):
-    """Set the nth bit of the bitboard to 1."""
-    mask = 1 << 64 >> n.value
-    return bitboard | mask
+    """Set the bit of square n of the bitboard to 1."""
+    return bitboard | SQUARE_MASK[n]
 
 
 def clear_nth_bit(bitboard, n):
-    """Clear the nth bit of 'number' to 0."""
-    all_ones = 0xFFFFFFFFFFFFFFFF
-    nth_bit_set = 1 << 64 >> n.value
-    mask = all_ones ^ nth_bit_set
-    return bitboard & mask
-
+    """Clear the bit of square n of the bitboard to 0."""
+    return bitboard & ~SQUARE_MASK[n]
 
-def get_deepest_keys(d, container):
-    for k, v in d.items():
-        if isinstance(v, dict):
-            get_deepest_keys(v, container)
-        else:
-            container[v] = True
 
-    return container
+def category_node_flags(node):
+    """Return the OR of the category bits of every category name below a node of Board.move_categories_dict."""
+    if isinstance(node, str):
+        return CATEGORY_BITS[node]
+    flags = 0
+    for child in node.values():
+        flags |= category_node_flags(child)
+    return flags
 
 
 def parse_move_categories(input_str, move_categories_dict):
-    selected_move_categories = {}
+    """
+    Turn a category selection string into category flags.
 
-    # If input contains "alle", add all moves
-    if "alle" in input_str:
-        # Flatten all the move category names into a list and add them to the dictionary
-        selected_move_categories = {'singles_left_empty': True,
-                                    'singles_front_empty': True,
-                                    'singles_right_empty': True,
-                                    'singles_kill_left_singles': True,
-                                    'singles_kill_left_doubles': True,
-                                    'singles_kill_right_singles': True,
-                                    'singles_kill_right_doubles': True,
-                                    'singles_upgrade_left': True,
-                                    'singles_upgrade_front': True,
-                                    'singles_upgrade_right': True,
-                                    'doubles_l_l_f_empty': True,
-                                    'doubles_f_f_l_empty': True,
-                                    'doubles_f_f_r_empty': True,
-                                    'doubles_r_r_f_empty': True,
-                                    'doubles_kill_l_l_f_singles': True,
-                                    'doubles_kill_l_l_f_doubles': True,
-                                    'doubles_kill_f_f_l_singles': True,
-                                    'doubles_kill_f_f_l_doubles': True,
-                                    'doubles_kill_f_f_r_singles': True,
-                                    'doubles_kill_f_f_r_doubles': True,
-                                    'doubles_kill_r_r_f_singles': True,
-                                    'doubles_kill_r_r_f_doubles': True,
-                                    'doubles_l_l_f_singles': True,
-                                    'doubles_f_f_l_singles': True,
-                                    'doubles_f_f_r_singles': True,
-                                    'doubles_r_r_f_singles': True
-                                    }
-        return selected_move_categories
-
-    # Split input_str by comma to process each part separately
-    categories = input_str.split(',')
+    Args:
+        input_str (str): "alle" for every category, else comma separated key paths into
+            move_categories_dict, e.g. "1,213" for all single moves and the doubles' f_f_l captures
+        move_categories_dict (dict): nested category names, see Board.move_categories_dict
 
-    for category in categories:
-        current_dict = move_categories_dict
+    Returns:
+        int: OR of the CATEGORY_BITS of the selected categories
+    """
+    if "alle" in input_str:
+        return ALL_CATEGORIES
 
+    flags = 0
+    for category in input_str.split(','):
+        node = move_categories_dict
         # Follow the keys to get to the deepest value
         for key in category:
             try:
-                current_dict = current_dict[key]
+                node = node[key]
             except KeyError:
                 # If a key is not found, report it and skip this part
                 print(f"Invalid key '{key}' in path '{category}'.")
-                current_dict = {}
+                node = {}
                 break
+        flags |= category_node_flags(node)
+    return flags
 
-        # If we end up with a dictionary, get all the end values
-        if isinstance(current_dict, dict):
-            # Use a recursive helper function to get all the end values
-            selected_move_categories = get_deepest_keys(current_dict, selected_move_categories)
-        elif isinstance(current_dict, str):
-            # If we end up with a string, it's an end value
-            selected_move_categories[current_dict] = True
-
-    return selected_move_categories
 
+def iter_bits(bitboard):
+    """Yield the square index of every set bit, lowest first.
 
-def shift_pieces(bitboard, shift):
-    if shift > 0:
-        return bitboard >> shift
-    else:
-        return bitboard << -shift
+    The loop isolates the lowest set bit (x & -x) and clears it, so it runs once per piece
+    instead of once per square.
+    """
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
 
 
 def validate_string(input_string):
@@ -111,7 +94,444 @@ def validate_string(input_string):
     return True
 
 
+# Move lookup tables
+# The tables are indexed by square, where a square is the bit index inside the bitboards:
+# square 63 is A1, square 0 is H8 (square = 64 - Coordinate.value).
+CORNER_SQUARES = (63, 56, 7, 0)
+BOARD_MASK = 0xFFFFFFFFFFFFFFFF & ~sum(1 << square for square in CORNER_SQUARES)
+
+# (file, rank) steps seen from Blue, Red moves mirrored
+MOVE_DIRECTIONS = {
+    'left': (-1, 0),
+    'front': (0, 1),
+    'right': (1, 0),
+    'kill_left': (-1, 1),
+    'kill_right': (1, 1),
+    'l_l_f': (-2, 1),
+    'f_f_l': (-1, 2),
+    'f_f_r': (1, 2),
+    'r_r_f': (2, 1),
+}
+
+# category: (moving pieces, direction, target squares)
+MOVE_CATEGORIES = {
+    'singles_left_empty': ('singles', 'left', 'empty'),
+    'singles_front_empty': ('singles', 'front', 'empty'),
+    'singles_right_empty': ('singles', 'right', 'empty'),
+    'singles_kill_left_singles': ('singles', 'kill_left', 'enemy_singles'),
+    'singles_kill_left_doubles': ('singles', 'kill_left', 'enemy_doubles'),
+    'singles_kill_right_singles': ('singles', 'kill_right', 'enemy_singles'),
+    'singles_kill_right_doubles': ('singles', 'kill_right', 'enemy_doubles'),
+    'singles_upgrade_left': ('singles', 'left', 'friend_singles'),
+    'singles_upgrade_front': ('singles', 'front', 'friend_singles'),
+    'singles_upgrade_right': ('singles', 'right', 'friend_singles'),
+    'doubles_l_l_f_empty': ('doubles', 'l_l_f', 'empty'),
+    'doubles_f_f_l_empty': ('doubles', 'f_f_l', 'empty'),
+    'doubles_f_f_r_empty': ('doubles', 'f_f_r', 'empty'),
+    'doubles_r_r_f_empty': ('doubles', 'r_r_f', 'empty'),
+    'doubles_kill_l_l_f_singles': ('doubles', 'l_l_f', 'enemy_singles'),
+    'doubles_kill_l_l_f_doubles': ('doubles', 'l_l_f', 'enemy_doubles'),
+    'doubles_kill_f_f_l_singles': ('doubles', 'f_f_l', 'enemy_singles'),
+    'doubles_kill_f_f_l_doubles': ('doubles', 'f_f_l', 'enemy_doubles'),
+    'doubles_kill_f_f_r_singles': ('doubles', 'f_f_r', 'enemy_singles'),
+    'doubles_kill_f_f_r_doubles': ('doubles', 'f_f_r', 'enemy_doubles'),
+    'doubles_kill_r_r_f_singles': ('doubles', 'r_r_f', 'enemy_singles'),
+    'doubles_kill_r_r_f_doubles': ('doubles', 'r_r_f', 'enemy_doubles'),
+    'doubles_l_l_f_singles': ('doubles', 'l_l_f', 'friend_singles'),
+    'doubles_f_f_l_singles': ('doubles', 'f_f_l', 'friend_singles'),
+    'doubles_f_f_r_singles': ('doubles', 'f_f_r', 'friend_singles'),
+    'doubles_r_r_f_singles': ('doubles', 'r_r_f', 'friend_singles'),
+}
+
+
+# Move category flags
+# Category number i of MOVE_CATEGORIES is the bit 1 << i, a selection of categories is the OR of their bits.
+CATEGORY_BITS = {category: 1 << index for index, category in enumerate(MOVE_CATEGORIES)}
+ALL_CATEGORIES = (1 << len(MOVE_CATEGORIES)) - 1
+SINGLES_CATEGORIES = sum(bit for category, bit in CATEGORY_BITS.items() if MOVE_CATEGORIES[category][0] == 'singles')
+DOUBLES_CATEGORIES = ALL_CATEGORIES & ~SINGLES_CATEGORIES
+CAPTURE_CATEGORIES = sum(bit for category, bit in CATEGORY_BITS.items()
+                         if MOVE_CATEGORIES[category][2].startswith('enemy'))
+# target selector of a category, the index into the allowed squares built by the move generators
+TARGET_KINDS = ('empty', 'friend_singles', 'enemy_singles', 'enemy_doubles')
+
+
+def category_flags(categories):
+    """Return the category flags of an iterable of category names, e.g. the keys of a selection dict."""
+    flags = 0
+    for category in categories:
+        flags |= CATEGORY_BITS[category]
+    return flags
+
+
+# Packed moves
+# A move is a single int: bits 0-5 hold the from-square, bits 6-11 the to-square and
+# the bits above that the move flags.
+MOVE_CAPTURE = 1  # takes an enemy single or the top of an enemy double
+MOVE_STACK = 2    # lands on an own single and forms a double
+MOVE_UNSTACK = 4  # a double moves its top piece away
+
+
+def encode_move(from_square, to_square, flags=0):
+    """Pack a move into an int."""
+    return from_square | to_square << 6 | flags << 12
+
+
+def move_from_square(move):
+    """Return the from-square of a packed move."""
+    return move & 63
+
+
+def move_to_square(move):
+    """Return the to-square of a packed move."""
+    return move >> 6 & 63
+
+
+def move_flags(move):
+    """Return the flags (MOVE_CAPTURE, MOVE_STACK, MOVE_UNSTACK) of a packed move."""
+    return move >> 12
+
+
+def square_name(square):
+    """Return the name of a square index, e.g. 63 -> 'A1'."""
+    return "ABCDEFGH"[(63 - square) % 8] + str((63 - square) // 8 + 1)
+
+
+def move_to_string(move):
+    """Return the "A1-B2" text of a packed move, as used by the game server."""
+    return f"{square_name(move & 63)}-{square_name(move >> 6 & 63)}"
+
+
+# Mirroring A<->H reverses the bits inside every byte of a bitboard, the rules are the same
+# on both sides. A square mirrors to square ^ 7.
+MIRROR_BYTES = bytes(int(f"{byte:08b}"[::-1], 2) for byte in range(256))
+
+
+def mirror_bitboard(bitboard):
+    """Return the bitboard mirrored A<->H."""
+    return int.from_bytes(bitboard.to_bytes(8, 'big').translate(MIRROR_BYTES), 'big')
+
+
+def mirror_square(square):
+    """Return the square mirrored A<->H, e.g. B1 -> G1."""
+    return square ^ 7
+
+
+def mirror_move(move):
+    """Return the packed move mirrored A<->H, the flags stay the same."""
+    return move ^ (7 | 7 << 6)
+
+
+def move_category_flags(category):
+    """Return the packed move flags of a move category (a key of MOVE_CATEGORIES)."""
+    pieces, _, target_kind = MOVE_CATEGORIES[category]
+    flags = MOVE_UNSTACK if pieces == 'doubles' else 0
+    if target_kind.startswith('enemy'):
+        flags |= MOVE_CAPTURE
+    elif target_kind == 'friend_singles':
+        flags |= MOVE_STACK
+    return flags
+
+
+def build_move_tables():
+    """Compute the per-square target masks for both colors.
+
+    Returns:
+        tuple: (direction_targets, direction_names, direction_moves, single_steps, single_captures, double_jumps).
+            direction_targets[color][direction][square] is the target mask of one direction,
+            direction_names[color][direction][square] the matching "A1-B2" string (or None),
+            direction_moves[color][direction][square] the matching packed move without flags (or None),
+            the last three are the combined masks of all single steps, single captures and
+            double jumps from a square.
+    """
+    direction_targets = {}
+    direction_names = {}
+    direction_moves = {}
+    single_steps = {}
+    single_captures = {}
+    double_jumps = {}
+    for color, sign in (("Blue", 1), ("Red", -1)):
+        direction_targets[color] = {}
+        direction_names[color] = {}
+        direction_moves[color] = {}
+        for direction, (file_step, rank_step) in MOVE_DIRECTIONS.items():
+            targets = []
+            names = []
+            moves = []
+            for square in range(64):
+                file = (63 - square) % 8 + sign * file_step
+                rank = (63 - square) // 8 + sign * rank_step
+                to_square = 63 - 8 * rank - file
+                if 0 <= file < 8 and 0 <= rank < 8 and BOARD_MASK >> to_square & 1:
+                    targets.append(1 << to_square)
+                    names.append(f"{square_name(square)}-{square_name(to_square)}")
+                    moves.append(encode_move(square, to_square))
+                else:
+                    targets.append(0)
+                    names.append(None)
+                    moves.append(None)
+            direction_targets[color][direction] = tuple(targets)
+            direction_names[color][direction] = tuple(names)
+            direction_moves[color][direction] = tuple(moves)
+
+        tables = direction_targets[color]
+        single_steps[color] = tuple(tables['left'][square] | tables['front'][square] | tables['right'][square]
+                                    for square in range(64))
+        single_captures[color] = tuple(tables['kill_left'][square] | tables['kill_right'][square]
+                                       for square in range(64))
+        double_jumps[color] = tuple(tables['l_l_f'][square] | tables['f_f_l'][square] |
+                                    tables['f_f_r'][square] | tables['r_r_f'][square]
+                                    for square in range(64))
+    return direction_targets, direction_names, direction_moves, single_steps, single_captures, double_jumps
+
+
+(DIRECTION_TARGETS, DIRECTION_MOVE_NAMES, DIRECTION_MOVES,
+ SINGLE_STEP_TARGETS, SINGLE_CAPTURE_TARGETS, DOUBLE_JUMP_TARGETS) = build_move_tables()
+MOVE_CATEGORY_FLAGS = {category: move_category_flags(category) for category in MOVE_CATEGORIES}
+
+
+def build_direction_shifts():
+    """Compute the whole-board shift of every direction for both colors.
+
+    Returns:
+        dict: direction_shifts[color][direction] = (from_mask, delta), where from_mask holds the
+            squares that have a target in that direction and delta is to_square - from_square.
+    """
+    direction_shifts = {}
+    for color, tables in DIRECTION_TARGETS.items():
+        direction_shifts[color] = {}
+        for direction, targets in tables.items():
+            from_mask = 0
+            delta = 0
+            for square, target in enumerate(targets):
+                if target:
+                    from_mask |= 1 << square
+                    delta = target.bit_length() - 1 - square
+            direction_shifts[color][direction] = (from_mask, delta)
+    return direction_shifts
+
+
+DIRECTION_SHIFTS = build_direction_shifts()
+
+
+def shift_squares(bitboard, delta):
+    """Move every set square of a bitboard by delta squares."""
+    return bitboard << delta if delta >= 0 else bitboard >> -delta
+
+
+def build_category_descriptors():
+    """Precompute what the move generators need to know about every move category.
+
+    Returns:
+        dict: descriptors[color][i] = (category, piece, target_kind, targets, names, moves, flags, from_mask, delta)
+            for category number i of MOVE_CATEGORIES. piece is 0 for singles and 1 for doubles,
+            target_kind an index into TARGET_KINDS, targets, names and moves the direction tables
+            of build_move_tables, flags the packed move flags shifted into place and
+            (from_mask, delta) the whole-board shift of the direction.
+    """
+    descriptors = {}
+    for color in ("Blue", "Red"):
+        color_descriptors = []
+        for category, (pieces, direction, target_kind) in MOVE_CATEGORIES.items():
+            from_mask, delta = DIRECTION_SHIFTS[color][direction]
+            color_descriptors.append((category, 0 if pieces == 'singles' else 1, TARGET_KINDS.index(target_kind),
+                                      DIRECTION_TARGETS[color][direction], DIRECTION_MOVE_NAMES[color][direction],
+                                      DIRECTION_MOVES[color][direction], MOVE_CATEGORY_FLAGS[category] << 12,
+                                      from_mask, delta))
+        descriptors[color] = tuple(color_descriptors)
+    return descriptors
+
+
+CATEGORY_DESCRIPTORS = build_category_descriptors()
+
+# squares a piece has to reach to win, the corners are not part of the board
+GOAL_RANK_MASKS = {"Blue": 0xFF & BOARD_MASK, "Red": 0xFF << 56 & BOARD_MASK}
+
+
+def build_runner_tables():
+    """Compute the masks used to find runners, singles nobody can stop from reaching the goal rank.
+
+    A runner walks straight ahead. Enemy pieces never move back, so only an enemy on a rank
+    ahead of the runner can block or take it, and to get there in time it has at most one move
+    per rank between them. An enemy covers at most two files per move (a double's sideways jump)
+    and takes from up to two files away, so the span of a square holds every square ahead of
+    it within two files plus two per rank. A single with no enemy in its span and nothing on its
+    path reaches the goal rank whoever moves first.
+
+    Returns:
+        tuple: (runner_squares, spans, paths, distances). runner_squares[color] is the mask of
+            squares a runner can start from (the A and H files end in a corner), spans[color][square]
+            and paths[color][square] the masks described above and distances[color][square] the
+            number of ranks between the square and the goal rank.
+    """
+    runner_squares = {}
+    spans = {}
+    paths = {}
+    distances = {}
+    for color, sign in (("Blue", 1), ("Red", -1)):
+        color_spans = []
+        color_paths = []
+        color_distances = []
+        runner_squares[color] = 0
+        for square in range(64):
+            file = (63 - square) % 8
+            rank = (63 - square) // 8
+            progress = rank if sign == 1 else 7 - rank
+            span = 0
+            path = 0
+            for to_square in range(64):
+                ahead = sign * ((63 - to_square) // 8 - rank)
+                files = abs((63 - to_square) % 8 - file)
+                if ahead >= 1 and files <= 2 * ahead + 2:
+                    span |= 1 << to_square
+                    if files == 0:
+                        path |= 1 << to_square
+            color_spans.append(span & BOARD_MASK)
+            color_paths.append(path & BOARD_MASK)
+            color_distances.append(7 - progress)
+            if 0 < file < 7 and progress < 7:
+                runner_squares[color] |= 1 << square
+        spans[color] = tuple(color_spans)
+        paths[color] = tuple(color_paths)
+        distances[color] = tuple(color_distances)
+    return runner_squares, spans, paths, distances
+
+
+RUNNER_SQUARES, RUNNER_SPANS, RUNNER_PATHS, GOAL_DISTANCES = build_runner_tables()
+
+
+def iter_table_moves(sources, targets, allowed, flags):
+    """Yield the packed moves of the pieces on sources into the allowed squares.
+
+    Args:
+        sources (int): bitboard of the moving pieces
+        targets (tuple): per-square target masks, e.g. SINGLE_STEP_TARGETS["Blue"]
+        allowed (int): bitboard of the squares the pieces may land on
+        flags (int): move flags of every yielded move
+
+    Yields:
+        int: packed moves, from-squares in A1..H8 order
+    """
+    if not allowed:
+        return
+    flags <<= 12
+    while sources:
+        square = sources.bit_length() - 1
+        sources ^= 1 << square
+        hits = targets[square] & allowed
+        while hits:
+            to_square = hits.bit_length() - 1
+            hits ^= 1 << to_square
+            yield square | to_square << 6 | flags
+
+# FEN codec
+# FEN_ROWS lists the squares of every FEN row in the order to_fen writes them, without the corners.
+FEN_ROWS = tuple(tuple(square for square in range(63 - 8 * row, 55 - 8 * row, -1) if square not in CORNER_SQUARES)
+                 for row in range(8))
+# piece token -> indices into (BLUE_SINGLES, BLUE_DOUBLES, BLUE_BLOCKED, RED_SINGLES, RED_DOUBLES, RED_BLOCKED),
+# a double is written bottom piece first
+FEN_PIECES = {
+    'b0': (0,),
+    'bb': (1, 2),
+    'rb': (1, 5),
+    'r0': (3,),
+    'rr': (4, 5),
+    'br': (2, 4),
+}
+FEN_TOKENS = {indices: token for token, indices in FEN_PIECES.items()}
+
+
+@lru_cache(maxsize=4096)
+def parse_fen(notation):
+    """
+    Parse the board part of a FEN string into bitboards.
+
+    The notation is read as one stream from A1 on: a digit skips that many squares, a "b" or
+    "r" and the character after it are one piece (see FEN_PIECES, any other second character
+    makes a single) and "/" is ignored. Results are cached by string, so positions that come
+    up again parse for free.
+
+    Args:
+        notation (str): e.g. "b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0"
+
+    Returns:
+        tuple: (BLUE_SINGLES, BLUE_DOUBLES, BLUE_BLOCKED, RED_SINGLES, RED_DOUBLES, RED_BLOCKED),
+            or None if the notation is not a valid board
+    """
+    if not validate_string(notation):
+        return None
+    bitboards = [0] * 6
+    square = 63
+    i = 0
+    while i < len(notation):
+        if square in CORNER_SQUARES:
+            square -= 1
+            continue
+        char = notation[i]
+        if char == "/":
+            i += 1
+        elif char.isdigit():
+            square -= int(char)
+            i += 1
+        else:
+            if i + 1 == len(notation) or square < 0:
+                return None
+            indices = FEN_PIECES.get(notation[i:i + 2]) or FEN_PIECES[char + "0"]
+            for index in indices:
+                bitboards[index] |= 1 << square
+            square -= 1
+            i += 2
+    return tuple(bitboards)
+
+
+# zobrist hashing
+ZOBRIST_SEED = 20240624
+
+
+def initialize_zobrist_table(num_coordinates=int(), num_different_piece_types=int(), seed=ZOBRIST_SEED):
+    """we initiate the hash table as an array. Blue player has 3 different piece types:
+    1: BLUE_SINGLES, 2: BLUE_DOUBLES, 3: BLUE_BLOCKED. Red player has the same.
+    so we have 6 piece types.
+
+    The numbers come from a seeded generator, so every process builds the same table and
+    hashes can be compared between boards, copies and runs.
+
+    Args:
+        num_coordinates (int): number of coordinates of the board. We have 64 coodinates
+        num_different_piece_types (int): numver of different pieces on the board.
+        seed (int): seed of the random generator
+    Returns:
+        zobrist_table (array): zobrist table is implemented as a 2 dimensional array.
+        zobrist_table = [[(rand_bitstring_for_coordinate_1), (rand_bitstring_for_piecetype_1), (rand_bitstring_for_piecetype_2)...], ..., ..., ]
+
+    """
+    generator = random.Random(seed)
+    zobrist_table = []  # initiate list
+    # create 2 dimensional list for position and piece type
+    for coordinate in range(num_coordinates):
+        zobrist_table.append([]) # random 64 bitstring for coordinate on board
+        for piece_type in range(num_different_piece_types):
+            zobrist_table[coordinate].append(generator.getrandbits(64))  # random 64 bitstring for possible piece type on this coordinate
+
+    # add on last position of zobrist_table if it's blue players turn as a random 64 bitstring
+    max_players_turn = generator.getrandbits(64)
+    zobrist_table.append(max_players_turn)
+
+    return zobrist_table
+
+
+# Shared by every Board, built once per process
+ZOBRIST_TABLE = initialize_zobrist_table(64, 6)
+
+# Initial number of entries of the undo stack, it grows by this much when a line gets longer
+UNDO_STACK_SIZE = 256
+
+
 class Board:
+    # Only the position and the search state live on an instance, everything else is shared class data
+    __slots__ = ('BLUE_SINGLES', 'BLUE_DOUBLES', 'BLUE_BLOCKED', 'RED_SINGLES', 'RED_DOUBLES', 'RED_BLOCKED',
+                 'undo_stack', 'ply', 'reversible_plies', 'attack_maps', 'blue_to_move', 'board_hash', 'mirror_hash')
+
     # Class-level constants for masks
     FIRST_6_SQUARES_MASK = 0b001111110
     LAST_6_SQUARES_MASK = 9079256848778919936
@@ -120,7 +540,7 @@ class Board:
     FORBIDDEN_RIGHT_MASK = 0b1000000010000000100000001000000010000000100000001000000010000000
     FORBIDDEN_LEFT_LEFT_MASK = 0b0000001100000011000000110000001100000011000000110000001100000011
     FORBIDDEN_RIGHT_RIGHT_MASK = 0b1100000011000000110000001100000011000000110000001100000011000000
-    lastMove = ""
+    zobrist_table = ZOBRIST_TABLE
 
     move_categories_dict = {
         # singles
@@ -193,38 +613,6 @@ class Board:
         }
     }
 
-    shift_map = {
-        "singles_front_empty": 8,
-        "singles_left_empty": -1,
-        "singles_right_empty": 1,
-        "singles_front_singles": 8,
-        "singles_left_singles": -1,
-        "singles_right_singles": 1,
-        "singles_kill_left_singles": 7,
-        "singles_kill_right_singles": 9,
-        "singles_kill_left_doubles": 7,
-        "singles_kill_right_doubles": 9,
-        "singles_upgrade_left": -1,
-        "singles_upgrade_right": 1,
-        "singles_upgrade_front": 8,
-        "doubles_l_l_f_empty": 6,
-        "doubles_f_f_l_empty": 15,
-        "doubles_f_f_r_empty": 17,
-        "doubles_r_r_f_empty": 10,
-        "doubles_l_l_f_singles": 6,
-        "doubles_f_f_l_singles": 15,
-        "doubles_f_f_r_singles": 17,
-        "doubles_r_r_f_singles": 10,
-        "doubles_kill_l_l_f_singles": 6,
-        "doubles_kill_f_f_l_singles": 15,
-        "doubles_kill_f_f_r_singles": 17,
-        "doubles_kill_r_r_f_singles": 10,
-        "doubles_kill_l_l_f_doubles": 6,
-        "doubles_kill_f_f_l_doubles": 15,
-        "doubles_kill_f_f_r_doubles": 17,
-        "doubles_kill_r_r_f_doubles": 10,
-    }
-
     def __init__(self):
         # Initialize the board state
         self.BLUE_SINGLES = 0b0000000000000000000000000000000000000000000000000000000000000000
@@ -233,85 +621,67 @@ class Board:
         self.RED_SINGLES = 0b0000000000000000000000000000000000000000000000000000000000000000
         self.RED_DOUBLES = 0b0000000000000000000000000000000000000000000000000000000000000000
         self.RED_BLOCKED = 0b0000000000000000000000000000000000000000000000000000000000000000
-        self.last_state = None
-        self.actual_state = self.capture_state()
-        self.zobrist_table = self.initialize_zobrist_table(64, 6)
+        self.undo_stack = [None] * UNDO_STACK_SIZE
+        self.ply = 0
+        self.reversible_plies = 0
+        self.attack_maps = None
+        # Red moves first; the hash includes the side to move
+        self.blue_to_move = False
         self.board_hash = 0
+        # hash of the position mirrored A<->H, kept up to date alongside board_hash
+        self.mirror_hash = 0
 
         
     def __copy__(self):
-        # Create a new instance of the class
-        new = self.__class__()  
-        # Copy the state of the board
-        new.BLUE_SINGLES = copy.copy(self.BLUE_SINGLES)
-        new.BLUE_DOUBLES = copy.copy(self.BLUE_DOUBLES)
-        new.BLUE_BLOCKED = copy.copy(self.BLUE_BLOCKED)
-        new.RED_SINGLES = copy.copy(self.RED_SINGLES)
-        new.RED_DOUBLES = copy.copy(self.RED_DOUBLES)
-        new.RED_BLOCKED = copy.copy(self.RED_BLOCKED)
-        new.last_state = copy.copy(self.last_state)
-        new.actual_state = copy.copy(self.actual_state)
-        return new
-        
+        return self.copy_board()
 
     def fen_notation_into_bb(self, notation):
-        # Auslesen der vorgegebenen String Notation vom Server in unsere BitBoards für Pieces
-        if validate_string(notation) == True:
-            # Checke,ob der FEN String ein gültiger ist
-            boardPos = 63
-            i = 0
-            # Gehe die String Notation bis zum Schluss durch.
-            while i < len(notation):
-                if boardPos == 63 or boardPos == 56 or boardPos == 7 or boardPos == 0:
-                    boardPos -= 1
-                    continue
-                # Setze den String in eine Binäre Darstellung und befülle ihn 60 mal mit der "0", weil unsere BitBoards nur 60 Felder haben.
-                binary = "0" * 64
-                # Teile den String an der Board Position in der wir uns gerade gefinden und setze eine 1 dazwischen.
-                binary = binary[boardPos + 1:] + "1" + binary[0:boardPos]
-                # Schaue ob das Zeichen aus der Notation ein "r" ist.
-                if notation[i] == "r":
-                    # Schaue, ob das nächste Zeichen aus der Notation ebenfalls ein "r" ist, denn daraus Ergibt sich ein Pferd.
-                    if notation[i] == notation[i + 1]:
-                        # Wandle den String in ein binäres int um und addiere es auf das aktuelle BitBoard für rote Pferde.
-                        self.RED_DOUBLES += int(binary, 2)
-                        self.RED_BLOCKED += int(binary, 2)
-                    # Schaue, ob das nächste Zeichen aus der Notation ein "b" ist, denn daraus Ergibt sich ein captured red pawn(Mir fällt der deutsche Name nicht ein).
-                    elif notation[i + 1] == "b":
-                        # Wandle den String in ein binäres int um und addiere es auf das aktuelle BitBoard für captured red pawn.
-                        self.BLUE_DOUBLES += int(binary, 2)
-                        self.RED_BLOCKED += int(binary, 2)
-                    else:
-                        # Wandle den String in ein binäres int um und addiere es auf das aktuelle BitBoard für rote Bauern.
-                        self.RED_SINGLES += int(binary, 2)
-                # Falls das Zeichen ein "/" soll dieser Schleifendurchlauf überprüfen werden, da es kein Zeichen ist, welches im Board notwendig ist.
-                elif notation[i] == "/":
-                    i += 1
-                    continue
-                # Falls das Zeichen aus der Notation ein "b" ist.
-                elif notation[i] == "b":
-                    if notation[i] == notation[i + 1]:
-                        # Wandle den String in ein binäres int um und addiere es auf das aktuelle BitBoard für blaue Pferde.
-                        self.BLUE_DOUBLES += int(binary, 2)
-                        self.BLUE_BLOCKED += int(binary, 2)
-                    elif notation[i + 1] == "r":
-                        # Wandle den String in ein binäres int um und addiere es auf das aktuelle BitBoard für captured blue pawn.
-                        self.RED_DOUBLES += int(binary, 2)
-                        self.BLUE_BLOCKED += int(binary, 2)
-                    else:
-                        # Wandle den String in ein binäres int um und addiere es auf das aktuelle BitBoard für blaue Bauern.
-                        self.BLUE_SINGLES += int(binary, 2)
-                # Falls das Zeichen aus der Notation eine Zahl ist.
-                else:
-                    # Reduziere die Board Position um die angegebene Zahl für die leeren Felder.
-                    boardPos -= int(notation[i])
-                    i += 1
-                    continue
-                # Reduziere die Board Position um 1 und erhöhe die nächste Iteration für die Schleife um 2.
-                boardPos -= 1
-                i += 2
-        else:
+        """
+        Set up the board from the board part of a FEN string, as sent by the server.
+
+        An invalid notation sets up the start position instead.
+
+        Args:
+            notation (str): e.g. "b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0"
+        """
+        bitboards = parse_fen(notation)
+        if bitboards is None:
             self.initialize()
+            return
+        (self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
+         self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED) = bitboards
+        self.ply = 0
+        self.reversible_plies = 0
+        self.attack_maps = None
+        self.board_hash = self.calculate_zobrist_hash(64, self.blue_to_move)
+        self.mirror_hash = self.calculate_zobrist_hash(64, self.blue_to_move, mirrored=True)
+
+    def to_fen(self):
+        """
+        Write the board in the FEN notation read by fen_notation_into_bb.
+
+        Returns:
+            str: the board part of a FEN string
+        """
+        bitboards = (self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
+                     self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED)
+        rows = []
+        for squares in FEN_ROWS:
+            row = ""
+            empty = 0
+            for square in squares:
+                indices = tuple(index for index, bitboard in enumerate(bitboards) if bitboard >> square & 1)
+                if not indices:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += FEN_TOKENS[indices]
+            if empty:
+                row += str(empty)
+            rows.append(row)
+        return "/".join(rows)
 
     def capture_state(self):
         # Capture the current state of the board attributes
@@ -321,8 +691,7 @@ class Board:
             'BLUE_BLOCKED': self.BLUE_BLOCKED,
             'RED_SINGLES': self.RED_SINGLES,
             'RED_DOUBLES': self.RED_DOUBLES,
-            'RED_BLOCKED': self.RED_BLOCKED,
-            'last_state': self.last_state}
+            'RED_BLOCKED': self.RED_BLOCKED}
         return actual_state
 
     # Initialization and Resetting
@@ -338,8 +707,11 @@ class Board:
         self.RED_SINGLES = 0b0000000000000100000001000000000011000010100000000000000000000000
         self.RED_DOUBLES = 0b0000000000000001000000010000000000100000001000000000000000000000
         self.RED_BLOCKED = 0b0000000000000001000000010000000000100000001000000000000000000000
-        self.last_state = None
-        self.actual_state = self.capture_state()
+        self.ply = 0
+        self.reversible_plies = 0
+        self.attack_maps = None
+        self.board_hash = self.calculate_zobrist_hash(64, self.blue_to_move)
+        self.mirror_hash = self.calculate_zobrist_hash(64, self.blue_to_move, mirrored=True)
 
     def initialize_for_test_doubles(self):
         # Initialize the board with all testing cases
@@ -349,8 +721,11 @@ class Board:
         self.RED_SINGLES = 0b0000000000000000000010000000000000000000000000001000000000000000
         self.RED_DOUBLES = 0b0000000000000000000000000001000000000000001000000000000001000000
         self.RED_BLOCKED = 0b0000000000000000000000000001000000000000001000000000000001000000
-        self.last_state = None
-        self.actual_state = self.capture_state()
+        self.ply = 0
+        self.reversible_plies = 0
+        self.attack_maps = None
+        self.board_hash = self.calculate_zobrist_hash(64, self.blue_to_move)
+        self.mirror_hash = self.calculate_zobrist_hash(64, self.blue_to_move, mirrored=True)
 
     def reset(self):
         # Reset the board to its initial state
@@ -360,21 +735,44 @@ class Board:
         self.RED_SINGLES = 0b0000000000000000000000000000000000000000000000000111111001111110
         self.RED_DOUBLES = 0b0000000000000000000000000000000000000000000000000000000000000000
         self.RED_BLOCKED = 0b0000000000000000000000000000000000000000000000000000000000000000
-        self.last_state = None
-        self.actual_state = self.capture_state()
+        self.ply = 0
+        self.reversible_plies = 0
+        self.attack_maps = None
+        self.board_hash = self.calculate_zobrist_hash(64, self.blue_to_move)
+        self.mirror_hash = self.calculate_zobrist_hash(64, self.blue_to_move, mirrored=True)
 
     # Move-related Methods
     def apply_move(self, move):
         """Apply the given move to the game state.
 
         Args:
-            move (Move): Move object. The move to be applied.
+            move (int or Move): packed move (see encode_move) or Move object. The move to be applied.
 
         Returns:
             str: A string indicating the result of the move.
+        """
+        if isinstance(move, int):
+            return self.apply_packed_move(move)
+
+        state = (self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
+                 self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED)
+        result = self.apply_move_object(move)
+        if result.startswith("Error"):
+            # some checks only fail after the piece was lifted, put everything back
+            (self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
+             self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED) = state
+        else:
+            self.push_undo(*state)
+        return result
+
+    def apply_move_object(self, move):
+        """Apply a Move object to the bitboards, checking every rule on the way.
+
+        Args:
+            move (Move): Move object. The move to be applied.
 
-        Raises:
-            ValueError: If the move is invalid or the coordinates are out of range.
+        Returns:
+            str: A string indicating the result of the move.
         """
         
         # Check invalid input
@@ -388,28 +786,27 @@ class Board:
                   Coordinate.A1.value <= move.to.value <= Coordinate.H8.value):
             return "Error: Invalid coordinates"
 
-        lastMove = str(move)[-5:]
-        
+        from_square = square_of(move.from_)
+        to_square = square_of(move.to)
+
         # Apply the move
         # Blue piece
         if move.player == "Blue":
             # Blue single
-            if there_is(self.BLUE_SINGLES, move.from_):
+            if there_is(self.BLUE_SINGLES, from_square):
                 # to the front or to the left or to the right
                 if move.to.value == move.from_.value + 8 or move.to.value == move.from_.value - 1 or move.to.value == move.from_.value + 1:
                     # there is a blue single
-                    if there_is(self.BLUE_SINGLES, move.to):
-                        self.last_state = self.capture_state()
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.from_)
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.to)
-                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, move.to)
-                        self.BLUE_BLOCKED = add_nth_bit(self.BLUE_BLOCKED, move.to)
-                        self.actual_state = self.capture_state()
+                    if there_is(self.BLUE_SINGLES, to_square):
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, from_square)
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, to_square)
+                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, to_square)
+                        self.BLUE_BLOCKED = add_nth_bit(self.BLUE_BLOCKED, to_square)
                         return "New double"
                     # there are blue doubles, red singles or red doubles
-                    elif (there_is(self.BLUE_DOUBLES, move.to) or
-                          there_is(self.RED_SINGLES, move.to) or
-                          there_is(self.RED_DOUBLES, move.to)):
+                    elif (there_is(self.BLUE_DOUBLES, to_square) or
+                          there_is(self.RED_SINGLES, to_square) or
+                          there_is(self.RED_DOUBLES, to_square)):
                         return "Error: Invalid move"
                     # there is nothing
                     else:
@@ -417,10 +814,8 @@ class Board:
                             return "Error: Invalid move"
                         elif move.to.value == move.from_.value + 1 and move.to.value in [9, 17, 25, 33, 41, 49]:
                             return "Error: Invalid move"
-                        self.last_state = self.capture_state()
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.from_)
-                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.to)
-                        self.actual_state = self.capture_state()
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, from_square)
+                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, to_square)
                         if move.to.value == move.from_.value + 8:
                             return "Frontal move"
                         elif move.to.value == move.from_.value - 1:
@@ -430,20 +825,16 @@ class Board:
                 # to the left-front or right-front
                 elif move.to.value == move.from_.value + 7 or move.to.value == move.from_.value + 9:
                     # there red single
-                    if there_is(self.RED_SINGLES, move.to):
-                        self.last_state = self.capture_state()
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.from_)
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.to)
-                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.to)
-                        self.actual_state = self.capture_state()
+                    if there_is(self.RED_SINGLES, to_square):
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, from_square)
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, to_square)
+                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, to_square)
                         return "Killing move"
                     # there is red double
-                    elif there_is(self.RED_DOUBLES, move.to):
-                        self.last_state = self.capture_state()
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.from_)
-                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, move.to)
-                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, move.to)
-                        self.actual_state = self.capture_state()
+                    elif there_is(self.RED_DOUBLES, to_square):
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, from_square)
+                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, to_square)
+                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, to_square)
                         return "Double killing move"
                     else:
                         return "Error: Invalid move"
@@ -451,103 +842,84 @@ class Board:
                 else:
                     return "Error: Unknown move"
             # Blue double
-            elif there_is(self.BLUE_DOUBLES, move.from_):
+            elif there_is(self.BLUE_DOUBLES, from_square):
                 # to left-left-front or front-front-left or to front-front-right or right-right-front
                 if move.to.value == move.from_.value + 6 or move.to.value == move.from_.value + 15 or move.to.value == move.from_.value + 17 or move.to.value == move.from_.value + 10:
                     # -------------------- Maybe bug ----------------------------------------------------------------------------------------------------------------------------------------------------------
-                    copy = self.last_state
-                    self.last_state = self.capture_state()
                     # there is blue single
-                    if there_is(self.BLUE_SINGLES, move.to):
-                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, move.from_)
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.to)
-                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, move.to)
-                        self.BLUE_BLOCKED = add_nth_bit(self.BLUE_BLOCKED, move.to)
+                    if there_is(self.BLUE_SINGLES, to_square):
+                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, from_square)
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, to_square)
+                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, to_square)
+                        self.BLUE_BLOCKED = add_nth_bit(self.BLUE_BLOCKED, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             return "Change of double"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             return "Change of double"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                     # there is red single
-                    elif there_is(self.RED_SINGLES, move.to):
-                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, move.from_)
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.to)
-                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.to)
+                    elif there_is(self.RED_SINGLES, to_square):
+                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, from_square)
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, to_square)
+                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             return "Killing move"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             return "Killing move"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                     # there is red double
-                    elif there_is(self.RED_DOUBLES, move.to):
-                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, move.from_)
-                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, move.to)
-                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, move.to)
+                    elif there_is(self.RED_DOUBLES, to_square):
+                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, from_square)
+                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, to_square)
+                        self.BLUE_DOUBLES = add_nth_bit(self.BLUE_DOUBLES, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             return "Double killing move"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             return "Double killing move"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                     # there is blue double
-                    elif there_is(self.BLUE_DOUBLES, move.to):
-                        self.last_state = copy
+                    elif there_is(self.BLUE_DOUBLES, to_square):
                         return "Error: Invalid move"
                     # there is nothing
                     else:
                         if move.to.value == move.from_.value + 6 and move.to.value in [15, 16, 23, 24, 31, 32, 39, 40,
                                                                                        47, 48, 55, 56]:
-                            self.last_state = copy
                             return "Error: Invalid move"
                         elif move.to.value == move.from_.value + 10 and move.to.value in [9, 10, 17, 18, 25, 26, 33, 34,
                                                                                           41, 42, 49, 50]:
-                            self.last_state = copy
                             return "Error: Invalid move"
                         elif move.to.value == move.from_.value + 15 and move.to.value in [16, 24, 32, 40, 48, 56]:
-                            self.last_state = copy
                             return "Error: Invalid move"
                         elif move.to.value == move.from_.value + 17 and move.to.value in [9, 17, 25, 33, 41, 49, ]:
-                            self.last_state = copy
                             return "Error: Invalid move"
 
-                        # copy = self.last_state
-                        # self.last_state = self.capture_state()
-                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, move.from_)
-                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.to)
+                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, from_square)
+                        self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             if move.to.value == move.from_.value + 6:
                                 return "left-left-front move"
                             elif move.to.value == move.from_.value + 15:
@@ -557,10 +929,9 @@ class Board:
                             else:
                                 return "right-right-front move"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             if move.to.value == move.from_.value + 6:
                                 return "left-left-front move"
                             elif move.to.value == move.from_.value + 15:
@@ -570,34 +941,31 @@ class Board:
                             else:
                                 return "right-right-front move"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                 # to somewhere else
                 else:
                     return "Error: Unknown move"
             # Blue blocked
-            elif there_is(self.BLUE_BLOCKED, move.from_):
+            elif there_is(self.BLUE_BLOCKED, from_square):
                 return "Error: Blocked can not move"
             else:
                 return "Error: Could not find the piece"
         # Red piece
         elif move.player == "Red":
             # Red single
-            if there_is(self.RED_SINGLES, move.from_):
+            if there_is(self.RED_SINGLES, from_square):
                 # to the front or to the left or to the right
                 if move.to.value == move.from_.value - 8 or move.to.value == move.from_.value - 1 or move.to.value == move.from_.value + 1:
                     # there is red single
-                    if there_is(self.RED_SINGLES, move.to):
-                        self.last_state = self.capture_state()
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.from_)
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.to)
-                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, move.to)
-                        self.RED_BLOCKED = add_nth_bit(self.RED_BLOCKED, move.to)
-                        self.actual_state = self.capture_state()
+                    if there_is(self.RED_SINGLES, to_square):
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, from_square)
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, to_square)
+                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, to_square)
+                        self.RED_BLOCKED = add_nth_bit(self.RED_BLOCKED, to_square)
                         return "New double"
-                    elif (there_is(self.RED_DOUBLES, move.to) or
-                          there_is(self.BLUE_SINGLES, move.to) or
-                          there_is(self.BLUE_DOUBLES, move.to)):
+                    elif (there_is(self.RED_DOUBLES, to_square) or
+                          there_is(self.BLUE_SINGLES, to_square) or
+                          there_is(self.BLUE_DOUBLES, to_square)):
                         return "Error: Invalid move"
                     # there is nothing
                     else:
@@ -606,10 +974,8 @@ class Board:
                         elif move.to.value == move.from_.value + 1 and move.to.value in [9, 17, 25, 33, 41, 49]:
                             return "Error: Invalid move"
 
-                        self.last_state = self.capture_state()
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.from_)
-                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.to)
-                        self.actual_state = self.capture_state()
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, from_square)
+                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, to_square)
                         if move.to.value == move.from_.value - 8:
                             return "Frontal move"
                         elif move.to.value == move.from_.value - 1:
@@ -619,20 +985,16 @@ class Board:
                 # to the left-front or right-front
                 elif move.to.value == move.from_.value - 7 or move.to.value == move.from_.value - 9:
                     # there is blue single
-                    if there_is(self.BLUE_SINGLES, move.to):
-                        self.last_state = self.capture_state()
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.from_)
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.to)
-                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.to)
-                        self.actual_state = self.capture_state()
+                    if there_is(self.BLUE_SINGLES, to_square):
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, from_square)
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, to_square)
+                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, to_square)
                         return "Killing move"
                     # there is blue double
-                    elif there_is(self.BLUE_DOUBLES, move.to):
-                        self.last_state = self.capture_state()
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.from_)
-                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, move.to)
-                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, move.to)
-                        self.actual_state = self.capture_state()
+                    elif there_is(self.BLUE_DOUBLES, to_square):
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, from_square)
+                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, to_square)
+                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, to_square)
                         return "Double killing move"
                     else:
                         return "Error: Invalid move"
@@ -640,102 +1002,84 @@ class Board:
                 else:
                     return "Error: S - Unknown move"
             # Red double
-            elif there_is(self.RED_DOUBLES, move.from_):
+            elif there_is(self.RED_DOUBLES, from_square):
                 # left-left-front or front-front-left or to front-front-right or right-right-front
                 if move.to.value == move.from_.value - 6 or move.to.value == move.from_.value - 15 or move.to.value == move.from_.value - 17 or move.to.value == move.from_.value - 10:
                     # -------------------- Maybe bug ----------------------------------------------------------------------------------------------------------------------------------------------------------
-                    copy = self.last_state
-                    self.last_state = self.capture_state()
                     # there is blue single
-                    if there_is(self.BLUE_SINGLES, move.to):
-                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, move.from_)
-                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, move.to)
-                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.to)
+                    if there_is(self.BLUE_SINGLES, to_square):
+                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, from_square)
+                        self.BLUE_SINGLES = clear_nth_bit(self.BLUE_SINGLES, to_square)
+                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             return "Killing move"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             return "Killing move"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                     # there is red single
-                    elif there_is(self.RED_SINGLES, move.to):
-                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, move.from_)
-                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, move.to)
-                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, move.to)
-                        self.RED_BLOCKED = add_nth_bit(self.RED_BLOCKED, move.to)
+                    elif there_is(self.RED_SINGLES, to_square):
+                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, from_square)
+                        self.RED_SINGLES = clear_nth_bit(self.RED_SINGLES, to_square)
+                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, to_square)
+                        self.RED_BLOCKED = add_nth_bit(self.RED_BLOCKED, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             return "Change of double"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             return "Change of double"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                     # there is blue double
-                    elif there_is(self.BLUE_DOUBLES, move.to):
-                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, move.from_)
-                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, move.to)
-                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, move.to)
+                    elif there_is(self.BLUE_DOUBLES, to_square):
+                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, from_square)
+                        self.BLUE_DOUBLES = clear_nth_bit(self.BLUE_DOUBLES, to_square)
+                        self.RED_DOUBLES = add_nth_bit(self.RED_DOUBLES, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             return "Double killing move"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             return "Double killing move"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                     # there is red double
-                    elif there_is(self.RED_DOUBLES, move.to):
-                        self.last_state = copy
+                    elif there_is(self.RED_DOUBLES, to_square):
                         return "Error: Invalid move"
                     # there is nothing
                     else:
                         if move.to.value == move.from_.value - 6 and move.to.value in [9, 10, 17, 18, 25, 26, 33, 34,
                                                                                        41, 42, 49, 50]:
-                            self.last_state = copy
                             return "Error: Invalid move"
                         elif move.to.value == move.from_.value - 10 and move.to.value in [15, 16, 23, 24, 31, 32, 39,
                                                                                           40, 47, 48, 55, 56]:
-                            self.last_state = copy
                             return "Error: Invalid move"
                         elif move.to.value == move.from_.value - 15 and move.to.value in [9, 17, 25, 33, 41, 49]:
-                            self.last_state = copy
                             return "Error: Invalid move"
                         elif move.to.value == move.from_.value - 17 and move.to.value in [16, 24, 32, 40, 48, 56]:
-                            self.last_state = copy
                             return "Error: Invalid move"
 
-                        # self.last_state = self.capture_state()
-                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, move.from_)
-                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.to)
+                        self.RED_DOUBLES = clear_nth_bit(self.RED_DOUBLES, from_square)
+                        self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, to_square)
                         # on top of blue blocked
-                        if there_is(self.BLUE_BLOCKED, move.from_):
-                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, move.from_)
-                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        if there_is(self.BLUE_BLOCKED, from_square):
+                            self.BLUE_BLOCKED = clear_nth_bit(self.BLUE_BLOCKED, from_square)
+                            self.BLUE_SINGLES = add_nth_bit(self.BLUE_SINGLES, from_square)
                             if move.to.value == move.from_.value - 6:
                                 return "left-left-front move"
                             elif move.to.value == move.from_.value - 15:
@@ -745,10 +1089,9 @@ class Board:
                             else:
                                 return "right-right-front move"
                         # on top of red blocked
-                        elif there_is(self.RED_BLOCKED, move.from_):
-                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, move.from_)
-                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, move.from_)
-                            self.actual_state = self.capture_state()
+                        elif there_is(self.RED_BLOCKED, from_square):
+                            self.RED_BLOCKED = clear_nth_bit(self.RED_BLOCKED, from_square)
+                            self.RED_SINGLES = add_nth_bit(self.RED_SINGLES, from_square)
                             if move.to.value == move.from_.value - 6:
                                 return "left-left-front move"
                             elif move.to.value == move.from_.value - 15:
@@ -758,45 +1101,266 @@ class Board:
                             else:
                                 return "right-right-front move"
                         else:
-                            self.last_state = copy
                             return "Error: Missing blocked piece"
                 # to somewhere else
                 else:
                     return "Error: Unknown move"
             # Red blocked
-            elif there_is(self.RED_BLOCKED, move.from_):
+            elif there_is(self.RED_BLOCKED, from_square):
                 return "Error: Blocked can not move"
             else:
                 return "Error: Could not find the piece"
         else:
             return "Error: Unknown player"
-        
-            
+
+    def apply_packed_move(self, move):
+        """Apply a packed move to the game state.
+
+        The moving color is the color of the piece on the from-square. The move is checked
+        against the lookup tables, the flags are not needed to play it.
+
+        Args:
+            move (int): packed move (see encode_move).
+
+        Returns:
+            str: A string indicating the result of the move.
+        """
+        from_square = move & 63
+        from_mask = 1 << from_square
+        to_mask = 1 << (move >> 6 & 63)
+        if (self.BLUE_SINGLES | self.BLUE_DOUBLES) & from_mask:
+            color = "Blue"
+            friend_singles, friend_doubles, friend_blocked = self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED
+            enemy_singles, enemy_doubles, enemy_blocked = self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED
+        elif (self.RED_SINGLES | self.RED_DOUBLES) & from_mask:
+            color = "Red"
+            friend_singles, friend_doubles, friend_blocked = self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED
+            enemy_singles, enemy_doubles, enemy_blocked = self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED
+        else:
+            return "Error: Could not find the piece"
+
+        # Check the target against the lookup tables
+        if friend_singles & from_mask:
+            targets = (SINGLE_STEP_TARGETS[color][from_square] & ~(friend_doubles | enemy_singles | enemy_doubles) |
+                       SINGLE_CAPTURE_TARGETS[color][from_square] & (enemy_singles | enemy_doubles))
+        else:
+            targets = DOUBLE_JUMP_TARGETS[color][from_square] & ~friend_doubles
+        if not targets & to_mask:
+            return "Error: Invalid move"
+
+        # Lift the moving piece
+        if friend_singles & from_mask:
+            friend_singles ^= from_mask
+        else:
+            friend_doubles ^= from_mask
+            # the piece below becomes a single of its own color
+            if friend_blocked & from_mask:
+                friend_blocked ^= from_mask
+                friend_singles |= from_mask
+            else:
+                enemy_blocked ^= from_mask
+                enemy_singles |= from_mask
+
+        # Put it down
+        if friend_singles & to_mask:
+            friend_singles ^= to_mask
+            friend_doubles |= to_mask
+            friend_blocked |= to_mask
+            result = "New double"
+        elif enemy_singles & to_mask:
+            enemy_singles ^= to_mask
+            friend_singles |= to_mask
+            result = "Killing move"
+        elif enemy_doubles & to_mask:
+            # the piece below stays where it is
+            enemy_doubles ^= to_mask
+            friend_doubles |= to_mask
+            result = "Double killing move"
+        else:
+            friend_singles |= to_mask
+            result = "Move"
+
+        state = (self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
+                 self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED)
+        if color == "Blue":
+            self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED = friend_singles, friend_doubles, friend_blocked
+            self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED = enemy_singles, enemy_doubles, enemy_blocked
+        else:
+            self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED = friend_singles, friend_doubles, friend_blocked
+            self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED = enemy_singles, enemy_doubles, enemy_blocked
+        self.push_undo(*state)
+        return result
+
+    def make_move(self, move):
+        """Play a packed move from the move generator without checking it.
+
+        The flag bits decide how the piece is lifted and put down, so a move that is not
+        legal in this position corrupts the board. Moves from outside (network, user input)
+        go through apply_move. The move is undone with undo_move like any other.
+
+        Args:
+            move (int): packed move from generate_moves or generate_staged_moves.
+        """
+        from_mask = 1 << (move & 63)
+        to_mask = 1 << (move >> 6 & 63)
+        flags = move >> 12
+        state = (self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
+                 self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED)
+        blue = (self.BLUE_SINGLES | self.BLUE_DOUBLES) & from_mask
+        if blue:
+            friend_singles, friend_doubles, friend_blocked, enemy_singles, enemy_doubles, enemy_blocked = state
+        else:
+            enemy_singles, enemy_doubles, enemy_blocked, friend_singles, friend_doubles, friend_blocked = state
+
+        # Lift the moving piece, a double leaves the piece below as a single of its own color
+        if flags & MOVE_UNSTACK:
+            friend_doubles ^= from_mask
+            if friend_blocked & from_mask:
+                friend_blocked ^= from_mask
+                friend_singles |= from_mask
+            else:
+                enemy_blocked ^= from_mask
+                enemy_singles |= from_mask
+        else:
+            friend_singles ^= from_mask
+
+        # Put it down
+        if flags & MOVE_STACK:
+            friend_singles ^= to_mask
+            friend_doubles |= to_mask
+            friend_blocked |= to_mask
+        elif flags & MOVE_CAPTURE:
+            if enemy_singles & to_mask:
+                enemy_singles ^= to_mask
+                friend_singles |= to_mask
+            else:
+                enemy_doubles ^= to_mask
+                friend_doubles |= to_mask
+        else:
+            friend_singles |= to_mask
+
+        if blue:
+            self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED = friend_singles, friend_doubles, friend_blocked
+            self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED = enemy_singles, enemy_doubles, enemy_blocked
+        else:
+            self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED = friend_singles, friend_doubles, friend_blocked
+            self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED = enemy_singles, enemy_doubles, enemy_blocked
+        self.push_undo(*state)
+
+    def make_null_move(self):
+        """Pass the turn without moving, for null-move pruning in the search.
+
+        Passing is not a legal move of the game. It is undone with undo_move like any other move,
+        and no position from before it counts as a repetition.
+        """
+        # no piece moves, so the attack maps stay valid
+        attack_maps = self.attack_maps
+        self.push_undo(self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
+                       self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED)
+        self.reversible_plies = 0
+        self.attack_maps = attack_maps
+
+    def push_undo(self, blue_singles, blue_doubles, blue_blocked, red_singles, red_doubles, red_blocked):
+        """
+        Push the undo entry of the move that was just made and update the hash.
+
+        The Zobrist keys of exactly the bits that changed are XORed into the hash, together
+        with the side-to-move key, since every move passes the turn.
+
+        Args:
+            blue_singles ... red_blocked (int): the bitboards from before the move. The entry
+                only keeps their XOR difference to the current bitboards, the old hashes and the
+                old reversible_plies.
+        """
+        deltas = (blue_singles ^ self.BLUE_SINGLES, blue_doubles ^ self.BLUE_DOUBLES,
+                  blue_blocked ^ self.BLUE_BLOCKED, red_singles ^ self.RED_SINGLES,
+                  red_doubles ^ self.RED_DOUBLES, red_blocked ^ self.RED_BLOCKED)
+        if self.ply == len(self.undo_stack):
+            self.undo_stack.extend([None] * UNDO_STACK_SIZE)
+        self.undo_stack[self.ply] = (deltas, self.board_hash, self.reversible_plies, self.mirror_hash)
+        self.ply += 1
+
+        # only a single stepping sideways onto an empty square can be played back,
+        # every other move makes the earlier positions unreachable
+        singles_delta = deltas[0] | deltas[3]
+        sideways = singles_delta.bit_length() - 1 >> 3 == (singles_delta & -singles_delta).bit_length() - 1 >> 3
+        if sideways and not (deltas[0] and deltas[3]) and not (deltas[1] | deltas[2] | deltas[4] | deltas[5]):
+            self.reversible_plies += 1
+        else:
+            self.reversible_plies = 0
+
+        zobrist_table = self.zobrist_table
+        board_hash = self.board_hash ^ zobrist_table[-1]
+        mirror_hash = self.mirror_hash ^ zobrist_table[-1]
+        for piece_type, delta in enumerate(deltas):
+            for square in iter_bits(delta):
+                board_hash ^= zobrist_table[square][piece_type]
+                mirror_hash ^= zobrist_table[square ^ 7][piece_type]
+        self.board_hash = board_hash
+        self.mirror_hash = mirror_hash
+        self.blue_to_move = not self.blue_to_move
+        self.attack_maps = None
+
     def undo_move(self):
         # Undo last move from the board
         # Check if there is a move to undo
-        if self.last_state is None:
+        if self.ply == 0:
             return "Error: No move to undo"
 
-        # Undo the last move
-        self.BLUE_SINGLES = self.last_state['BLUE_SINGLES']
-        self.BLUE_DOUBLES = self.last_state['BLUE_DOUBLES']
-        self.RED_SINGLES = self.last_state['RED_SINGLES']
-        self.RED_DOUBLES = self.last_state['RED_DOUBLES']
-        self.BLUE_BLOCKED = self.last_state['BLUE_BLOCKED']
-        self.RED_BLOCKED = self.last_state['RED_BLOCKED']
-        self.last_state = self.last_state['last_state']
-        self.actual_state = self.capture_state()
+        # Undo the last move by XORing its changes back out
+        self.ply -= 1
+        deltas, self.board_hash, self.reversible_plies, self.mirror_hash = self.undo_stack[self.ply]
+        blue_singles, blue_doubles, blue_blocked, red_singles, red_doubles, red_blocked = deltas
+        self.BLUE_SINGLES ^= blue_singles
+        self.BLUE_DOUBLES ^= blue_doubles
+        self.BLUE_BLOCKED ^= blue_blocked
+        self.RED_SINGLES ^= red_singles
+        self.RED_DOUBLES ^= red_doubles
+        self.RED_BLOCKED ^= red_blocked
+        self.blue_to_move = not self.blue_to_move
+        self.attack_maps = None
         return "Good: Move undone"
 
+    def repetition_count(self):
+        """
+        Count how often the current position has been on the board.
+
+        The hashes of earlier positions are kept in the undo stack. Only every second entry
+        (same player to move) since the last irreversible move is compared, so the check
+        usually ends right away.
+
+        Returns:
+            int: 1 if the position is new, 2 on its first repetition and so on
+        """
+        count = 1
+        board_hash = self.board_hash
+        undo_stack = self.undo_stack
+        for ply in range(self.ply - 2, self.ply - self.reversible_plies - 1, -2):
+            if undo_stack[ply][1] == board_hash:
+                count += 1
+        return count
+
+    def set_player_to_move(self, player_color):
+        """
+        Set whose turn it is, keeping the hash in sync.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+        """
+        blue_to_move = player_color == "Blue"
+        if blue_to_move != self.blue_to_move:
+            self.blue_to_move = blue_to_move
+            self.board_hash ^= self.zobrist_table[-1]
+            self.mirror_hash ^= self.zobrist_table[-1]
+
     # Game-state Checking Methods
     def is_game_over(self):
         # Check for end-game
 
-        # Check if BLUE or RED have reached the opposite side
-        if self.BLUE_SINGLES & Board.FIRST_6_SQUARES_MASK:
+        # Check if BLUE or RED have reached the opposite side, with a single or a double
+        if (self.BLUE_SINGLES | self.BLUE_DOUBLES) & Board.FIRST_6_SQUARES_MASK:
             return True, "Blue"
-        elif self.RED_SINGLES & Board.LAST_6_SQUARES_MASK:
+        elif (self.RED_SINGLES | self.RED_DOUBLES) & Board.LAST_6_SQUARES_MASK:
             return True, "Red"
 
         # Check if all BLUE or RED pieces are blocked or captured
@@ -808,83 +1372,451 @@ class Board:
         # No end-game conditions met
         return False, None
 
-    def parse_to_coordinate_to_move(self, to_coordinates, shift):
-        # This function should return the "from-to" string based on the to_position and the shift
-        moves = []
-        for to_position in range(64):
-            if to_coordinates & (9223372036854775808 >> to_position):
-                from_position = to_position + shift
-                moves.append(f"{Coordinate(from_position + 1).name}-{Coordinate(to_position + 1).name}")
-        return moves
+    def can_reach_goal(self, player_color):
+        """
+        Check whether a player has a move onto the goal rank, i.e. wins with the next move.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            bool: True if one of the player's moves lands on the goal rank
+        """
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemies = self.RED_SINGLES | self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemies = self.BLUE_SINGLES | self.BLUE_DOUBLES
+        goal = GOAL_RANK_MASKS[player_color]
+        direction_shifts = DIRECTION_SHIFTS[player_color]
+        # sideways single steps never change the rank
+        for direction, sources, allowed in (('front', friend_singles, ~(friend_doubles | enemies)),
+                                            ('kill_left', friend_singles, enemies),
+                                            ('kill_right', friend_singles, enemies),
+                                            ('l_l_f', friend_doubles, ~friend_doubles),
+                                            ('f_f_l', friend_doubles, ~friend_doubles),
+                                            ('f_f_r', friend_doubles, ~friend_doubles),
+                                            ('r_r_f', friend_doubles, ~friend_doubles)):
+            from_mask, delta = direction_shifts[direction]
+            if shift_squares(sources & from_mask, delta) & goal & allowed:
+                return True
+        return False
+
+    def runner(self, player_color, to_move=True):
+        """
+        Find the fastest runner of a player, see build_runner_tables.
+
+        A single is a runner if no enemy is in its span and its path is empty. With the player
+        to move a double is one too if it can jump to a square from which it runs on as a single.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+            to_move (bool): whether it is the player's turn, doubles only count if it is
+
+        Returns:
+            tuple: (distance, move), the number of moves the runner needs to reach the goal rank
+                and its first move (packed), or (None, None) if the player has no runner
+        """
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemies = self.RED_SINGLES | self.RED_DOUBLES | self.RED_BLOCKED
+            # a double on an enemy piece that stands on the enemy's goal rank must not move
+            friend_doubles &= ~(self.RED_BLOCKED & GOAL_RANK_MASKS["Red"])
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemies = self.BLUE_SINGLES | self.BLUE_DOUBLES | self.BLUE_BLOCKED
+            friend_doubles &= ~(self.BLUE_BLOCKED & GOAL_RANK_MASKS["Blue"])
+        occupied = friend_singles | friend_doubles | enemies
+        runner_squares = RUNNER_SQUARES[player_color]
+        spans = RUNNER_SPANS[player_color]
+        paths = RUNNER_PATHS[player_color]
+        distances = GOAL_DISTANCES[player_color]
+        front = DIRECTION_TARGETS[player_color]['front']
+
+        best_distance, best_move = None, None
+        for square in iter_bits(friend_singles & runner_squares):
+            if spans[square] & enemies or paths[square] & occupied:
+                continue
+            if best_distance is None or distances[square] < best_distance:
+                best_distance = distances[square]
+                best_move = encode_move(square, front[square].bit_length() - 1)
+        if to_move:
+            double_jumps = DOUBLE_JUMP_TARGETS[player_color]
+            for square in iter_bits(friend_doubles):
+                for to_square in iter_bits(double_jumps[square] & runner_squares & ~occupied):
+                    if spans[to_square] & enemies or paths[to_square] & occupied:
+                        continue
+                    if best_distance is None or distances[to_square] + 1 < best_distance:
+                        best_distance = distances[to_square] + 1
+                        best_move = encode_move(square, to_square, MOVE_UNSTACK)
+        return best_distance, best_move
+
+    def goal_distance_bound(self, player_color):
+        """
+        Get a lower bound on the number of moves a player needs to reach the goal rank.
+
+        No piece gets more than two ranks closer per move, so the most advanced piece (blocked
+        pieces included, they come free when the double on top leaves) needs half its distance.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            int: the bound, or None if the player has no pieces left
+        """
+        if player_color == "Blue":
+            pieces = self.BLUE_SINGLES | self.BLUE_DOUBLES | self.BLUE_BLOCKED
+            if not pieces:
+                return None
+            square = (pieces & -pieces).bit_length() - 1
+        else:
+            pieces = self.RED_SINGLES | self.RED_DOUBLES | self.RED_BLOCKED
+            if not pieces:
+                return None
+            square = pieces.bit_length() - 1
+        return (GOAL_DISTANCES[player_color][square] + 1) // 2
+
+    def race_result(self, player_color):
+        """
+        Decide a position early when a player wins with the next move or wins a race to the
+        goal rank the other player can neither stop nor outrun.
+
+        Args:
+            player_color (str): "Blue" or "Red", the player to move
+
+        Returns:
+            tuple: (winner, move). winner is "Blue", "Red" or None if nothing is decided yet,
+                move is a winning first move if the player to move is the winner, else None.
+        """
+        other_color = "Red" if player_color == "Blue" else "Blue"
+        if self.can_reach_goal(player_color):
+            # the first stage of the staged generator are the moves onto the goal rank
+            return player_color, next(self.generate_staged_moves(player_color))
+
+        # the player to move arrives first on equal distances
+        distance, move = self.runner(player_color)
+        if distance is not None:
+            bound = self.goal_distance_bound(other_color)
+            if bound is None or distance <= bound:
+                return player_color, move
+        other_distance, _ = self.runner(other_color, to_move=False)
+        if other_distance is not None:
+            bound = self.goal_distance_bound(player_color)
+            if bound is None or other_distance < bound:
+                return other_color, None
+        return None, None
 
     # Information Retrieval Methods
     def get_legal_moves(self, selected_categories, player_color):
-        # Get a dict of legal moves depending on the requested category and player color
+        """
+        Get the legal moves of the selected categories for one player.
+
+        Only the categories whose bit is set are visited. The targets of every piece are read
+        from the precomputed per-square tables and filtered with the occupancy bitboards.
+
+        Args:
+            selected_categories (int or iterable): category flags (see CATEGORY_BITS), or names of
+                move categories (keys of MOVE_CATEGORIES)
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            dict: category name -> list of "A1-B1" move strings
+        """
+        flags = selected_categories
+        if not isinstance(flags, int):
+            flags = category_flags(flags)
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemy_singles, enemy_doubles = self.RED_SINGLES, self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemy_singles, enemy_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+        pieces = (friend_singles, friend_doubles)
+        allowed_by_kind = (BOARD_MASK & ~(friend_singles | friend_doubles | enemy_singles | enemy_doubles),
+                           friend_singles, enemy_singles, enemy_doubles)
+        descriptors = CATEGORY_DESCRIPTORS[player_color]
+
         legal_moves = {}
-        friend_singles = self.BLUE_SINGLES if player_color == "Blue" else self.RED_SINGLES
-        friend_doubles = self.BLUE_DOUBLES if player_color == "Blue" else self.RED_DOUBLES
-        enemy_singles = self.RED_SINGLES if player_color == "Blue" else self.BLUE_SINGLES
-        enemy_doubles = self.RED_DOUBLES if player_color == "Blue" else self.BLUE_DOUBLES
+        while flags:
+            bit = flags & -flags
+            flags ^= bit
+            category, piece, target_kind, targets, names = descriptors[bit.bit_length() - 1][:5]
+            sources = pieces[piece]
+            allowed = allowed_by_kind[target_kind]
+            moves = []
+            # walk from the highest bit down so the moves come out in A1..H8 order
+            while sources:
+                square = sources.bit_length() - 1
+                sources ^= 1 << square
+                if targets[square] & allowed:
+                    moves.append(names[square])
+            legal_moves[category] = moves
 
-        for category in selected_categories:
-            direction_multiplier = -1 if player_color == "Red" else 1
+        return legal_moves
 
-            to_coordinates = shift_pieces(friend_singles if category.startswith("singles") else friend_doubles,
-                                          direction_multiplier * self.shift_map[category])
+    def generate_moves(self, player_color):
+        """
+        Get all legal moves of one player as packed ints.
 
-            # Apply masks and filters based on the category specifics
-            if "left" in category or "f_f_l" in category:
-                if player_color == "Red":
-                    to_coordinates &= ~self.FORBIDDEN_RIGHT_MASK
-                else:
-                    to_coordinates &= ~self.FORBIDDEN_LEFT_MASK
-            elif "right" in category or "f_f_r" in category:
-                if player_color == "Red":
-                    to_coordinates &= ~self.FORBIDDEN_LEFT_MASK
-                else:
-                    to_coordinates &= ~self.FORBIDDEN_RIGHT_MASK
-            elif "l_l_f" in category:
-                if player_color == "Red":
-                    to_coordinates &= ~self.FORBIDDEN_RIGHT_RIGHT_MASK
-                else:
-                    to_coordinates &= ~self.FORBIDDEN_LEFT_LEFT_MASK
-            elif "r_r_f" in category:
-                if player_color == "Red":
-                    to_coordinates &= ~self.FORBIDDEN_LEFT_LEFT_MASK
-                else:
-                    to_coordinates &= ~self.FORBIDDEN_RIGHT_RIGHT_MASK
+        The moves come out in the same order as get_all_legal_moves lists them.
 
-            if "kill" in category:
-                to_coordinates &= enemy_singles if category.endswith("singles") else enemy_doubles
-            elif "upgrade" in category:
-                to_coordinates &= friend_singles
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            list: packed moves (see encode_move)
+        """
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemy_singles, enemy_doubles = self.RED_SINGLES, self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemy_singles, enemy_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+        pieces = (friend_singles, friend_doubles)
+        allowed_by_kind = (BOARD_MASK & ~(friend_singles | friend_doubles | enemy_singles | enemy_doubles),
+                           friend_singles, enemy_singles, enemy_doubles)
+
+        moves = []
+        for _, piece, target_kind, targets, _, packed, flags, _, _ in CATEGORY_DESCRIPTORS[player_color]:
+            sources = pieces[piece]
+            allowed = allowed_by_kind[target_kind]
+            if not sources or not allowed:
+                continue
+            while sources:
+                square = sources.bit_length() - 1
+                sources ^= 1 << square
+                if targets[square] & allowed:
+                    moves.append(packed[square] | flags)
+        return moves
+
+    def generate_staged_moves(self, player_color):
+        """
+        Lazily yield the legal moves of one player as packed ints, best candidates first.
+
+        The moves come in four stages: moves that reach the goal rank, captures, stacking
+        moves and quiet moves. A stage is only generated once the caller has consumed the
+        previous one, so a search that cuts off early skips the rest of the work.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Yields:
+            int: packed moves (see encode_move)
+        """
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemies = self.RED_SINGLES | self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemies = self.BLUE_SINGLES | self.BLUE_DOUBLES
+        empty = BOARD_MASK & ~(friend_singles | friend_doubles | enemies)
+        single_steps = SINGLE_STEP_TARGETS[player_color]
+        single_captures = SINGLE_CAPTURE_TARGETS[player_color]
+        double_jumps = DOUBLE_JUMP_TARGETS[player_color]
+        goal = GOAL_RANK_MASKS[player_color]
+
+        # (moving pieces, target table, allowed squares, flags) in stage order
+        groups = (
+            (friend_singles, single_captures, enemies, MOVE_CAPTURE),
+            (friend_doubles, double_jumps, enemies, MOVE_CAPTURE | MOVE_UNSTACK),
+            (friend_singles, single_steps, friend_singles, MOVE_STACK),
+            (friend_doubles, double_jumps, friend_singles, MOVE_STACK | MOVE_UNSTACK),
+            (friend_singles, single_steps, empty, 0),
+            (friend_doubles, double_jumps, empty, MOVE_UNSTACK),
+        )
+        for sources, targets, allowed, flags in groups:
+            yield from iter_table_moves(sources, targets, allowed & goal, flags)
+        for sources, targets, allowed, flags in groups:
+            yield from iter_table_moves(sources, targets, allowed & ~goal, flags)
+
+    def generate_captures(self, player_color):
+        """
+        Get the capturing moves of one player as packed ints.
+
+        The cached attack maps tell which pieces can capture at all, so a position without
+        captures is answered without looking at a single piece.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            list: packed moves (see encode_move), captures by singles first, then by doubles
+        """
+        single_attacks, double_attacks = self.get_attack_maps()[player_color]
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemies = self.RED_SINGLES | self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemies = self.BLUE_SINGLES | self.BLUE_DOUBLES
+        moves = []
+        if single_attacks & enemies:
+            moves.extend(iter_table_moves(friend_singles, SINGLE_CAPTURE_TARGETS[player_color], enemies, MOVE_CAPTURE))
+        if double_attacks & enemies:
+            moves.extend(iter_table_moves(friend_doubles, DOUBLE_JUMP_TARGETS[player_color], enemies,
+                                          MOVE_CAPTURE | MOVE_UNSTACK))
+        return moves
+
+    def is_move_legal(self, move, player_color):
+        """
+        Check that a packed move is legal here before make_move plays it.
+
+        Meant for moves remembered from other positions, like the best move of a
+        transposition entry, which may belong to a different position with the same hash.
+
+        Args:
+            move (int): packed move (see encode_move)
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            bool: True if generate_moves yields the move in this position
+        """
+        from_square = move & 63
+        to_mask = 1 << (move >> 6 & 63)
+        flags = move >> 12
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemies = self.RED_SINGLES | self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemies = self.BLUE_SINGLES | self.BLUE_DOUBLES
+
+        if flags & MOVE_UNSTACK:
+            if not friend_doubles >> from_square & 1:
+                return False
+            targets = DOUBLE_JUMP_TARGETS[player_color][from_square]
+        else:
+            if not friend_singles >> from_square & 1:
+                return False
+            if flags & MOVE_CAPTURE:
+                targets = SINGLE_CAPTURE_TARGETS[player_color][from_square]
             else:
-                if category.endswith("empty"):
-                    to_coordinates &= ~(
-                                friend_singles | enemy_singles | friend_doubles | enemy_doubles | self.FORBIDDEN_SQUARES_MASK)
-                elif category.endswith("singles"):
-                    to_coordinates &= friend_singles
-                elif category.endswith("doubles"):
-                    to_coordinates &= friend_doubles
-
-            legal_moves[category] = self.parse_to_coordinate_to_move(to_coordinates,
-                                                                     direction_multiplier * -1 * self.shift_map[
-                                                                         category])
+                targets = SINGLE_STEP_TARGETS[player_color][from_square]
+        if not targets & to_mask:
+            return False
 
-        return legal_moves
+        kind = flags & ~MOVE_UNSTACK
+        if kind == MOVE_CAPTURE:
+            return bool(enemies & to_mask)
+        if kind == MOVE_STACK:
+            return bool(friend_singles & to_mask)
+        if kind == 0:
+            return bool(BOARD_MASK & ~(friend_singles | friend_doubles | enemies) & to_mask)
+        return False
 
-    def get_all_selected_moves(self, color):
-        return self.get_legal_moves({'singles_left_empty': True,'singles_front_empty': True,'singles_right_empty': True,'singles_kill_left_singles': True,'singles_kill_left_doubles': True,'singles_kill_right_singles': True,'singles_kill_right_doubles': True,'singles_upgrade_left': True,'singles_upgrade_front': True,'singles_upgrade_right': True,'doubles_l_l_f_empty': True,'doubles_f_f_l_empty': True,'doubles_f_f_r_empty': True,'doubles_r_r_f_empty': True,'doubles_kill_l_l_f_singles': True,'doubles_kill_l_l_f_doubles': True,'doubles_kill_f_f_l_singles': True,'doubles_kill_f_f_l_doubles': True,'doubles_kill_f_f_r_singles': True,'doubles_kill_f_f_r_doubles': True,'doubles_kill_r_r_f_singles': True,'doubles_kill_r_r_f_doubles': True,'doubles_l_l_f_singles': True,'doubles_f_f_l_singles': True,'doubles_f_f_r_singles': True,'doubles_r_r_f_singles': True}, color)
+    def count_category_moves(self, player_color):
+        """
+        Count the legal moves of every category without generating them.
+
+        Every direction is one shift of the whole piece bitboard, the count is the popcount
+        of the shifted pieces on the allowed target squares.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            dict: category name -> number of legal moves
+        """
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemy_singles, enemy_doubles = self.RED_SINGLES, self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemy_singles, enemy_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+        pieces = (friend_singles, friend_doubles)
+        allowed_by_kind = (BOARD_MASK & ~(friend_singles | friend_doubles | enemy_singles | enemy_doubles),
+                           friend_singles, enemy_singles, enemy_doubles)
+
+        counts = {}
+        for category, piece, target_kind, _, _, _, _, from_mask, delta in CATEGORY_DESCRIPTORS[player_color]:
+            counts[category] = (shift_squares(pieces[piece] & from_mask, delta) & allowed_by_kind[target_kind]).bit_count()
+        return counts
+
+    def count_moves(self, player_color):
+        """
+        Count the legal moves of one player by popcount, e.g. for mobility.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            int: number of legal moves, the length of generate_moves(player_color)
+        """
+        if player_color == "Blue":
+            friend_singles, friend_doubles = self.BLUE_SINGLES, self.BLUE_DOUBLES
+            enemies = self.RED_SINGLES | self.RED_DOUBLES
+        else:
+            friend_singles, friend_doubles = self.RED_SINGLES, self.RED_DOUBLES
+            enemies = self.BLUE_SINGLES | self.BLUE_DOUBLES
+        direction_shifts = DIRECTION_SHIFTS[player_color]
+        # singles step onto empty squares and own singles, capture diagonally, doubles land anywhere but an own double
+        single_steps = BOARD_MASK & ~(friend_doubles | enemies)
+        double_targets = BOARD_MASK & ~friend_doubles
+
+        count = 0
+        for direction in ('left', 'front', 'right'):
+            from_mask, delta = direction_shifts[direction]
+            count += (shift_squares(friend_singles & from_mask, delta) & single_steps).bit_count()
+        for direction in ('kill_left', 'kill_right'):
+            from_mask, delta = direction_shifts[direction]
+            count += (shift_squares(friend_singles & from_mask, delta) & enemies).bit_count()
+        for direction in ('l_l_f', 'f_f_l', 'f_f_r', 'r_r_f'):
+            from_mask, delta = direction_shifts[direction]
+            count += (shift_squares(friend_doubles & from_mask, delta) & double_targets).bit_count()
+        return count
+
+    def get_attack_maps(self):
+        """
+        Get the squares attacked by the singles and the doubles of both colors.
 
+        A single attacks its two diagonal capture squares, a double all four jump squares,
+        whatever stands there. The maps are computed once per position and dropped by every
+        make/undo.
+
+        Returns:
+            dict: color -> (squares attacked by singles, squares attacked by doubles)
+        """
+        if self.attack_maps is None:
+            attack_maps = {}
+            for color, singles, doubles in (("Blue", self.BLUE_SINGLES, self.BLUE_DOUBLES),
+                                            ("Red", self.RED_SINGLES, self.RED_DOUBLES)):
+                direction_shifts = DIRECTION_SHIFTS[color]
+                single_attacks = 0
+                for direction in ('kill_left', 'kill_right'):
+                    from_mask, delta = direction_shifts[direction]
+                    single_attacks |= shift_squares(singles & from_mask, delta)
+                double_attacks = 0
+                for direction in ('l_l_f', 'f_f_l', 'f_f_r', 'r_r_f'):
+                    from_mask, delta = direction_shifts[direction]
+                    double_attacks |= shift_squares(doubles & from_mask, delta)
+                attack_maps[color] = (single_attacks, double_attacks)
+            self.attack_maps = attack_maps
+        return self.attack_maps
+
+    def attacked_squares(self, player_color):
+        """
+        Get every square the pieces of one player attack.
+
+        Args:
+            player_color (str): "Blue" or "Red"
+
+        Returns:
+            int: bitboard of the attacked squares
+        """
+        single_attacks, double_attacks = self.get_attack_maps()[player_color]
+        return single_attacks | double_attacks
+
+    def get_all_selected_moves(self, color):
+        return self.get_legal_moves(ALL_CATEGORIES, color)
 
     def get_all_legal_moves(self, player_color):
         # Get a dict of all legal moves
-        all_categories = parse_move_categories("alle", self.move_categories_dict)
-        return self.get_legal_moves(all_categories, player_color)
+        return self.get_legal_moves(ALL_CATEGORIES, player_color)
 
     def get_state(self):
         # Get the current state of the board
-        return self.actual_state
+        return self.capture_state()
 
     def array_board(self):
         # Initialize an empty 8x8 array
@@ -894,7 +1826,9 @@ class Board:
         board_array[7][0] = ' '
         board_array[7][7] = ' '
 
-        for i in range(64):
+        occupied = (self.BLUE_SINGLES | self.BLUE_DOUBLES | self.BLUE_BLOCKED |
+                    self.RED_SINGLES | self.RED_DOUBLES | self.RED_BLOCKED)
+        for i in iter_bits(occupied):
             row = i // 8  # Calculate row index
             col = i % 8  # Calculate column index
 
@@ -984,47 +1918,71 @@ class Board:
 
         return next_move
 
-    def copy_board(self):
-        new_board = Board()
+    def clone(self):
+        """
+        Lightweight copy for search and rollouts: only the bitboards, the side to move and the hash.
+
+        The clone starts with an empty undo stack, so moves made before cloning can not be undone on it.
+
+        Returns:
+            Board: the new board
+        """
+        new_board = Board.__new__(Board)
         new_board.BLUE_SINGLES = self.BLUE_SINGLES
         new_board.BLUE_DOUBLES = self.BLUE_DOUBLES
         new_board.BLUE_BLOCKED = self.BLUE_BLOCKED
         new_board.RED_SINGLES = self.RED_SINGLES
         new_board.RED_DOUBLES = self.RED_DOUBLES
         new_board.RED_BLOCKED = self.RED_BLOCKED
-        new_board.last_state = self.last_state
-        new_board.actual_state = self.actual_state
+        new_board.undo_stack = [None] * UNDO_STACK_SIZE
+        new_board.ply = 0
+        new_board.reversible_plies = 0
+        new_board.attack_maps = None
+        new_board.blue_to_move = self.blue_to_move
+        new_board.board_hash = self.board_hash
+        new_board.mirror_hash = self.mirror_hash
         return new_board
 
-    # zobrsit hashing
-    def initialize_zobrist_table(self, num_coordinates=int(), num_different_piece_types=int()):
-        """we initiate the hash table as an array. Blue player has 3 different piece types: 
-        1: BLUE_SINGLES, 2: BLUE_DOUBLES, 3: BLUE_BLOCKED. Red player has the same.
-        so we have 6 piece types.
-        
-        Args:
-            num_coordinates (int): number of coordinates of the board. We have 64 coodinates
-            num_different_piece_types (int): numver of different pieces on the board.
+    def mirrored(self):
+        """
+        Get a new board with the position mirrored A<->H and the same player to move.
+
         Returns:
-            zobrist_table (array): zobrist table is implemented as a 2 dimensional array. 
-            zobrist_table = [[(rand_bitstring_for_coordinate_1), (rand_bitstring_for_piecetype_1), (rand_bitstring_for_piecetype_2)...], ..., ..., ]
-            
+            Board: the mirrored board, with an empty undo stack
         """
+        new_board = self.clone()
+        new_board.BLUE_SINGLES = mirror_bitboard(self.BLUE_SINGLES)
+        new_board.BLUE_DOUBLES = mirror_bitboard(self.BLUE_DOUBLES)
+        new_board.BLUE_BLOCKED = mirror_bitboard(self.BLUE_BLOCKED)
+        new_board.RED_SINGLES = mirror_bitboard(self.RED_SINGLES)
+        new_board.RED_DOUBLES = mirror_bitboard(self.RED_DOUBLES)
+        new_board.RED_BLOCKED = mirror_bitboard(self.RED_BLOCKED)
+        new_board.board_hash, new_board.mirror_hash = self.mirror_hash, self.board_hash
+        return new_board
 
-        zobrist_table = []  # initiate list
-        # create 2 dimensional list for position and piece type
-        for coordinate in range(num_coordinates):
-            zobrist_table.append([]) # random 64 bitstring for coordinate on board
-            for piece_type in range(num_different_piece_types):
-                zobrist_table[coordinate].append(random.getrandbits(64))  # random 64 bitstring for possible piece type on this coordinate
-        
-        # add on last position of zobrist_table if it's red players turn as a random 64 bitstring
-        max_players_turn = random.getrandbits(64)
-        zobrist_table.append(max_players_turn)
-        
-        return zobrist_table
+    def canonical_key(self):
+        """
+        Get a key that is the same for a position and its A<->H mirror image.
+
+        Returns:
+            tuple: (key, mirrored). key is the smaller of board_hash and mirror_hash, mirrored is
+                True if it is the mirror's hash; moves stored under the key are then mirrored
+                (see mirror_move).
+        """
+        if self.mirror_hash < self.board_hash:
+            return self.mirror_hash, True
+        return self.board_hash, False
+
+    def copy_board(self):
+        # Full copy, including the moves that can still be undone
+        new_board = self.clone()
+        new_board.undo_stack = self.undo_stack.copy()
+        new_board.ply = self.ply
+        new_board.reversible_plies = self.reversible_plies
+        return new_board
 
-    def calculate_zobrist_hash(self, num_coordinates, max_players_turn):
+    # zobrsit hashing
+    def calculate_zobrist_hash(self, num_coordinates, max_players_turn, mirrored=False):
         """Calculate the Zobrist hash for the current board state.
 
         This method calculates the Zobrist hash for the current board state using the given Zobrist table.
@@ -1033,8 +1991,9 @@ class Board:
         Args:
             zobrist_table (list): Zobrist table containing random bitstrings for each coordinate and piece type
             num_coordinates (int):number of coordinates on the board
-            max_players_turn (bool): boolean value indicating whether it is the red player's turn
+            max_players_turn (bool): boolean value indicating whether it is the blue (maximizing) player's turn
             num_of_piece_types (int): number of different piece types on the board
+            mirrored (bool): hash the position mirrored A<->H instead
 
         Returns:
             int: calculated Zobrist hash for the current board state.
@@ -1045,53 +2004,17 @@ class Board:
             self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
             self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED
         ]):
-            for square in range(num_coordinates):
-                if bitboard & (1 << square):  # Check if bit is set (piece present)
-                    zobrist_hash ^= self.zobrist_table[square][i]
+            for square in iter_bits(bitboard & ((1 << num_coordinates) - 1)):
+                zobrist_hash ^= self.zobrist_table[square ^ 7 if mirrored else square][i]
 
         if max_players_turn:
             zobrist_hash ^= self.zobrist_table[-1]
         return zobrist_hash
 
-    def update_zobrist_hash(self, move, old_hash, max_players_turn):
-        """Update the Zobrist hash value after a move.
-
-        Args:
-            move (Move): The move that was made.
-            old_hash (int): The previous Zobrist hash value.
-
-        Returns:
-            int: The updated Zobrist hash value.
-        """
-
-        new_hash = old_hash
-
-        # Get piece type from the "from_square"
-        piece_type = 0 
-        for i, bitboard in enumerate([
-            self.BLUE_SINGLES, self.BLUE_DOUBLES, self.BLUE_BLOCKED,
-            self.RED_SINGLES, self.RED_DOUBLES, self.RED_BLOCKED
-        ]):
-            if bitboard & (1 << move.from_):
-                piece_type = i
-                break
-
-        # XOR out the old piece
-        new_hash ^= self.zobrist_table[move.from_][piece_type]
-
-        # XOR in the new piece
-        new_hash ^= self.zobrist_table[move.to][piece_type]
-
-        # Update turn information
-        if max_players_turn:
-            new_hash ^= self.zobrist_table[-1]
-
-
-        return new_hash
-
-
 
 class Move:
+    __slots__ = ('player', 'from_', 'to')
+
     def __init__(self, player, fromm, to):
         # Initialize the move
         self.player = player
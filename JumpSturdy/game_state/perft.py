@@ -0,0 +1,133 @@
+import sys
+import time
+
+from JumpSturdy.game_state.board import Board, move_to_string
+
+START_FEN = "b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0"
+MID_FEN = "b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01"
+END_FEN = "2b02bb/1bb2b03/5bb2/8/1r03r02/6r01/8/r01r01rrr0"
+
+# reference leaf counts, PERFT_COUNTS[(fen, color)][depth - 1] = perft(depth)
+# a finished game has no moves, so won positions are leaves
+PERFT_COUNTS = {
+    (START_FEN, "Blue"): [34, 1156, 36244, 1136356, 33719896],
+    (START_FEN, "Red"): [34, 1156, 36244, 1136356, 33719896],
+    (MID_FEN, "Blue"): [28, 704, 19720, 498236, 13942988],
+    (MID_FEN, "Red"): [25, 700, 17638, 491398, 12461374],
+    (END_FEN, "Blue"): [15, 284, 4616, 89131, 1538469],
+    (END_FEN, "Red"): [19, 285, 5514, 89632, 1762128],
+}
+
+
+def other_color(color):
+    return "Red" if color == "Blue" else "Blue"
+
+
+def perft(board, color, depth, cache=None):
+    """
+    Count the leaf nodes of the game tree below a position.
+
+    Args:
+        board (Board): the position, it is changed during the count and restored afterwards
+        color (str): "Blue" or "Red", the player to move
+        depth (int): number of plies to count
+        cache (dict): optional cache of (zobrist hash, depth) -> count, shared between calls.
+            The hash includes the side to move, so call board.set_player_to_move(color) first.
+
+    Returns:
+        int: number of positions reached after exactly depth plies
+    """
+    if depth == 0:
+        return 1
+    if board.is_game_over()[0]:
+        return 0
+    if depth == 1:
+        return board.count_moves(color)
+
+    if cache is not None:
+        key = (board.board_hash, depth)
+        nodes = cache.get(key)
+        if nodes is not None:
+            return nodes
+
+    nodes = 0
+    next_color = other_color(color)
+    for move in board.generate_moves(color):
+        board.make_move(move)
+        nodes += perft(board, next_color, depth - 1, cache)
+        board.undo_move()
+
+    if cache is not None:
+        cache[key] = nodes
+    return nodes
+
+
+def divide(board, color, depth, cache=None):
+    """
+    Count the leaf nodes below every root move.
+
+    Args:
+        board (Board): the position
+        color (str): "Blue" or "Red", the player to move
+        depth (int): number of plies to count, at least 1
+        cache (dict): optional cache, see perft
+
+    Returns:
+        dict: "A1-B2" move string -> number of leaf nodes after that move
+    """
+    board.set_player_to_move(color)
+    counts = {}
+    if board.is_game_over()[0]:
+        return counts
+    next_color = other_color(color)
+    for move in board.generate_moves(color):
+        board.make_move(move)
+        counts[move_to_string(move)] = perft(board, next_color, depth - 1, cache)
+        board.undo_move()
+    return counts
+
+
+def run_perft(fen, color, depth, use_cache=False):
+    """
+    Print the divide output of a position and the number of nodes per second.
+
+    Args:
+        fen (str): position in FEN notation
+        color (str): "Blue" or "Red", the player to move
+        depth (int): number of plies to count
+        use_cache (bool): share a zobrist keyed cache between the root moves
+
+    Returns:
+        int: the total number of leaf nodes
+    """
+    board = Board()
+    board.fen_notation_into_bb(fen)
+    cache = {} if use_cache else None
+
+    start = time.time()
+    counts = divide(board, color, depth, cache)
+    elapsed = time.time() - start
+
+    for move, nodes in counts.items():
+        print(f"{move}: {nodes}")
+    total = sum(counts.values())
+    print(f"Nodes: {total}")
+    print(f"Time: {elapsed * 1000:.0f} ms")
+    if elapsed > 0:
+        print(f"Nodes per second: {total / elapsed:.0f}")
+    return total
+
+
+def main():
+    """
+    Usage: python -m JumpSturdy.game_state.perft <depth> [color] [fen] [--cache]
+    """
+    args = [arg for arg in sys.argv[1:] if arg != "--cache"]
+    depth = int(args[0]) if args else 3
+    color = args[1] if len(args) > 1 else "Red"
+    fen = args[2] if len(args) > 2 else START_FEN
+    run_perft(fen, color, depth, "--cache" in sys.argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+
+import numpy as np
+
+from JumpSturdy.game_state.board import Board
+from JumpSturdy.game_state.batch import PIECE_COLUMNS
+
+# Position records
+# Every position is one fixed-width little-endian record of 58 bytes:
+#   bitboards     6 x uint64, in the order of PIECE_COLUMNS
+#   blue_to_move  uint8, 1 if Blue moves next
+#   result        int8, RESULT_BLUE_WINS, RESULT_RED_WINS or RESULT_UNKNOWN
+#   score         float32, evaluation of the position, NO_SCORE if there is none
+#   best_move     int32, packed move (see encode_move) played or found, NO_MOVE if there is none
+# A record file is nothing but records back to back, so files can be appended to and concatenated,
+# and read_records maps them straight into a NumPy array without parsing.
+RECORD_DTYPE = np.dtype([
+    ('bitboards', '<u8', (len(PIECE_COLUMNS),)),
+    ('blue_to_move', 'u1'),
+    ('result', 'i1'),
+    ('score', '<f4'),
+    ('best_move', '<i4'),
+])
+
+RESULT_BLUE_WINS = 1
+RESULT_RED_WINS = -1
+RESULT_UNKNOWN = 0
+NO_SCORE = float('nan')
+NO_MOVE = -1
+
+
+def game_result(winner):
+    """Turn the winner returned by Board.is_game_over into a record result."""
+    if winner == "Blue":
+        return RESULT_BLUE_WINS
+    if winner == "Red":
+        return RESULT_RED_WINS
+    return RESULT_UNKNOWN
+
+
+def position_record(board, result=RESULT_UNKNOWN, score=NO_SCORE, best_move=NO_MOVE):
+    """
+    Build the record of a board position.
+
+    Args:
+        board (Board): the position
+        result (int): outcome of the game the position comes from
+        score (float): evaluation of the position
+        best_move (int): packed move played or found in the position
+
+    Returns:
+        tuple: one record, as accepted by np.array(..., dtype=RECORD_DTYPE)
+    """
+    bitboards = tuple(getattr(board, column) for column in PIECE_COLUMNS)
+    return bitboards, board.blue_to_move, result, score, best_move
+
+
+class RecordWriter:
+    """
+    Stream position records to a file.
+
+    Records are buffered and written in blocks, use the writer as a context manager or call
+    close() so the last block reaches the file.
+    """
+
+    def __init__(self, path, append=True, buffer_size=4096):
+        """
+        Args:
+            path (str): the record file
+            append (bool): add to an existing file instead of replacing it
+            buffer_size (int): number of records written at once
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.count = 0
+        self.file = open(path, 'ab' if append else 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, board, result=RESULT_UNKNOWN, score=NO_SCORE, best_move=NO_MOVE):
+        """Add the position of a board, see position_record."""
+        self.write_record(position_record(board, result, score, best_move))
+
+    def write_record(self, record):
+        """Add a record built by position_record."""
+        self.buffer.append(record)
+        self.count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_game(self, records, winner):
+        """
+        Add the positions of a finished game, now that its result is known.
+
+        Args:
+            records (list): records built by position_record during the game
+            winner (str): "Blue", "Red" or None, as returned by Board.is_game_over
+        """
+        result = game_result(winner)
+        for bitboards, blue_to_move, _, score, best_move in records:
+            self.write_record((bitboards, blue_to_move, result, score, best_move))
+
+    def flush(self):
+        """Write the buffered records to the file."""
+        if self.buffer:
+            self.file.write(np.array(self.buffer, dtype=RECORD_DTYPE).tobytes())
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+def read_records(path):
+    """
+    Memory-map a record file.
+
+    Args:
+        path (str): the record file
+
+    Returns:
+        np.ndarray: read-only structured array of RECORD_DTYPE, the records are only read from
+            disk when they are accessed
+    """
+    if os.path.getsize(path) == 0:
+        # np.memmap cannot map an empty file
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r')
+
+
+def records_to_positions(records):
+    """Get the (N, 6) uint64 positions of the records, as used by the batch module."""
+    return records['bitboards']
+
+
+def board_from_record(record):
+    """
+    Set up a board from a record.
+
+    Args:
+        record (np.void): one element of an array of RECORD_DTYPE
+
+    Returns:
+        Board: the position of the record, with the side to move set
+    """
+    board = Board()
+    for column, bitboard in zip(PIECE_COLUMNS, record['bitboards']):
+        setattr(board, column, int(bitboard))
+    board.blue_to_move = bool(record['blue_to_move'])
+    board.board_hash = board.calculate_zobrist_hash(64, board.blue_to_move)
+    board.mirror_hash = board.calculate_zobrist_hash(64, board.blue_to_move, mirrored=True)
+    return board
@@ -2,7 +2,8 @@ import unittest
 import time
 import random
 
-from ai.player import AIPlayer
+from ai.player import AIPlayer, piece_under_attack, simulate_game
+from ai.evolved_player import EvolvedAIPlayer
 from game_state. board import Board
 
 def create_random_fen():
@@ -268,6 +269,51 @@ class TestAI(unittest.TestCase):
         best_move = red_player.get_best_move(1,False,False, zobrist_table)
         best_move_blue = blue_player.get_best_move(1,False,False, zobrist_table)
 
+    def test_bewertungsfunktion_same_for_both_colors(self):
+        # get_score is always from Blue's point of view, whoever evaluates the board
+        random.seed(3)
+        for i in range(50):
+            board = Board()
+            board.fen_notation_into_bb(create_random_fen())
+            blue_player = AIPlayer("Blue", board, 1, 1)
+            red_player = AIPlayer("Red", board, 1, 1)
+            self.assertEqual(blue_player.get_score(board), red_player.get_score(board))
+            evolved_blue = EvolvedAIPlayer("Blue", board, 1, 1, blue_player.weights)
+            evolved_red = EvolvedAIPlayer("Red", board, 1, 1, blue_player.weights)
+            self.assertEqual(evolved_blue.get_score(board), evolved_red.get_score(board))
+
+    def test_piece_under_attack(self):
+        # attacks are counted, a blue single between two red singles is attacked twice
+        self.assertEqual(piece_under_attack(1 << 35, 1 << 26 | 1 << 28, 0), 2)
+        # a red double attacks with all four jumps
+        self.assertEqual(piece_under_attack(1 << 35, 0, 1 << 29 | 1 << 25 | 1 << 20 | 1 << 18), 4)
+        self.assertEqual(piece_under_attack(1 << 35 | 1 << 37, 1 << 28, 0), 2)
+        # no attack wraps around the edge of the board
+        self.assertEqual(piece_under_attack(1 << 40, 1 << 31, 0), 0)
+        self.assertEqual(piece_under_attack(1 << 38, 0, 1 << 32), 0)
+        # every counted attack is on a square red attacks
+        random.seed(4)
+        for i in range(200):
+            board = Board()
+            board.fen_notation_into_bb(create_random_fen())
+            attacked = board.BLUE_SINGLES & board.attacked_squares("Red")
+            self.assertGreaterEqual(piece_under_attack(board.BLUE_SINGLES, board.RED_SINGLES, board.RED_DOUBLES),
+                                    attacked.bit_count())
+
+    def test_simulate_game(self):
+        # a random training game is played to its end
+        random.seed(6)
+        board = Board()
+        board.initialize()
+        blue_player = AIPlayer("Blue", board, 1, 1)
+        red_player = AIPlayer("Red", board, 1, 1)
+        history, reward = simulate_game(board, blue_player, red_player)
+        self.assertIn(reward, (0, 100))
+        self.assertGreater(len(history), 0)
+        # the game ends on the goal rank, without pieces or with a player who can not move
+        self.assertTrue(board.is_game_over()[0] or not board.generate_moves("Blue") or
+                        not board.generate_moves("Red"))
+
     def test_bewertungsfunktion_in_depth_0(self):
         board = Board()
         fen = create_random_fen()
@@ -0,0 +1,58 @@
+import unittest
+import random
+import numpy as np
+from JumpSturdy.game_state import batch
+from game_state.board import Board
+from tests.test_ai import create_random_fen
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(4)
+        self.fens = [create_random_fen() for i in range(200)]
+        self.positions = batch.positions_from_fens(self.fens)
+
+    def test_popcount(self):
+        values = np.array([0, 1, 0xFFFFFFFFFFFFFFFF, 0x8000000000000001], dtype=np.uint64)
+        self.assertEqual(batch.popcount(values).tolist(), [0, 1, 64, 2])
+
+    def test_count_moves(self):
+        for color in ["Blue", "Red"]:
+            counts = batch.count_moves(self.positions, color)
+            for fen, count in zip(self.fens, counts):
+                board = Board()
+                board.fen_notation_into_bb(fen)
+                self.assertEqual(count, len(board.generate_moves(color)))
+
+    def test_target_masks(self):
+        masks = batch.target_masks(self.positions, "Blue")
+        for fen, mask in zip(self.fens, masks):
+            board = Board()
+            board.fen_notation_into_bb(fen)
+            targets = 0
+            for move in board.generate_moves("Blue"):
+                targets |= 1 << (move >> 6 & 63)
+            self.assertEqual(int(mask), targets)
+
+    def test_attack_masks(self):
+        masks = batch.attack_masks(self.positions, "Red")
+        for fen, mask in zip(self.fens, masks):
+            board = Board()
+            board.fen_notation_into_bb(fen)
+            self.assertEqual(int(mask), board.attacked_squares("Red"))
+
+    def test_features(self):
+        features = batch.features(self.positions)
+        self.assertEqual(features.shape, (len(self.fens), len(batch.FEATURE_NAMES)))
+        blue_singles = batch.FEATURE_NAMES.index('blue_singles')
+        red_mobility = batch.FEATURE_NAMES.index('red_mobility')
+        for fen, row in zip(self.fens, features):
+            board = Board()
+            board.fen_notation_into_bb(fen)
+            self.assertEqual(row[blue_singles], board.BLUE_SINGLES.bit_count())
+            self.assertEqual(row[red_mobility], board.count_moves("Red"))
+
+
+if __name__ == '__main__':
+    unittest.main()
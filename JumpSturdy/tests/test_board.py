@@ -3,6 +3,8 @@ import time
 from game_state.board import Board
 from game_state.board import Move
 from game_state.board import Coordinate
+from game_state.board import add_nth_bit, square_of, encode_move, move_to_string, mirror_bitboard, mirror_move
+from game_state.board import CATEGORY_BITS, ALL_CATEGORIES, SINGLES_CATEGORIES, CAPTURE_CATEGORIES, parse_move_categories
 
 
 def swap_b_r(fen):
@@ -295,6 +297,238 @@ class TestBoard(unittest.TestCase):
         print(sorted(board.get_legal_moves_list(selected_legal_moves)))
         self.assertEqual(sorted(board.get_legal_moves_list(selected_legal_moves)),   sorted(output.split(',')))
 
+    def test_generate_moves(self):
+        # packed moves have to match the legal move strings of both colors
+        board = Board()
+        board.fen_notation_into_bb("b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01")
+        for color in ["Blue", "Red"]:
+            moves = [move_to_string(move) for move in board.generate_moves(color)]
+            self.assertEqual(moves, board.get_legal_moves_list(board.get_all_legal_moves(color)))
+
+    def test_generate_staged_moves(self):
+        # winning moves first, then captures, then the quiet moves
+        board = Board()
+        board.fen_notation_into_bb("6/8/8/8/2b05/3r04/1b06/6")
+        moves = [move_to_string(move) for move in board.generate_staged_moves("Blue")]
+        self.assertEqual(moves, ["B7-B8", "C5-D6", "C5-B5", "C5-D5", "C5-C6", "B7-A7", "B7-C7"])
+        # same moves as generate_moves, only in another order
+        board.fen_notation_into_bb("b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01")
+        for color in ["Blue", "Red"]:
+            self.assertEqual(sorted(board.generate_staged_moves(color)), sorted(board.generate_moves(color)))
+
+    def test_generate_captures(self):
+        board = Board()
+        for fen in ["b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01",
+                    "b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0",
+                    "6/8/5bb2/2b05/1rr1r02r01/8/8/6"]:
+            board.fen_notation_into_bb(fen)
+            for color in ["Blue", "Red"]:
+                captures = [move for move in board.generate_moves(color) if move >> 12 & 1]
+                self.assertEqual(sorted(board.generate_captures(color)), sorted(captures))
+
+    def test_is_move_legal(self):
+        # exactly the moves of generate_moves are legal, also among the moves of other positions
+        fens = ["b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01",
+                "b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0",
+                "6/8/8/8/2b05/3r04/1b06/6"]
+        boards = []
+        for fen in fens:
+            board = Board()
+            board.fen_notation_into_bb(fen)
+            boards.append(board)
+        candidates = {move for board in boards for color in ["Blue", "Red"] for move in board.generate_moves(color)}
+        for board in boards:
+            for color in ["Blue", "Red"]:
+                legal = set(board.generate_moves(color))
+                for move in candidates:
+                    self.assertEqual(board.is_move_legal(move, color), move in legal, move_to_string(move))
+
+    def test_to_fen(self):
+        for fen in ["b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0",
+                    "b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01",
+                    "2b02bb/1bb2b03/5bb2/8/1r03r02/6r01/8/r01r01rrr0"]:
+            board = Board()
+            board.fen_notation_into_bb(fen)
+            self.assertEqual(board.to_fen(), fen)
+        # a new notation replaces the old position
+        board.fen_notation_into_bb("6/8/8/3rb4/2b05/3r04/8/6")
+        self.assertEqual(board.to_fen(), "6/8/8/3rb4/2b05/3r04/8/6")
+        self.assertEqual(board.board_hash, board.calculate_zobrist_hash(64, board.blue_to_move))
+
+    def test_attack_maps(self):
+        board = Board()
+        board.fen_notation_into_bb("6/8/8/3rb4/2b05/3r04/8/6")
+        # the red single on D6 attacks C5 and E5, the blue double on D4 its four jump squares
+        self.assertEqual(board.get_attack_maps()["Red"][0],
+                         add_nth_bit(add_nth_bit(0, square_of(Coordinate.C5)), square_of(Coordinate.E5)))
+        self.assertEqual(board.get_attack_maps()["Blue"][1],
+                         add_nth_bit(add_nth_bit(add_nth_bit(add_nth_bit(0, square_of(Coordinate.B5)), square_of(Coordinate.C6)),
+                                                 square_of(Coordinate.E6)), square_of(Coordinate.F5)))
+        # the maps are dropped when the position changes
+        attacked = board.attacked_squares("Blue")
+        board.make_move(encode_move(64 - Coordinate.D4.value, 64 - Coordinate.C6.value, 4))
+        self.assertNotEqual(board.attacked_squares("Blue"), attacked)
+        board.undo_move()
+        self.assertEqual(board.attacked_squares("Blue"), attacked)
+
+    def test_mirror(self):
+        self.assertEqual(mirror_bitboard(add_nth_bit(0, square_of(Coordinate.B1))), add_nth_bit(0, square_of(Coordinate.G1)))
+        self.assertEqual(move_to_string(mirror_move(encode_move(64 - Coordinate.C5.value, 64 - Coordinate.D6.value))),
+                         "F5-E6")
+        board = Board()
+        board.fen_notation_into_bb("b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01")
+        mirrored = board.mirrored()
+        for color in ["Blue", "Red"]:
+            self.assertEqual(sorted(mirrored.generate_moves(color)),
+                             sorted(mirror_move(move) for move in board.generate_moves(color)))
+        self.assertEqual(mirrored.mirrored().get_state(), board.get_state())
+
+    def test_count_moves(self):
+        board = Board()
+        board.fen_notation_into_bb("b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01")
+        for color in ["Blue", "Red"]:
+            legal_moves = board.get_all_legal_moves(color)
+            counts = board.count_category_moves(color)
+            self.assertEqual(counts, {category: len(moves) for category, moves in legal_moves.items()})
+            self.assertEqual(board.count_moves(color), len(board.generate_moves(color)))
+
+    def test_category_flags(self):
+        board = Board()
+        board.fen_notation_into_bb("b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01")
+        categories = ['singles_kill_left_singles', 'doubles_f_f_r_empty', 'singles_upgrade_front']
+        flags = CATEGORY_BITS['singles_kill_left_singles'] | CATEGORY_BITS['doubles_f_f_r_empty'] | \
+            CATEGORY_BITS['singles_upgrade_front']
+        for color in ["Blue", "Red"]:
+            # only the selected categories are returned, names and flags select the same moves
+            self.assertEqual(board.get_legal_moves(flags, color), board.get_legal_moves(categories, color))
+            self.assertEqual(sorted(board.get_legal_moves(flags, color)), sorted(categories))
+            self.assertEqual(list(board.get_legal_moves(ALL_CATEGORIES, color)), list(CATEGORY_BITS))
+            captures = board.get_legal_moves(CAPTURE_CATEGORIES, color)
+            self.assertTrue(all('kill' in category for category in captures))
+        self.assertEqual(parse_move_categories("alle", Board.move_categories_dict), ALL_CATEGORIES)
+        self.assertEqual(parse_move_categories("1", Board.move_categories_dict), SINGLES_CATEGORIES)
+        self.assertEqual(parse_move_categories("11,12", Board.move_categories_dict),
+                         CATEGORY_BITS['singles_left_empty'] | CATEGORY_BITS['singles_front_empty'] |
+                         CATEGORY_BITS['singles_right_empty'] | CATEGORY_BITS['singles_kill_left_singles'] |
+                         CATEGORY_BITS['singles_kill_left_doubles'] | CATEGORY_BITS['singles_kill_right_singles'] |
+                         CATEGORY_BITS['singles_kill_right_doubles'])
+
+    def test_race_result(self):
+        board = Board()
+        # blue single on D7 wins with the next move, the red single on D3 needs two
+        board.fen_notation_into_bb("6/8/3r04/8/8/8/3b04/6")
+        self.assertTrue(board.can_reach_goal("Blue"))
+        self.assertFalse(board.can_reach_goal("Red"))
+        winner, move = board.race_result("Blue")
+        self.assertEqual((winner, move_to_string(move)), ("Blue", "D7-D8"))
+        self.assertEqual(board.race_result("Red"), (None, None))
+
+        # nothing can stop the blue single on D6 and red is two moves away at best
+        board.fen_notation_into_bb("6/8/8/8/6r01/3b04/8/6")
+        self.assertFalse(board.can_reach_goal("Blue"))
+        self.assertEqual(board.runner("Blue")[0], 2)
+        winner, move = board.race_result("Blue")
+        self.assertEqual((winner, move_to_string(move)), ("Blue", "D6-D7"))
+        # a red single on F8 could still get in the way
+        board.fen_notation_into_bb("6/8/8/8/6r01/3b04/8/4r01")
+        self.assertEqual(board.runner("Blue"), (None, None))
+        self.assertEqual(board.race_result("Blue"), (None, None))
+
+        # doubles jump onto the goal rank
+        board.fen_notation_into_bb("6/1r06/8/8/8/4bb3/8/6")
+        winner, move = board.race_result("Blue")
+        self.assertEqual(winner, "Blue")
+        self.assertIn(move_to_string(move), ["E6-D8", "E6-F8"])
+        self.assertEqual(board.race_result("Red")[0], "Red")
+
+    def test_apply_packed_move(self):
+        board = Board()
+        board.fen_notation_into_bb("6/8/8/3rb4/2b05/3r04/8/6")
+        # blue double on D4 jumps to C6 and leaves the red piece below as a single
+        self.assertEqual(board.apply_move(encode_move(64 - Coordinate.D4.value, 64 - Coordinate.C6.value)), "Move")
+        self.assertEqual(board.RED_SINGLES, add_nth_bit(add_nth_bit(0, square_of(Coordinate.D4)), square_of(Coordinate.D6)))
+        self.assertEqual(board.BLUE_SINGLES, add_nth_bit(add_nth_bit(0, square_of(Coordinate.C5)), square_of(Coordinate.C6)))
+        self.assertEqual(board.BLUE_DOUBLES | board.RED_BLOCKED, 0)
+        self.assertEqual(board.undo_move(), "Good: Move undone")
+        # blue single on C5 takes the red single on D6
+        self.assertEqual(board.apply_move(encode_move(64 - Coordinate.C5.value, 64 - Coordinate.D6.value)), "Killing move")
+        self.assertEqual(board.RED_SINGLES, 0)
+        # a double can not move like a single
+        self.assertTrue(board.apply_move(encode_move(64 - Coordinate.D4.value, 64 - Coordinate.D5.value)).startswith("Error"))
+
+    def test_make_move(self):
+        # the unchecked path has to end up in the same position as the validating one
+        checked = Board()
+        checked.initialize()
+        unchecked = checked.copy_board()
+        color = "Red"
+        for i in range(60):
+            moves = checked.generate_moves(color)
+            if checked.is_game_over()[0] or not moves:
+                break
+            move = moves[(5 * i) % len(moves)]
+            checked.apply_move(move)
+            unchecked.make_move(move)
+            self.assertEqual(unchecked.get_state(), checked.get_state())
+            self.assertEqual(unchecked.board_hash, checked.board_hash)
+            color = "Blue" if color == "Red" else "Red"
+
+    def test_repetition_count(self):
+        board = Board()
+        board.fen_notation_into_bb("6/8/8/3rb4/2b05/3r04/8/6")
+        start_hash = board.board_hash
+        # both sides step sideways and back twice
+        moves = [(Coordinate.C5, Coordinate.B5), (Coordinate.D6, Coordinate.E6),
+                 (Coordinate.B5, Coordinate.C5), (Coordinate.E6, Coordinate.D6)]
+        for i in range(2):
+            for fromm, to in moves:
+                board.make_move(encode_move(64 - fromm.value, 64 - to.value))
+        self.assertEqual(board.board_hash, start_hash)
+        self.assertEqual(board.repetition_count(), 3)
+        # a forward move can not be taken back, so nothing before it counts
+        board.make_move(encode_move(64 - Coordinate.C5.value, 64 - Coordinate.C6.value))
+        self.assertEqual(board.reversible_plies, 0)
+        self.assertEqual(board.repetition_count(), 1)
+        board.undo_move()
+        self.assertEqual(board.repetition_count(), 3)
+
+    def test_make_null_move(self):
+        board = Board()
+        board.fen_notation_into_bb("6/8/8/3rb4/2b05/3r04/8/6")
+        board.make_move(encode_move(64 - Coordinate.C5.value, 64 - Coordinate.B5.value))
+        state, start_hash, blue_to_move = board.get_state(), board.board_hash, board.blue_to_move
+        board.make_null_move()
+        # only the player to move changes
+        self.assertEqual(board.get_state(), state)
+        self.assertNotEqual(board.board_hash, start_hash)
+        self.assertEqual(board.blue_to_move, not blue_to_move)
+        self.assertEqual(board.ply, 2)
+        self.assertEqual(board.reversible_plies, 0)
+        board.undo_move()
+        self.assertEqual(board.get_state(), state)
+        self.assertEqual(board.board_hash, start_hash)
+        self.assertEqual(board.blue_to_move, blue_to_move)
+        self.assertEqual(board.reversible_plies, 1)
+
+    def test_undo_move_stack(self):
+        # undo a whole random game move by move
+        board = Board()
+        board.initialize()
+        states = [board.get_state()]
+        color = "Red"
+        for i in range(60):
+            moves = board.generate_moves(color)
+            if board.is_game_over()[0] or not moves:
+                break
+            self.assertFalse(board.apply_move(moves[(7 * i) % len(moves)]).startswith("Error"))
+            states.append(board.get_state())
+            color = "Blue" if color == "Red" else "Red"
+        while len(states) > 1:
+            states.pop()
+            self.assertEqual(board.undo_move(), "Good: Move undone")
+            self.assertEqual(board.get_state(), states[-1])
+        self.assertEqual(board.undo_move(), "Error: No move to undo")
+
     def wiki_help_function(self, fen, output):
         board = Board()
         splited_fen = fen.split()
@@ -0,0 +1,39 @@
+import unittest
+from JumpSturdy.ai.mcts_player import MCTS, Player
+from game_state.board import Board
+
+
+class TestMCTS(unittest.TestCase):
+
+    def test_simulate_blocked(self):
+        # red can not move and loses the playout, it is not a draw
+        board = Board()
+        board.fen_notation_into_bb("6/r0rb5bb/4rb1bb1/3rb1b02/8/8/8/6")
+        board.set_player_to_move("Red")
+        self.assertFalse(board.is_game_over()[0])
+        self.assertEqual(board.generate_moves("Red"), [])
+        # the playout starts with the player to move on the board, whoever searches
+        for color in ("Red", "Blue"):
+            mcts = MCTS(Player(color, board, 1, 1))
+            mcts.tablebase = None
+            self.assertEqual(mcts.simulate(board.clone()), "Blue")
+
+    def test_tree_alternates(self):
+        board = Board()
+        board.initialize()
+        board.set_player_to_move("Red")
+        mcts = MCTS(Player("Red", board, 1, 1))
+        mcts.tablebase = None
+        mcts.search(0.2)
+        self.assertEqual(sorted(mcts.root.children), sorted(board.generate_moves("Red")))
+        # below a red move blue moves, and the root children count red's wins
+        child = max(mcts.root.children.values(), key=lambda node: node.visits)
+        self.assertGreater(len(child.children), 0)
+        after = board.clone()
+        after.make_move(child.move)
+        self.assertEqual(sorted(child.children), sorted(after.generate_moves("Blue")))
+        self.assertEqual(sum(node.visits for node in mcts.root.children.values()), mcts.root.visits)
+
+
+if __name__ == '__main__':
+    unittest.main()
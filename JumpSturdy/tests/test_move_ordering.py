@@ -0,0 +1,77 @@
+import unittest
+from JumpSturdy.ai import move_ordering
+from JumpSturdy.ai.move_ordering import MoveOrdering
+from game_state.board import Board, move_to_string
+
+
+class TestMoveOrdering(unittest.TestCase):
+
+    def setUp(self):
+        self.board = Board()
+        # blue: a single that can take a red double or a red single, a double that can take a red single
+        self.board.fen_notation_into_bb("6/8/5bb2/2b05/1rr1r02r01/8/8/6")
+        self.ordering = MoveOrdering()
+
+    def ordered(self, first_move=None):
+        return list(self.ordering.ordered_moves(self.board, "Blue", first_move))
+
+    def test_same_moves(self):
+        moves = self.ordered()
+        self.assertEqual(sorted(moves), sorted(self.board.generate_moves("Blue")))
+
+    def test_captures_first(self):
+        moves = self.ordered()
+        captures = [move for move in moves if move & move_ordering.CAPTURE_FLAG]
+        self.assertEqual(moves[:len(captures)], captures)
+        # a double is the more valuable victim, a single the less valuable attacker
+        victims = [2 if self.board.RED_DOUBLES >> (move >> 6 & 63) & 1 else 1 for move in captures]
+        self.assertEqual(victims, sorted(victims, reverse=True))
+        self.assertEqual([move_to_string(move) for move in captures], ["C4-B5", "C4-D5", "F3-G5"])
+
+    def test_first_move(self):
+        quiet = self.ordered()[-1]
+        moves = self.ordered(quiet)
+        self.assertEqual(moves[0], quiet)
+        self.assertEqual(moves.count(quiet), 1)
+        # a move of another position is skipped
+        other = Board()
+        other.initialize()
+        illegal = next(move for move in other.generate_moves("Red") if not self.board.is_move_legal(move, "Blue"))
+        self.assertNotIn(illegal, self.ordered(illegal))
+
+    def test_killers(self):
+        moves = self.ordered()
+        quiet = [move for move in moves if not move & move_ordering.CAPTURE_FLAG]
+        captures = len(moves) - len(quiet)
+        self.ordering.record_cutoff(quiet[-1], "Blue", self.board.ply, 1)
+        self.ordering.record_cutoff(quiet[-2], "Blue", self.board.ply, 1)
+        moves = self.ordered()
+        self.assertEqual(moves[captures:captures + 2], [quiet[-2], quiet[-1]])
+        # captures never become killers
+        self.ordering.record_cutoff(moves[0], "Blue", self.board.ply, 1)
+        self.assertEqual(self.ordering.ply_killers(self.board.ply), [quiet[-2], quiet[-1]])
+        # killers belong to their ply
+        self.assertEqual(self.ordering.ply_killers(self.board.ply + 1), [None, None])
+
+    def test_history(self):
+        quiet = [move for move in self.ordered() if not move & move_ordering.CAPTURE_FLAG]
+        ordering = MoveOrdering()
+        # cutoffs in another ply only leave their history score
+        ordering.record_cutoff(quiet[-1], "Blue", self.board.ply + 2, 3)
+        self.assertEqual(ordering.history["Blue"][quiet[-1] & 4095], 9)
+        self.assertEqual(ordering.history["Red"][quiet[-1] & 4095], 0)
+        self.ordering = ordering
+        moves = self.ordered()
+        self.assertEqual(moves[len(moves) - len(quiet)], quiet[-1])
+
+    def test_history_limit(self):
+        quiet = [move for move in self.ordered() if not move & move_ordering.CAPTURE_FLAG]
+        self.ordering.history["Blue"][quiet[0] & 4095] = move_ordering.HISTORY_LIMIT - 1
+        self.ordering.history["Red"][5] = 100
+        self.ordering.record_cutoff(quiet[0], "Blue", self.board.ply, 1)
+        self.assertEqual(self.ordering.history["Blue"][quiet[0] & 4095], move_ordering.HISTORY_LIMIT // 2)
+        self.assertEqual(self.ordering.history["Red"][5], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from JumpSturdy.game_state.perft import PERFT_COUNTS, END_FEN, perft, divide
+from game_state.board import Board
+
+
+class TestPerft(unittest.TestCase):
+
+    def test_reference_counts(self):
+        # the first three plies of every reference position
+        for (fen, color), counts in PERFT_COUNTS.items():
+            board = Board()
+            board.fen_notation_into_bb(fen)
+            board.set_player_to_move(color)
+            state = board.get_state()
+            for depth, count in enumerate(counts[:3], start=1):
+                self.assertEqual(perft(board, color, depth), count)
+            self.assertEqual(board.get_state(), state)
+
+    def test_cache(self):
+        board = Board()
+        board.fen_notation_into_bb(END_FEN)
+        board.set_player_to_move("Red")
+        cache = {}
+        self.assertEqual(perft(board, "Red", 4, cache), PERFT_COUNTS[(END_FEN, "Red")][3])
+        self.assertEqual(perft(board, "Red", 4, cache), PERFT_COUNTS[(END_FEN, "Red")][3])
+
+    def test_divide(self):
+        board = Board()
+        board.fen_notation_into_bb(END_FEN)
+        counts = divide(board, "Blue", 3)
+        self.assertEqual(len(counts), PERFT_COUNTS[(END_FEN, "Blue")][0])
+        self.assertEqual(sum(counts.values()), PERFT_COUNTS[(END_FEN, "Blue")][2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from JumpSturdy.ai.evolved_player import EvolvedAIPlayer, simulate_game
+from JumpSturdy.ai.player import AIPlayer
+from JumpSturdy.game_state import batch, records
+from game_state.board import Board
+from tests.test_ai import create_random_fen
+
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(5)
+        self.fens = [create_random_fen() for i in range(100)]
+        handle, self.path = tempfile.mkstemp(suffix='.rec')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def boards(self):
+        boards = []
+        for i, fen in enumerate(self.fens):
+            board = Board()
+            board.fen_notation_into_bb(fen)
+            board.set_player_to_move("Blue" if i % 2 else "Red")
+            boards.append(board)
+        return boards
+
+    def test_record_size(self):
+        self.assertEqual(records.RECORD_DTYPE.itemsize, 58)
+
+    def test_write_and_read(self):
+        boards = self.boards()
+        # a small buffer so the records reach the file in several blocks
+        with records.RecordWriter(self.path, append=False, buffer_size=7) as writer:
+            for i, board in enumerate(boards):
+                writer.write(board, records.RESULT_BLUE_WINS, score=i / 2, best_move=i)
+        self.assertEqual(os.path.getsize(self.path), len(boards) * records.RECORD_DTYPE.itemsize)
+
+        data = records.read_records(self.path)
+        self.assertEqual(len(data), len(boards))
+        np.testing.assert_array_equal(records.records_to_positions(data), batch.positions_from_boards(boards))
+        for i, (board, record) in enumerate(zip(boards, data)):
+            self.assertEqual(bool(record['blue_to_move']), board.blue_to_move)
+            self.assertEqual(record['result'], records.RESULT_BLUE_WINS)
+            self.assertEqual(record['score'], i / 2)
+            self.assertEqual(record['best_move'], i)
+            restored = records.board_from_record(record)
+            self.assertEqual(restored.to_fen(), board.to_fen())
+            self.assertEqual(restored.board_hash, board.board_hash)
+
+    def test_write_game(self):
+        boards = self.boards()
+        with records.RecordWriter(self.path, append=False) as writer:
+            writer.write_game([records.position_record(board) for board in boards[:10]], "Red")
+        with records.RecordWriter(self.path) as writer:
+            writer.write_game([records.position_record(board) for board in boards[10:]], None)
+
+        data = records.read_records(self.path)
+        self.assertEqual(data['result'][:10].tolist(), [records.RESULT_RED_WINS] * 10)
+        self.assertEqual(data['result'][10:].tolist(), [records.RESULT_UNKNOWN] * (len(boards) - 10))
+        self.assertTrue(np.isnan(data['score']).all())
+        self.assertTrue((data['best_move'] == records.NO_MOVE).all())
+
+    def test_simulated_game(self):
+        # a training game streams all of its positions once the winner is known
+        board = Board()
+        board.initialize()
+        weights = AIPlayer("Blue", board, 1, 1).weights
+        blue_player = EvolvedAIPlayer("Blue", board, 1, 1, dict(weights))
+        red_player = EvolvedAIPlayer("Red", board, 1, 1, dict(weights))
+        with records.RecordWriter(self.path, append=False) as writer:
+            history, reward = simulate_game(board, blue_player, red_player, writer)
+
+        data = records.read_records(self.path)
+        self.assertGreater(len(data), 0)
+        result = records.RESULT_BLUE_WINS if reward == 100 else records.RESULT_RED_WINS
+        self.assertEqual(data['result'].tolist(), [result] * len(data))
+        self.assertFalse(np.isnan(data['score']).any())
+        # the move of every record leads to the position of the next one
+        for record, next_record in zip(data, data[1:]):
+            self.assertNotEqual(bool(record['blue_to_move']), bool(next_record['blue_to_move']))
+            restored = records.board_from_record(record)
+            restored.make_move(int(record['best_move']))
+            self.assertEqual(restored.get_state(), records.board_from_record(next_record).get_state())
+
+    def test_read_empty(self):
+        self.assertEqual(len(records.read_records(self.path)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import random
+import time
+import unittest
+from JumpSturdy.ai.player import AIPlayer
+from JumpSturdy.ai.search import Search, SearchParameters
+from game_state.board import Board, move_to_string
+from tests.test_ai import create_random_fen
+
+
+class TestSearch(unittest.TestCase):
+
+    def player(self, board, color):
+        player = AIPlayer(color, board, 1, 1)
+        player.tablebase = None
+        return player
+
+    # null-move pruning and late move reductions may change the value, the exact search can not
+    EXACT = SearchParameters(null_move=False, late_move_reductions=False)
+
+    def search(self, board, color, depth, cutoff, parameters=EXACT):
+        search = Search(self.player(board, color), time.time(), float('inf'), cutoff=cutoff, parameters=parameters)
+        value, move = search.search(board, depth, float('-inf'), float('inf'), color)
+        return value, move, search.nodes
+
+    def test_pvs_matches_minimax(self):
+        random.seed(11)
+        for _ in range(25):
+            board = Board()
+            board.fen_notation_into_bb(create_random_fen())
+            color = random.choice(("Blue", "Red"))
+            board.set_player_to_move(color)
+            if board.is_game_over()[0]:
+                continue
+            fen = board.to_fen()
+            for depth in (1, 2, 3):
+                value, move, nodes = self.search(board, color, depth, cutoff=True)
+                expected, _, all_nodes = self.search(board, color, depth, cutoff=False)
+                self.assertEqual(value, expected, f"{fen} {color} depth {depth}")
+                self.assertLessEqual(nodes, all_nodes)
+                self.assertIn(move, board.generate_moves(color))
+                # the board is restored
+                self.assertEqual(board.to_fen(), fen)
+
+    def test_iterative_deepening(self):
+        # aspiration windows and the moves of earlier iterations must not change the result
+        random.seed(7)
+        for _ in range(15):
+            board = Board()
+            board.fen_notation_into_bb(create_random_fen())
+            color = random.choice(("Blue", "Red"))
+            board.set_player_to_move(color)
+            if board.is_game_over()[0]:
+                continue
+            fen = board.to_fen()
+            search = Search(self.player(board, color), time.time(), float('inf'), parameters=self.EXACT)
+            value, move, depth = search.iterative_deepening(board, 3, color)
+            self.assertEqual(board.to_fen(), fen)
+            expected = self.search(board, color, depth, cutoff=False)[0]
+            self.assertEqual(value if color == "Blue" else -value, expected, fen)
+            self.assertIn(move, board.generate_moves(color))
+
+    def test_iterative_deepening_out_of_time(self):
+        # even without a finished iteration there is a legal move to play
+        board = Board()
+        board.fen_notation_into_bb("b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0")
+        board.set_player_to_move("Red")
+        fen = board.to_fen()
+        search = Search(self.player(board, "Red"), time.time(), 0)
+        value, move, depth = search.iterative_deepening(board, 3, "Red")
+        self.assertEqual((value, depth), (None, 0))
+        self.assertIn(move, board.generate_moves("Red"))
+        self.assertEqual(board.to_fen(), fen)
+        self.assertEqual(board.ply, 0)
+        # the moves of an iteration that runs out of time are taken back
+        search = Search(self.player(board, "Red"), time.time(), 50)
+        value, move, depth = search.iterative_deepening(board, 30, "Red")
+        self.assertLess(depth, 30)
+        self.assertIn(move, board.generate_moves("Red"))
+        self.assertEqual(board.to_fen(), fen)
+        self.assertEqual(board.ply, 0)
+        player = self.player(board, "Red")
+        self.assertIn(player.get_best_move(3, False, True, 0), board.generate_moves("Red"))
+
+    def test_aspiration_search(self):
+        # a guess far off the value only costs some re-searches
+        board = Board()
+        board.fen_notation_into_bb("b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0")
+        board.set_player_to_move("Red")
+        expected = self.search(board, "Red", 2, cutoff=True)[0]
+        for guess in (-1000, 0, 1000):
+            search = Search(self.player(board, "Red"), time.time(), float('inf'), parameters=self.EXACT)
+            value, move = search.aspiration_search(board, 2, "Red", guess)
+            self.assertEqual(-value, expected)
+
+    def quiescence(self, fen, color, depth=None):
+        board = Board()
+        board.fen_notation_into_bb(fen)
+        board.set_player_to_move(color)
+        search = Search(self.player(board, color), time.time(), float('inf'))
+        if depth is None:
+            value, move = search.quiescence(board, float('-inf'), float('inf'), color)
+        else:
+            value, move = search.quiescence(board, float('-inf'), float('inf'), color, depth)
+        self.assertEqual(board.to_fen(), fen)
+        return value, move, search.evaluate(board, color)
+
+    def test_quiescence_quiet(self):
+        # nothing to capture and no threat: the position is scored as it is
+        value, move, stand_pat = self.quiescence("b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0", "Red")
+        self.assertEqual(value, stand_pat)
+        self.assertIsNone(move)
+
+    def test_quiescence_capture(self):
+        # the red double on B5 hangs
+        value, move, stand_pat = self.quiescence("6/8/8/2b05/1rr6/8/6r01/6", "Blue")
+        self.assertGreater(value, stand_pat)
+        self.assertEqual(move_to_string(move), "C4-B5")
+
+    def test_quiescence_threat(self):
+        # blue moves onto the goal rank next: red has to capture, standing pat is not allowed
+        value, move, stand_pat = self.quiescence("6/8/8/8/8/8/2b03r01/2r03", "Red")
+        self.assertEqual(move_to_string(move), "D8-C7")
+        self.assertGreater(value, stand_pat)
+        # without a capture the threat can not be stopped
+        value, move, stand_pat = self.quiescence("6/8/8/8/8/8/2b03r01/4r01", "Red")
+        self.assertEqual(value, float('-inf'))
+        # at the end of the quiescence search even a threatened position is scored as it is
+        value, move, stand_pat = self.quiescence("6/8/8/8/8/8/2b03r01/4r01", "Red", depth=0)
+        self.assertEqual(value, stand_pat)
+
+    def test_selective_search(self):
+        # null-move pruning and late move reductions search fewer nodes and still play legal moves
+        board = Board()
+        board.fen_notation_into_bb("b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0")
+        board.set_player_to_move("Red")
+        fen = board.to_fen()
+        nodes = {}
+        for name, parameters in (("exact", self.EXACT), ("null move", SearchParameters(late_move_reductions=False)),
+                                 ("reductions", SearchParameters(null_move=False)), ("both", SearchParameters())):
+            search = Search(self.player(board, "Red"), time.time(), float('inf'), parameters=parameters)
+            value, move, depth = search.iterative_deepening(board, 5, "Red")
+            self.assertEqual(board.to_fen(), fen)
+            self.assertIn(move, board.generate_moves("Red"), name)
+            nodes[name] = search.nodes
+        self.assertLess(nodes["null move"], nodes["exact"])
+        self.assertLess(nodes["reductions"], nodes["exact"])
+        self.assertLess(nodes["both"], nodes["exact"])
+
+    def test_selective_search_needs_cutoff(self):
+        # without cutoffs the search stays exhaustive
+        board = Board()
+        board.fen_notation_into_bb("6/8/5bb2/2b05/1rr1r02r01/8/8/6")
+        board.set_player_to_move("Blue")
+        self.assertEqual(self.search(board, "Blue", 3, cutoff=False, parameters=SearchParameters()),
+                         self.search(board, "Blue", 3, cutoff=False))
+
+    def test_game_over_scored_by_winner(self):
+        # blue stands on its goal rank and is to move: blue has won, not lost
+        board = Board()
+        board.fen_notation_into_bb("r05/8/8/8/8/8/8/1b04")
+        board.set_player_to_move("Blue")
+        search = Search(self.player(board, "Blue"), time.time(), float('inf'))
+        self.assertEqual(search.pvs(board, 2, float('-inf'), float('inf'), "Blue")[0], float('inf'))
+        self.assertEqual(search.search(board, 2, float('-inf'), float('inf'), "Blue")[0], float('inf'))
+
+    def test_player_alpha_beta(self):
+        # the players keep scoring from Blue's point of view
+        board = Board()
+        board.fen_notation_into_bb("6/8/8/8/8/8/1b06/4r01")
+        board.set_player_to_move("Red")
+        player = self.player(board, "Red")
+        value, move, count = player.alpha_beta(board, 2, float('-inf'), float('inf'), False, False, True, 0, time.time(), 10000)
+        self.assertEqual(value, float('inf'))
+        self.assertGreater(count, 0)
+
+    def test_player_search_parameters(self):
+        # the players search with their own settings
+        board = Board()
+        board.fen_notation_into_bb("6/8/5bb2/2b05/1rr1r02r01/8/8/6")
+        board.set_player_to_move("Blue")
+        player = self.player(board, "Blue")
+        player.search_parameters = self.EXACT
+        value, move, count = player.alpha_beta(board, 3, float('-inf'), float('inf'), True, False, True, 0, time.time(), float('inf'))
+        self.assertEqual(value, self.search(board, "Blue", 3, cutoff=True)[0])
+
+    def test_timeout(self):
+        board = Board()
+        board.fen_notation_into_bb("b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0")
+        board.set_player_to_move("Red")
+        search = Search(self.player(board, "Red"), time.time(), 0)
+        with self.assertRaises(TimeoutError):
+            search.search(board, 3, float('-inf'), float('inf'), "Red")
+
+
+if __name__ == '__main__':
+    unittest.main()
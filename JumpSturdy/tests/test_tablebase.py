@@ -0,0 +1,142 @@
+import os
+import random
+import tempfile
+import unittest
+from JumpSturdy.ai import tablebase
+from JumpSturdy.ai.player import AIPlayer
+from game_state.board import Board
+
+
+def minimax(board, color, depth):
+    """Exact result of a position for the player to move, None if it is not decided within depth plies."""
+    moves = board.generate_moves(color)
+    if not moves:
+        return tablebase.LOSS
+    other_color = "Red" if color == "Blue" else "Blue"
+    best = tablebase.LOSS
+    for move in moves:
+        board.make_move(move)
+        game_over, winner = board.is_game_over()
+        if game_over:
+            result = tablebase.WIN if winner == color else tablebase.LOSS
+        elif not board.generate_moves(other_color):
+            # as in the solver, leaving the opponent without a move wins with this move
+            result = tablebase.WIN
+        elif depth == 1:
+            result = None
+        else:
+            result = minimax(board, other_color, depth - 1)
+            result = None if result is None else -result
+        board.undo_move()
+        if result == tablebase.WIN:
+            return result
+        if result is None:
+            best = None
+    return best
+
+
+class TestTablebase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix='.bin')
+        os.close(handle)
+        cls.count = tablebase.write_tablebase(cls.path, 2)
+        cls.table = tablebase.Tablebase(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.table
+        os.remove(cls.path)
+
+    def board(self, fen, color):
+        board = Board()
+        board.fen_notation_into_bb(fen)
+        board.set_player_to_move(color)
+        return board
+
+    def test_header(self):
+        self.assertEqual(self.table.max_pieces, 2)
+        self.assertEqual(len(self.table), self.count)
+        self.assertTrue((self.table.keys[1:] > self.table.keys[:-1]).all())
+
+    def test_known_positions(self):
+        # blue single one step from its goal rank wins at once
+        self.assertEqual(self.table.probe(self.board("6/8/8/8/8/8/1b06/1r04", "Blue")), (tablebase.WIN, 1))
+        # ... and red to move can only capture it
+        self.assertEqual(self.table.probe(self.board("6/8/8/8/8/8/1b06/1r04", "Red")), (tablebase.WIN, 1))
+        # red too far away to capture loses after one move
+        self.assertEqual(self.table.probe(self.board("6/8/8/8/8/8/1b06/4r01", "Red")), (tablebase.LOSS, 2))
+        # the side argument overrides the side to move of the board
+        board = self.board("6/8/8/8/8/8/1b06/4r01", "Red")
+        self.assertEqual(self.table.probe(board, "Blue"), (tablebase.WIN, 1))
+
+    def test_mirrored_positions(self):
+        for fen, mirrored in (("b05/8/8/3r04/8/8/8/6", "5b0/8/8/4r03/8/8/8/6"),
+                              ("6/1bb6/8/8/8/8/8/6", "6/6bb1/8/8/8/8/8/6")):
+            for color in ("Blue", "Red"):
+                self.assertEqual(self.table.probe(self.board(fen, color)), self.table.probe(self.board(mirrored, color)))
+
+    def test_too_many_pieces(self):
+        self.assertIsNone(self.table.probe(self.board("6/8/8/8/8/8/1b06/1r0r03", "Blue")))
+
+    def test_against_search(self):
+        random.seed(3)
+        squares = [(rank, column) for rank in range(8) for column in range(8) if rank in (1, 6) or 0 < column < 7]
+        for _ in range(200):
+            (blue_rank, blue_column), (red_rank, red_column) = random.sample(squares, 2)
+            rows = [['0'] * 8 for _ in range(8)]
+            rows[blue_rank][blue_column] = 'b'
+            rows[red_rank][red_column] = 'r'
+            fen = '/'.join(self.row_fen(row, rank) for rank, row in enumerate(rows))
+            color = random.choice(("Blue", "Red"))
+            board = self.board(fen, color)
+            if board.is_game_over()[0]:
+                continue
+            entry = self.table.probe(board)
+            self.assertIsNotNone(entry, fen)
+            # a full search is only affordable for short distances
+            if entry[0] != tablebase.DRAW and entry[1] <= 5:
+                self.assertEqual(minimax(board, color, entry[1]), entry[0], fen + " " + color)
+                if entry[1] > 1:
+                    # not decided any faster
+                    self.assertIsNone(minimax(board, color, entry[1] - 1), fen + " " + color)
+
+    def test_minimax_blocked(self):
+        # E1-G2 takes the only square the red single on H2 can move to, blue wins with this move
+        board = self.board("3bb2/7r0/8/8/8/8/8/6", "Blue")
+        self.assertEqual(minimax(board, "Blue", 1), tablebase.WIN)
+
+    def test_best_move(self):
+        board = self.board("1b04/8/8/3r04/8/8/8/6", "Blue")
+        result, distance = self.table.probe(board)
+        move = self.table.best_move(board, "Blue")
+        self.assertIsNotNone(move)
+        board.make_move(move)
+        if not board.is_game_over()[0]:
+            self.assertEqual(self.table.probe(board, "Red"), (-result, distance - 1) if result != tablebase.DRAW else (result, 0))
+
+    def test_player_uses_tablebase(self):
+        board = self.board("6/8/8/8/8/8/1b06/1r04", "Blue")
+        player = AIPlayer("Blue", board, 1, 1)
+        player.tablebase = self.table
+        move = player.get_best_move(2, False, False, 1000)
+        board.make_move(move)
+        self.assertEqual(board.is_game_over(), (True, "Blue"))
+
+    @staticmethod
+    def row_fen(row, rank):
+        if rank in (0, 7):
+            row = row[1:7]
+        fen, empty = '', 0
+        for cell in row:
+            if cell == '0':
+                empty += 1
+                continue
+            fen += (str(empty) if empty else '') + cell + '0'
+            empty = 0
+        return fen + (str(empty) if empty else '')
+
+
+if __name__ == '__main__':
+    unittest.main()
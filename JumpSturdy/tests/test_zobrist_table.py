@@ -1,36 +1,102 @@
 import unittest
-from ai.player import AIPlayer
+import random
 from game_state.board import Board
 from tests.test_ai import create_random_fen
-from tests.test_ai import get_random_piece
 
 
+def play_random_moves(board, color, count):
+    # play up to count random moves, alternating colors, and return the number of moves made
+    made = 0
+    for i in range(count):
+        moves = board.generate_moves(color)
+        if board.is_game_over()[0] or not moves:
+            break
+        board.apply_move(random.choice(moves))
+        made += 1
+        color = "Blue" if color == "Red" else "Red"
+    return made
 
-# create board
-board = Board()
-board.initialize()
-get_random_piece(1)
-random_fen = create_random_fen()
 
-# create player
-player = AIPlayer("Blue", board)
+class TestZobrist(unittest.TestCase):
 
-# create zobrist hash
-# define contants
-BOARD_SIZE = 2
-NUM_PIECES = 2
-# init hash table
-Hash_table = player.initialize_zobrist_table(BOARD_SIZE, NUM_PIECES)
-print("----------------------------")
-print("This is Hashtable:", Hash_table)
-print("This is get_Hashtable:", player.get_zobrist_table())
+    def test_hash_after_fen(self):
+        board = Board()
+        board.fen_notation_into_bb("b0b0b0b0b0b0/1b0b0b0b0b0b01/8/8/8/8/1r0r0r0r0r0r01/r0r0r0r0r0r0")
+        self.assertEqual(board.board_hash, board.calculate_zobrist_hash(64, board.blue_to_move))
 
-# calculate hash
-print("---------------------------------")
-print("Calculate zobrist hash: ")
-player.calculate_zobrist_hash(player.get_zobrist_table(), BOARD_SIZE, 0, NUM_PIECES)
+    def test_incremental_hash_matches_full_hash(self):
+        random.seed(1)
+        for i in range(50):
+            board = Board()
+            board.fen_notation_into_bb(create_random_fen())
+            color = random.choice(["Blue", "Red"])
+            board.set_player_to_move(color)
+            play_random_moves(board, color, 40)
+            self.assertEqual(board.board_hash, board.calculate_zobrist_hash(64, board.blue_to_move))
 
+    def test_undo_restores_hash(self):
+        random.seed(2)
+        board = Board()
+        board.initialize()
+        start_hash = board.board_hash
+        made = play_random_moves(board, "Red", 30)
+        for i in range(made):
+            board.undo_move()
+            self.assertEqual(board.board_hash, board.calculate_zobrist_hash(64, board.blue_to_move))
+        self.assertEqual(board.board_hash, start_hash)
 
-# Tests
-print("This is board: ", board.print_board())
-print("This is player: ", player.color)
\ No newline at end of file
+    def test_side_to_move_changes_hash(self):
+        board = Board()
+        board.initialize()
+        red_hash = board.board_hash
+        board.set_player_to_move("Blue")
+        self.assertNotEqual(board.board_hash, red_hash)
+        board.set_player_to_move("Red")
+        self.assertEqual(board.board_hash, red_hash)
+
+    def test_copy_keeps_hash(self):
+        board = Board()
+        board.initialize()
+        copy = board.copy_board()
+        move = copy.generate_moves("Red")[0]
+        copy.apply_move(move)
+        board.apply_move(move)
+        self.assertEqual(copy.board_hash, board.board_hash)
+
+    def test_hash_shared_between_boards(self):
+        # every board uses the same seeded table, so equal positions give equal hashes
+        fen = "b01bbb01b0/1b02b03/3bbr01b01/8/3rr1b0b01/8/2r01r01rr1/r0r0r01r01"
+        first = Board()
+        first.fen_notation_into_bb(fen)
+        second = Board()
+        second.fen_notation_into_bb(fen)
+        self.assertEqual(first.board_hash, second.board_hash)
+        self.assertIs(first.zobrist_table, second.zobrist_table)
+
+    def test_clone(self):
+        board = Board()
+        board.initialize()
+        board.apply_move(board.generate_moves("Red")[0])
+        clone = board.clone()
+        self.assertEqual(clone.get_state(), board.get_state())
+        self.assertEqual(clone.board_hash, board.board_hash)
+        self.assertEqual(clone.undo_move(), "Error: No move to undo")
+        move = clone.generate_moves("Blue")[0]
+        clone.apply_move(move)
+        self.assertNotEqual(clone.get_state(), board.get_state())
+        self.assertEqual(clone.board_hash, clone.calculate_zobrist_hash(64, clone.blue_to_move))
+
+
+    def test_mirror_hash(self):
+        random.seed(3)
+        board = Board()
+        board.fen_notation_into_bb(create_random_fen())
+        play_random_moves(board, "Red", 20)
+        self.assertEqual(board.mirror_hash, board.calculate_zobrist_hash(64, board.blue_to_move, mirrored=True))
+        mirrored = board.mirrored()
+        self.assertEqual(mirrored.board_hash, board.mirror_hash)
+        self.assertEqual(mirrored.canonical_key()[0], board.canonical_key()[0])
+        self.assertNotEqual(mirrored.canonical_key()[1], board.canonical_key()[1])
+
+if __name__ == '__main__':
+    unittest.main()